@@ -55,14 +55,45 @@ class Settings(BaseSettings):
     # WebSocket
     WS_HEARTBEAT_INTERVAL: int = Field(default=30, env="WS_HEARTBEAT_INTERVAL")
     WS_MAX_MESSAGE_SIZE: int = Field(default=10 * 1024 * 1024, env="WS_MAX_MESSAGE_SIZE")  # 10MB
+    WS_TOKEN_FLUSH_MS: int = Field(default=40, env="WS_TOKEN_FLUSH_MS")  # 0 sends every token
+    WS_TOKEN_FLUSH_BYTES: int = Field(default=512, env="WS_TOKEN_FLUSH_BYTES")
+    WS_SEND_QUEUE_SIZE: int = Field(default=256, env="WS_SEND_QUEUE_SIZE")  # frames per connection
+    WS_SEND_QUEUE_OVERFLOW: str = Field(default="drop_partial", env="WS_SEND_QUEUE_OVERFLOW")
+    # Options: drop_partial, disconnect
+    
+    # Cluster — route WebSocket messages between gateway nodes via Redis
+    NODE_ID: str = Field(default="", env="NODE_ID")  # generated when empty
+    WS_CLUSTER_ENABLED: bool = Field(default=True, env="WS_CLUSTER_ENABLED")
+    WS_BROADCAST_TIMEOUT: float = Field(default=5.0, env="WS_BROADCAST_TIMEOUT")  # seconds per socket
     
     # Audio
-    MAX_AUDIO_SIZE_MB: int = Field(default=50, env="MAX_AUDIO_SIZE_MB")
+    MAX_AUDIO_SIZE_MB: int = Field(default=50, env="MAX_AUDIO_SIZE_MB")  # per utterance
+    AUDIO_BUFFER_BUDGET_MB: int = Field(default=512, env="AUDIO_BUFFER_BUDGET_MB")  # all connections
+    AUDIO_SPILL_THRESHOLD_MB: int = Field(default=0, env="AUDIO_SPILL_THRESHOLD_MB")  # 0 disables spill to disk
     SUPPORTED_AUDIO_FORMATS: List[str] = Field(
         default=["wav", "mp3", "ogg", "webm", "pcm"],
         env="SUPPORTED_AUDIO_FORMATS"
     )
+    STT_STREAMING_UPLOAD: bool = Field(default=True, env="STT_STREAMING_UPLOAD")  # upload while recording
+    STT_MIN_CONFIDENCE: float = Field(default=0.35, env="STT_MIN_CONFIDENCE")  # 0 disables
+    STT_MAX_NO_SPEECH_PROB: float = Field(default=0.6, env="STT_MAX_NO_SPEECH_PROB")  # 1 disables
+    STT_LOW_CONFIDENCE_ACTION: str = Field(default="drop", env="STT_LOW_CONFIDENCE_ACTION")
+    # Options: drop, confirm (ask the client to confirm before calling the LLM)
+    STT_LANGUAGE_PINNING: bool = Field(default=True, env="STT_LANGUAGE_PINNING")  # hint the detected language
+    STT_LANGUAGE_PIN_CONFIDENCE: float = Field(default=0.8, env="STT_LANGUAGE_PIN_CONFIDENCE")
+    STT_LANGUAGE_PIN_AFTER: int = Field(default=2, env="STT_LANGUAGE_PIN_AFTER")  # utterances
+    STT_LANGUAGE_REDETECT_CONFIDENCE: float = Field(default=0.5, env="STT_LANGUAGE_REDETECT_CONFIDENCE")
     
+    # Conversation Context
+    CONTEXT_MAX_MESSAGES: int = Field(default=10, env="CONTEXT_MAX_MESSAGES")
+    CONTEXT_MAX_TOKENS: int = Field(default=2000, env="CONTEXT_MAX_TOKENS")
+    CONTEXT_DELTA_ENABLED: bool = Field(default=True, env="CONTEXT_DELTA_ENABLED")
+    TOKENIZER_ENCODING: str = Field(default="cl100k_base", env="TOKENIZER_ENCODING")
+    SUMMARY_ENABLED: bool = Field(default=True, env="SUMMARY_ENABLED")
+    SUMMARY_MIN_MESSAGES: int = Field(default=4, env="SUMMARY_MIN_MESSAGES")
+    SUMMARY_MAX_TOKENS: int = Field(default=256, env="SUMMARY_MAX_TOKENS")
+    SUMMARY_MAX_PENDING_MESSAGES: int = Field(default=8, env="SUMMARY_MAX_PENDING_MESSAGES")  # unsummarized turns kept past the budget
+
     # Logging
     LOG_LEVEL: str = Field(default="INFO", env="LOG_LEVEL")
     LOG_FORMAT: str = Field(default="json", env="LOG_FORMAT")
@@ -71,6 +102,13 @@ class Settings(BaseSettings):
     REQUEST_TIMEOUT: int = Field(default=30, env="REQUEST_TIMEOUT")
     STREAM_CHUNK_SIZE: int = Field(default=1024, env="STREAM_CHUNK_SIZE")
     
+    # Request Coalescing — share one upstream call between identical concurrent requests
+    COALESCE_TTS_REQUESTS: bool = Field(default=True, env="COALESCE_TTS_REQUESTS")
+    
+    # TTS audio sent to WebSocket clients
+    TTS_STREAM_FORMAT: str = Field(default="mp3", env="TTS_STREAM_FORMAT")
+    # Options: mp3, opus (Ogg Opus, smallest), pcm (16-bit 24kHz mono, no decoding), wav
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -35,6 +35,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     
     # Start background tasks
     heartbeat_task = asyncio.create_task(service_registry.heartbeat_loop())
+    await websocket.manager.start()
     
     logger.info("API Gateway started successfully")
     
@@ -44,6 +45,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     logger.info("Shutting down API Gateway")
     
     # Cancel background tasks
+    await websocket.manager.stop()
     heartbeat_task.cancel()
     try:
         await heartbeat_task
@@ -1,6 +1,5 @@
 """Chat API endpoints."""
 from typing import AsyncGenerator, Optional
-import json
 
 from fastapi import APIRouter, HTTPException, Depends, Header
 from fastapi.responses import StreamingResponse
@@ -10,6 +9,8 @@ import structlog
 
 from app.services.session_manager import session_manager
 from app.services.service_registry import service_registry
+from app.services.upstream import generate_llm
+from app.services.sse import encode_frame, is_final_frame, iter_sse_frames, parse_frame
 from app.config import settings
 
 logger = structlog.get_logger()
@@ -50,8 +51,8 @@ async def chat(request: ChatRequest):
         request.message,
     )
     
-    # Get conversation context
-    context = await session_manager.get_conversation_context(request.session_id)
+    # Get conversation context (delta since the LLM service's cached version)
+    llm_context = await session_manager.get_llm_context(request.session_id)
     
     # Get LLM service
     llm_service = service_registry.get_healthy_service("llm")
@@ -63,41 +64,50 @@ async def chat(request: ChatRequest):
     start_time = time.time()
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{llm_service.url}/generate",
-                json={
+        for attempt in range(2):
+            response = await generate_llm(
+                llm_service.url,
+                {
                     "session_id": request.session_id,
-                    "messages": context,
+                    **llm_context.payload(),
                     "stream": False,
                     "temperature": request.temperature,
                     "max_tokens": request.max_tokens,
                 },
-                timeout=60.0,
             )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=502,
-                    detail=f"LLM service error: {response.text}"
+            if response.status_code == 409 and llm_context.delta:
+                # LLM service lost our context; resend the full window
+                llm_context = await session_manager.get_llm_context(
+                    request.session_id, resync=True
                 )
-            
-            result = response.json()
-            latency_ms = (time.time() - start_time) * 1000
-            
-            # Add assistant response to session
-            await session_manager.add_message(
-                request.session_id,
-                "assistant",
-                result["text"],
-            )
-            
-            return ChatResponse(
-                session_id=request.session_id,
-                response=result["text"],
-                latency_ms=latency_ms,
-                tokens_used=result.get("tokens_used"),
+                continue
+            break
+        
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=502,
+                detail=f"LLM service error: {response.text}"
             )
+        
+        result = response.json()
+        latency_ms = (time.time() - start_time) * 1000
+        
+        # Add assistant response to session
+        await session_manager.add_message(
+            request.session_id,
+            "assistant",
+            result["text"],
+        )
+        session_manager.mark_llm_synced(
+            request.session_id, llm_context, result.get("context_version")
+        )
+        
+        return ChatResponse(
+            session_id=request.session_id,
+            response=result["text"],
+            latency_ms=latency_ms,
+            tokens_used=result.get("tokens_used"),
+        )
             
     except httpx.RequestError as e:
         logger.error("LLM request failed", error=str(e))
@@ -120,45 +130,59 @@ async def chat_stream(request: ChatRequest):
         request.message,
     )
     
-    # Get conversation context
-    context = await session_manager.get_conversation_context(request.session_id)
+    # Get conversation context (delta since the LLM service's cached version)
+    llm_context = await session_manager.get_llm_context(request.session_id)
     
     # Get LLM service
     llm_service = service_registry.get_healthy_service("llm")
     if not llm_service:
         raise HTTPException(status_code=503, detail="LLM service unavailable")
     
-    async def generate_stream() -> AsyncGenerator[str, None]:
-        """Generate SSE stream."""
-        full_response = ""
+    async def generate_stream() -> AsyncGenerator[bytes, None]:
+        """Relay the LLM service's SSE frames to the client unchanged."""
+        nonlocal llm_context
+        full_response = None
+        context_version = None
         
         try:
             async with httpx.AsyncClient() as client:
-                async with client.stream(
-                    "POST",
-                    f"{llm_service.url}/generate",
-                    json={
-                        "session_id": request.session_id,
-                        "messages": context,
-                        "stream": True,
-                        "temperature": request.temperature,
-                        "max_tokens": request.max_tokens,
-                    },
-                    timeout=60.0,
-                ) as response:
-                    
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data = json.loads(line[6:])
-                            
-                            if data.get("chunk"):
-                                chunk = data["chunk"]
-                                full_response += chunk
-                                yield f"data: {json.dumps({'chunk': chunk, 'done': False})}\n\n"
-                            
-                            if data.get("done"):
-                                yield f"data: {json.dumps({'chunk': '', 'done': True, 'full_response': full_response})}\n\n"
+                for attempt in range(2):
+                    async with client.stream(
+                        "POST",
+                        f"{llm_service.url}/generate",
+                        json={
+                            "session_id": request.session_id,
+                            **llm_context.payload(),
+                            "stream": True,
+                            "temperature": request.temperature,
+                            "max_tokens": request.max_tokens,
+                        },
+                        timeout=60.0,
+                    ) as response:
+                        if response.status_code == 409 and llm_context.delta:
+                            # LLM service lost our context; resend the full window
+                            llm_context = await session_manager.get_llm_context(
+                                request.session_id, resync=True
+                            )
+                            continue
+                        
+                        if response.status_code != 200:
+                            yield encode_frame({"error": f"LLM service returned {response.status_code}"})
+                            return
+                        
+                        # Token frames are forwarded byte-for-byte; only the
+                        # closing frame is decoded for the assembled answer.
+                        async for frame in iter_sse_frames(response.aiter_bytes()):
+                            yield frame
+                            if is_final_frame(frame):
+                                data = parse_frame(frame)
+                                full_response = data.get("full_response", "")
+                                context_version = data.get("context_version")
                                 break
+                    break
+            
+            if full_response is None:
+                return
             
             # Save to session
             await session_manager.add_message(
@@ -166,10 +190,11 @@ async def chat_stream(request: ChatRequest):
                 "assistant",
                 full_response,
             )
+            session_manager.mark_llm_synced(request.session_id, llm_context, context_version)
             
         except Exception as e:
             logger.error("Stream error", error=str(e))
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield encode_frame({"error": str(e)})
     
     return StreamingResponse(
         generate_stream(),
@@ -1,13 +1,18 @@
 """TTS API endpoints."""
-from typing import Optional
-import base64
+from typing import AsyncGenerator, Optional
+import time
 
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 import httpx
 import structlog
 
+from app.config import settings
+from app.services.request_coalescer import UpstreamStatusError
 from app.services.service_registry import service_registry
+from app.services.upstream import stream_tts_audio, tts_content_type
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -19,103 +24,88 @@ class TTSRequest(BaseModel):
     text: str
     voice_id: Optional[str] = "default"
     speed: float = 1.0
-    format: str = "wav"
+    format: str = "mp3"  # mp3, opus, pcm or wav
 
 
-class TTSResponse(BaseModel):
-    """TTS response model."""
-    session_id: str
-    audio_base64: str
-    format: str
-    duration_ms: Optional[float]
-
+async def _open_tts_stream(request: TTSRequest, attachment: bool) -> StreamingResponse:
+    """Relay the TTS service's chunked audio to the client.
 
-@router.post("/", response_model=TTSResponse)
-async def text_to_speech(request: TTSRequest):
-    """Convert text to speech."""
+    Waits for the first audio chunk before answering, so upstream errors
+    still map to an HTTP error status and the time to first byte can be
+    reported in the headers. After that, chunks are forwarded as they
+    arrive; at most STREAM_CHUNK_SIZE bytes are held at a time.
+    """
     
     # Get TTS service
     tts_service = service_registry.get_healthy_service("tts")
     if not tts_service:
         raise HTTPException(status_code=503, detail="TTS service unavailable")
     
+    start_time = time.perf_counter()
+    audio = stream_tts_audio(
+        tts_service.url,
+        {
+            "session_id": request.session_id,
+            "text": request.text,
+            "voice_id": request.voice_id,
+            "speed": request.speed,
+            "format": request.format,
+        },
+        coalesce=False,
+        chunk_size=settings.STREAM_CHUNK_SIZE,
+    )
+    
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{tts_service.url}/synthesize",
-                json={
-                    "session_id": request.session_id,
-                    "text": request.text,
-                    "voice_id": request.voice_id,
-                    "speed": request.speed,
-                    "format": request.format,
-                },
-                timeout=30.0,
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=502,
-                    detail=f"TTS service error: {response.text}"
-                )
-            
-            result = response.json()
-            
-            return TTSResponse(
-                session_id=request.session_id,
-                audio_base64=base64.b64encode(result["audio_data"]).decode("utf-8"),
-                format=result.get("format", "wav"),
-                duration_ms=result.get("duration_ms"),
-            )
-            
+        first_chunk = await audio.__anext__()
+    except StopAsyncIteration:
+        first_chunk = b""
+    except UpstreamStatusError as e:
+        # An output format the TTS service cannot produce is the client's problem
+        status = 415 if e.status_code == 415 else 502
+        raise HTTPException(status_code=status, detail=f"TTS service error: {e.body}")
     except httpx.RequestError as e:
         logger.error("TTS request failed", error=str(e))
         raise HTTPException(status_code=502, detail="TTS service unreachable")
+    
+    first_byte_ms = (time.perf_counter() - start_time) * 1000
+    
+    async def relay() -> AsyncGenerator[bytes, None]:
+        try:
+            if first_chunk:
+                yield first_chunk
+            async for chunk in audio:
+                yield chunk
+        except httpx.HTTPError as e:
+            # Headers are already sent; all we can do is end the stream
+            logger.error("TTS stream interrupted", error=str(e), session_id=request.session_id)
+        finally:
+            await audio.aclose()
+    
+    headers = {
+        "X-Session-ID": request.session_id,
+        "X-First-Byte-Ms": f"{first_byte_ms:.1f}",
+    }
+    if attachment:
+        headers["Content-Disposition"] = f"attachment; filename=tts.{request.format}"
+    
+    return StreamingResponse(
+        relay(),
+        media_type=tts_content_type(request.format),
+        headers=headers,
+        background=BackgroundTask(audio.aclose),
+    )
+
+
+@router.post("/")
+async def text_to_speech(request: TTSRequest):
+    """Convert text to speech, streaming the audio as it is synthesized."""
+    return await _open_tts_stream(request, attachment=False)
 
 
 @router.post("/stream")
 async def text_to_speech_stream(request: TTSRequest):
-    """Stream TTS audio."""
-    
-    # Get TTS service
-    tts_service = service_registry.get_healthy_service("tts")
-    if not tts_service:
-        raise HTTPException(status_code=503, detail="TTS service unavailable")
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{tts_service.url}/synthesize",
-                json={
-                    "session_id": request.session_id,
-                    "text": request.text,
-                    "voice_id": request.voice_id,
-                    "speed": request.speed,
-                    "format": request.format,
-                },
-                timeout=30.0,
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=502,
-                    detail=f"TTS service error: {response.text}"
-                )
-            
-            result = response.json()
-            
-            return Response(
-                content=result["audio_data"],
-                media_type=f"audio/{request.format}",
-                headers={
-                    "Content-Disposition": f"attachment; filename=tts.{request.format}",
-                    "X-Duration-Ms": str(result.get("duration_ms", "")),
-                },
-            )
-            
-    except httpx.RequestError as e:
-        logger.error("TTS request failed", error=str(e))
-        raise HTTPException(status_code=502, detail="TTS service unreachable")
+    """Stream TTS audio as a downloadable file."""
+    return await _open_tts_stream(request, attachment=True)
 
 
 @router.get("/voices")
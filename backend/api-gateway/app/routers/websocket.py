@@ -2,7 +2,7 @@
 import asyncio
 import base64
 import json
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, HTTPException
 import httpx
@@ -11,6 +11,16 @@ import structlog
 from app.config import settings
 from app.services.session_manager import session_manager
 from app.services.service_registry import service_registry
+from app.services.request_coalescer import UpstreamStatusError
+from app.services.upstream import stream_tts_audio, tts_content_type
+from app.services.sse import DATA_PREFIX, iter_sse_frames, parse_frame
+from app.services.ws_protocol import PRIORITY_AUDIO, PRIORITY_TEXT, ClientChannel, negotiate_subprotocol
+from app.services.token_batcher import TokenBatcher
+from app.services.ws_cluster import cluster_relay
+from app.services.stt_upload import STTUpload
+from app.services.audio_buffer import AudioBuffer, AudioLimitExceeded, audio_budget
+from app.services.transcript_filter import REASON_LOW_CONFIDENCE, REASON_NO_SPEECH, transcript_filter
+from app.services.language_pin import SessionLanguage, language_pinner
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -20,41 +30,114 @@ class ConnectionManager:
     """Manage WebSocket connections."""
     
     def __init__(self):
-        self._connections: Dict[str, WebSocket] = {}
+        self._connections: Dict[str, ClientChannel] = {}
     
-    async def connect(self, session_id: str, websocket: WebSocket):
-        """Accept and store connection."""
-        await websocket.accept()
-        self._connections[session_id] = websocket
-        logger.info("WebSocket connected", session_id=session_id)
+    async def connect(self, session_id: str, websocket: WebSocket) -> ClientChannel:
+        """Accept and store connection, negotiating the wire protocol."""
+        subprotocol = negotiate_subprotocol(websocket)
+        await websocket.accept(subprotocol=subprotocol)
+        channel = ClientChannel(websocket, subprotocol)
+        channel.start()
+        previous = self._connections.get(session_id)
+        self._connections[session_id] = channel
+        if previous is not None:
+            # A reconnecting client replaces its stale socket
+            previous.close_socket(4003, "Session connected elsewhere")
+            logger.info("WebSocket replaced", session_id=session_id)
+        await cluster_relay.claim(session_id)
+        logger.info("WebSocket connected", session_id=session_id, binary=channel.binary)
+        return channel
     
-    def disconnect(self, session_id: str):
-        """Remove connection."""
-        if session_id in self._connections:
-            del self._connections[session_id]
-            logger.info("WebSocket disconnected", session_id=session_id)
+    def disconnect(self, session_id: str, channel: ClientChannel):
+        """Remove a connection, unless a newer one has replaced it."""
+        channel.close()
+        if self._connections.get(session_id) is not channel:
+            return
+        del self._connections[session_id]
+        asyncio.create_task(cluster_relay.release(session_id))
+        logger.info("WebSocket disconnected", session_id=session_id, **channel.get_stats())
     
-    async def send_message(self, session_id: str, message: dict):
-        """Send message to specific session."""
-        if session_id in self._connections:
-            await self._connections[session_id].send_json(message)
+    async def start(self):
+        """Start receiving messages routed from other gateway nodes."""
+        await cluster_relay.start(self.send_local, self.broadcast_local)
+    
+    async def stop(self):
+        """Stop the cluster relay."""
+        await cluster_relay.stop()
+    
+    async def send_message(self, session_id: str, message: dict) -> bool:
+        """Send message to specific session, on this node or another one."""
+        if await self.send_local(session_id, message):
+            return True
+        try:
+            return await cluster_relay.send(session_id, message)
+        except Exception as e:
+            logger.error("Failed to route message", session_id=session_id, error=str(e))
+            return False
+    
+    async def send_local(self, session_id: str, message: dict) -> bool:
+        """Send message to a session connected to this node."""
+        channel = self._connections.get(session_id)
+        if channel is None:
+            return False
+        await channel.send_event(message)
+        return True
     
     async def broadcast(self, message: dict):
-        """Broadcast to all connections."""
-        for session_id, ws in self._connections.items():
-            try:
-                await ws.send_json(message)
-            except Exception as e:
+        """Broadcast to all connections on every gateway node."""
+        try:
+            await cluster_relay.publish_broadcast(message)
+        except Exception as e:
+            logger.error("Failed to publish broadcast", error=str(e))
+        await self.broadcast_local(message)
+    
+    async def broadcast_local(self, message: dict):
+        """Broadcast to this node's connections concurrently."""
+        channels = list(self._connections.items())
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(channel.send_event(message), settings.WS_BROADCAST_TIMEOUT)
+                for _, channel in channels
+            ),
+            return_exceptions=True,
+        )
+        for (session_id, _), result in zip(channels, results):
+            if isinstance(result, BaseException):
                 logger.error(
                     "Failed to broadcast",
                     session_id=session_id,
-                    error=str(e),
+                    error=str(result) or type(result).__name__,
                 )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Aggregate connection and send queue statistics.
+        
+        Totals only; session IDs are not exposed on this unauthenticated endpoint.
+        """
+        channels = [c.get_stats() for c in self._connections.values()]
+        return {
+            "connections": len(channels),
+            "binary_connections": sum(1 for s in channels if s["binary"]),
+            "audio": audio_budget.get_stats(),
+            "queued_frames": sum(s["depth"] for s in channels),
+            "max_queue_depth": max((s["max_depth"] for s in channels), default=0),
+            "frames_sent": sum(s["sent"] for s in channels),
+            "frames_dropped": sum(s["dropped"] for s in channels),
+            "cluster": cluster_relay.get_stats(),
+            "transcripts": transcript_filter.get_stats(),
+            "languages": language_pinner.get_stats(),
+        }
 
 
 manager = ConnectionManager()
 
 
+@router.get("/stats")
+async def websocket_stats():
+    """WebSocket connection and send queue statistics."""
+    return manager.get_stats()
+
+
 @router.websocket("/audio-stream")
 async def audio_stream_websocket(
     websocket: WebSocket,
@@ -69,17 +152,27 @@ async def audio_stream_websocket(
         await websocket.close(code=4001, reason="Invalid session")
         return
     
-    await manager.connect(session_id, websocket)
+    channel = await manager.connect(session_id, websocket)
     
     # Get STT service
     stt_service = service_registry.get_healthy_service("stt")
     if not stt_service:
         await websocket.close(code=4002, reason="STT service unavailable")
+        manager.disconnect(session_id, channel)
         return
     
-    # Audio buffer for the current session
-    audio_buffer = bytearray()
+    # Audio buffer for the current session; clients that announce
+    # start_recording stream straight to the STT service instead
+    audio_buffer = AudioBuffer()
     chunk_counter = 0
+    upload: Optional[STTUpload] = None
+    # Set when an utterance overran its audio budget; frames are dropped
+    # until the client starts a new recording
+    discarding = False
+    # Low-confidence transcription awaiting confirm_transcription
+    unconfirmed_text: Optional[str] = None
+    # Detected language, pinned and sent as a hint once confident
+    spoken = SessionLanguage(session.get("config", {}).get("stt_language"))
     
     try:
         async with httpx.AsyncClient(follow_redirects=True) as client:
@@ -90,12 +183,34 @@ async def audio_stream_websocket(
                 if message["type"] == "websocket.disconnect":
                     break
                 
+                payload = message.get("bytes") or message.get("text") or ""
+                if len(payload) > settings.WS_MAX_MESSAGE_SIZE:
+                    logger.warning("WebSocket message too large", session_id=session_id, size=len(payload))
+                    await websocket.close(code=1009, reason="Message too large")
+                    break
+                
                 if "bytes" in message:
-                    # Append binary audio data to buffer
                     chunk = message["bytes"]
-                    audio_buffer.extend(chunk)
+                    if discarding:
+                        continue
+                    try:
+                        if upload is not None:
+                            # Forward audio to the in-flight STT upload
+                            upload.feed(chunk)
+                        else:
+                            # Keep the frame as-is; frames are never concatenated
+                            audio_buffer.append(chunk)
+                    except AudioLimitExceeded as e:
+                        logger.warning("Audio limit exceeded", session_id=session_id, error=str(e))
+                        discarding = True
+                        audio_buffer.clear()
+                        if upload is not None:
+                            upload.abort()
+                            upload = None
+                        await channel.send_event({"type": "error", "message": "Audio too large"})
+                        continue
                     if chunk_counter % 10 == 0:  # Log every 10 chunks to avoid spam
-                        logger.debug("Received audio chunk", size=len(chunk), total_buffer=len(audio_buffer))
+                        logger.debug("Received audio chunk", size=len(chunk), streaming=upload is not None)
                     chunk_counter += 1
                 
                 elif "text" in message:
@@ -104,179 +219,269 @@ async def audio_stream_websocket(
                     msg_type = data.get("type")
                     
                     if msg_type == "ping":
-                        await websocket.send_json({"type": "pong"})
+                        await channel.send_event({"type": "pong"})
                     
                     elif msg_type == "start_recording":
                         logger.info("Starting new recording session, clearing buffer")
                         audio_buffer.clear()
                         chunk_counter = 0
+                        discarding = False
+                        unconfirmed_text = None
+                        if upload is not None:
+                            upload.abort()
+                            upload = None
+                        if settings.STT_STREAMING_UPLOAD:
+                            upload = STTUpload(
+                                client, stt_service.url, session_id, language=language_pinner.hint(spoken)
+                            )
                     
                     elif msg_type == "end_of_speech":
-                        # Process the entire accumulated buffer
-                        buffer_size = len(audio_buffer)
+                        pending, upload = upload, None
+                        discarding = False
+                        buffer_size = pending.bytes_sent if pending else len(audio_buffer)
                         if buffer_size > 0:
-                            logger.info("Processing end of speech", size=buffer_size)
+                            logger.info("Processing end of speech", size=buffer_size, streamed=pending is not None)
                             try:
-                                # Auto-detect audio format from buffer header bytes
-                                audio_bytes = bytes(audio_buffer)
-                                if audio_bytes[:4] == b"RIFF" and audio_bytes[8:12] == b"WAVE":
-                                    filename = "speech.wav"
-                                    content_type = "audio/wav"
+                                if pending is not None:
+                                    # The body is already uploaded; just wait for the result
+                                    response = await pending.finish()
                                 else:
-                                    filename = "speech.webm"
-                                    content_type = "audio/webm"
-                                logger.info("Detected audio format", format=content_type, size=buffer_size)
-
-                                # Ensure we use the trailing slash for the STT service endpoint
-                                response = await client.post(
-                                    f"{stt_service.url}/transcribe/",
-                                    files={"audio": (filename, audio_bytes, content_type)},
-                                    data={
-                                        "session_id": session_id,
-                                        "is_partial": False,
-                                    },
-                                    timeout=60.0,
-                                )
+                                    response = await _upload_buffered_audio(
+                                        client, stt_service.url, session_id, audio_buffer,
+                                        language=language_pinner.hint(spoken),
+                                    )
                                 
                                 if response.status_code == 200:
                                     result = response.json()
                                     text = result.get("text", "").strip()
-                                    logger.info("Transcription success", text=text)
+                                    logger.info("Transcription success", text=text, confidence=result.get("confidence"))
                                     
-                                    if text:
-                                        await websocket.send_json({
-                                            "type": "transcription",
-                                            "text": text,
-                                            "is_partial": False,
-                                        })
+                                    # Noise and unreliable transcripts never reach the LLM
+                                    reason = transcript_filter.check(result) if text else None
+                                    if text and reason != REASON_NO_SPEECH and language_pinner.observe(spoken, result):
+                                        await session_manager.update_config(session_id, {"stt_language": spoken.language})
+                                    if text and reason is None:
+                                        await channel.send_transcription(text, is_partial=False)
                                         # Forward to LLM
                                         await process_complete_transcription(
-                                            session_id, text, websocket
+                                            session_id, text, channel
                                         )
+                                    elif reason == REASON_LOW_CONFIDENCE and settings.STT_LOW_CONFIDENCE_ACTION == "confirm":
+                                        unconfirmed_text = text
+                                        await channel.send_event({
+                                            "type": "transcription_unconfirmed",
+                                            "text": text,
+                                            "confidence": result.get("confidence"),
+                                        })
+                                    elif reason is not None:
+                                        await channel.send_event({
+                                            "type": "error",
+                                            "message": "Could not understand audio",
+                                            "reason": reason,
+                                        })
                                     else:
                                         logger.warn("Transcription returned empty text")
-                                        await websocket.send_json({
+                                        await channel.send_event({
                                             "type": "error",
                                             "message": "Could not understand audio",
                                         })
                                 else:
                                     logger.error("STT service error", status=response.status_code, body=response.text)
-                                    await websocket.send_json({"type": "error", "message": f"STT error: {response.status_code}"})
+                                    await channel.send_event({"type": "error", "message": f"STT error: {response.status_code}"})
                                 
                             except Exception as e:
                                 logger.error("STT processing error", error=str(e))
-                                await websocket.send_json({"type": "error", "message": "Transcription failed"})
+                                await channel.send_event({"type": "error", "message": "Transcription failed"})
                             finally:
                                 # ALWAYS clear buffer after an attempt to process end of speech
+                                if pending is not None:
+                                    pending.abort()
                                 audio_buffer.clear()
                                 chunk_counter = 0
                         else:
+                            if pending is not None:
+                                pending.abort()
                             logger.warn("Received end_of_speech but audio buffer is empty")
                         
+                    elif msg_type == "confirm_transcription":
+                        text, unconfirmed_text = unconfirmed_text, None
+                        if text:
+                            transcript_filter.record_confirmed()
+                            await channel.send_transcription(text, is_partial=False)
+                            await process_complete_transcription(session_id, text, channel)
+                    
+                    elif msg_type == "reject_transcription":
+                        unconfirmed_text = None
+                    
                     elif msg_type == "text_message":
                         text = data.get("text", "").strip()
                         if text:
                             logger.info("Received text message", text=text)
                             await process_complete_transcription(
-                                session_id, text, websocket
+                                session_id, text, channel
                             )
                         
                     elif msg_type == "interrupt":
                         audio_buffer.clear()
-                        await websocket.send_json({"type": "interrupted"})
+                        if upload is not None:
+                            upload.abort()
+                            upload = None
+                        await channel.send_event({"type": "interrupted"})
     
     except WebSocketDisconnect:
         logger.info("Client disconnected", session_id=session_id)
     except Exception as e:
         logger.error("WebSocket error", session_id=session_id, error=str(e))
     finally:
-        manager.disconnect(session_id)
+        if upload is not None:
+            upload.abort()
+        audio_buffer.clear()
+        manager.disconnect(session_id, channel)
+
+
+async def _upload_buffered_audio(
+    client: httpx.AsyncClient,
+    stt_url: str,
+    session_id: str,
+    audio_buffer: AudioBuffer,
+    language: Optional[str] = None,
+) -> httpx.Response:
+    """Upload a fully buffered utterance, streaming its frames without joining them."""
+    params = {"session_id": session_id}
+    if language:
+        params["language"] = language
+    return await client.post(
+        f"{stt_url}/transcribe/stream",
+        content=audio_buffer.iter_chunks(),
+        params=params,
+        headers={"Content-Type": "application/octet-stream"},
+        timeout=60.0,
+    )
 
 
 async def process_complete_transcription(
     session_id: str,
     text: str,
-    websocket: WebSocket,
+    channel: ClientChannel,
 ):
     """Process complete transcription through LLM and TTS with sentence-level streaming."""
     
     # Add user message to session
     await session_manager.add_message(session_id, "user", text)
     
-    # Get conversation context
-    context = await session_manager.get_conversation_context(session_id)
+    # Get conversation context (delta since the LLM service's cached version)
+    llm_context = await session_manager.get_llm_context(session_id)
     
     # Get LLM service
     llm_service = service_registry.get_healthy_service("llm")
     if not llm_service:
-        await websocket.send_json({
+        await channel.send_event({
             "type": "error",
             "message": "LLM service unavailable",
         })
         return
     
     # Stream LLM response
-    full_response = ""
-    sentence_buffer = ""
+    response_parts = []
+    sentence_parts = []
+    sentence_seq = 0
+    context_version = None
+    completed = False
+    failure = None
+    batcher = TokenBatcher(channel.send_token)
     
     try:
         async with httpx.AsyncClient(follow_redirects=True) as client:
-            async with client.stream(
-                "POST",
-                f"{llm_service.url}/generate/",
-                json={
-                    "session_id": session_id,
-                    "messages": context,
-                    "stream": True,
-                },
-                timeout=60.0,
-            ) as response:
-                
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = json.loads(line[6:])
-                        
-                        if data.get("chunk"):
-                            chunk = data["chunk"]
-                            full_response += chunk
-                            sentence_buffer += chunk
+            for attempt in range(2):
+                async with client.stream(
+                    "POST",
+                    f"{llm_service.url}/generate/",
+                    json={
+                        "session_id": session_id,
+                        **llm_context.payload(),
+                        "stream": True,
+                    },
+                    timeout=60.0,
+                ) as response:
+                    if response.status_code == 409 and llm_context.delta:
+                        # LLM service lost our context; resend the full window
+                        llm_context = await session_manager.get_llm_context(session_id, resync=True)
+                        continue
+                    
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        logger.error(
+                            "LLM service error",
+                            status=response.status_code,
+                            body=body[:200].decode("utf-8", "replace"),
+                        )
+                        failure = f"LLM error: {response.status_code}"
+                        break
+                    
+                    async for frame in iter_sse_frames(response.aiter_bytes()):
+                        if frame.startswith(DATA_PREFIX):
+                            data = parse_frame(frame)
                             
-                            # Stream to client
-                            await websocket.send_json({
-                                "type": "llm_chunk",
-                                "content": chunk,
-                                "is_final": False,
-                            })
+                            if data.get("error"):
+                                failure = "LLM processing failed"
+                                break
+                            
+                            if data.get("chunk"):
+                                chunk = data["chunk"]
+                                response_parts.append(chunk)
+                                sentence_parts.append(chunk)
+                                
+                                # Stream to client, coalescing tokens into fewer frames
+                                await batcher.add(chunk)
 
-                            # Start TTS as soon as we have a full sentence
-                            if any(p in chunk for p in (".", "!", "?", "\n")):
-                                sentence = sentence_buffer.strip()
-                                if len(sentence) > 5: # Minimal length for TTS
-                                    # Launch TTS in background to not block LLM stream
-                                    asyncio.create_task(generate_tts(session_id, sentence, websocket))
-                                    sentence_buffer = ""
-                        
-                        if data.get("done"):
-                            break
+                                # Start TTS as soon as we have a full sentence
+                                if any(p in chunk for p in (".", "!", "?", "\n")):
+                                    sentence = "".join(sentence_parts).strip()
+                                    if len(sentence) > 5: # Minimal length for TTS
+                                        # Launch TTS in background to not block LLM stream
+                                        asyncio.create_task(
+                                            generate_tts(session_id, sentence, channel, sentence_seq)
+                                        )
+                                        sentence_seq += 1
+                                        sentence_parts = []
+                            
+                            if data.get("done"):
+                                context_version = data.get("context_version")
+                                completed = True
+                                break
+                break
+        
+        await batcher.flush()
+        if not completed:
+            # No turn is stored for a failed or truncated answer
+            await channel.send_event({
+                "type": "error",
+                "message": failure or "LLM processing failed",
+            })
+            return
+        logger.info("LLM turn delivered", session_id=session_id, **batcher.get_stats())
         
         # Handle leftovers
-        if sentence_buffer.strip():
-            asyncio.create_task(generate_tts(session_id, sentence_buffer.strip(), websocket))
+        leftover = "".join(sentence_parts).strip()
+        if leftover:
+            asyncio.create_task(generate_tts(session_id, leftover, channel, sentence_seq))
+        full_response = "".join(response_parts)
 
         # Send final message metadata
-        await websocket.send_json({
+        await channel.send_event({
             "type": "llm_chunk",
             "content": "",
             "is_final": True,
             "full_response": full_response,
-        })
+        }, priority=PRIORITY_TEXT)
         
         # Add assistant message to session
         await session_manager.add_message(session_id, "assistant", full_response)
+        session_manager.mark_llm_synced(session_id, llm_context, context_version)
         
     except Exception as e:
         logger.error("LLM processing error", error=str(e))
-        await websocket.send_json({
+        await channel.send_event({
             "type": "error",
             "message": "LLM processing failed",
         })
@@ -285,64 +490,60 @@ async def process_complete_transcription(
 async def generate_tts(
     session_id: str,
     text: str,
-    websocket: WebSocket,
+    channel: ClientChannel,
+    seq: int = 0,
 ):
     """Generate TTS and send to client.
 
     Attempts chunked streaming first (binary WebSocket frames for lower TTFB).
-    Falls back to the non-streaming endpoint with base64 JSON if streaming fails.
+    Falls back to the non-streaming endpoint if streaming fails. ``seq`` is the
+    sentence's position in the answer, so clients can order audio from
+    concurrently synthesized sentences.
     """
     
     tts_service = service_registry.get_healthy_service("tts")
     if not tts_service:
-        await websocket.send_json({
+        await channel.send_event({
             "type": "error",
             "message": "TTS service unavailable",
         })
         return
     
+    payload = {
+        "session_id": session_id,
+        "text": text,
+        "voice_id": "default",
+        "format": settings.TTS_STREAM_FORMAT,
+    }
+    
     try:
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            # Signal the client that TTS audio is about to stream
-            await websocket.send_json({
-                "type": "tts_start",
-                "format": "audio/mpeg",
-            })
+        # Signal the client that TTS audio is about to stream
+        await channel.send_audio_start(seq, tts_content_type(settings.TTS_STREAM_FORMAT))
 
-            # Use the streaming TTS endpoint for chunked delivery
-            async with client.stream(
-                "POST",
-                f"{tts_service.url}/synthesize/stream",
-                json={
-                    "session_id": session_id,
-                    "text": text,
-                    "voice_id": "default",
-                },
-                timeout=30.0,
-            ) as response:
-                if response.status_code == 200:
-                    async for chunk in response.aiter_bytes(chunk_size=4096):
-                        # Send raw binary audio frames over WebSocket
-                        await websocket.send_bytes(chunk)
-                else:
-                    # Stream endpoint failed — fall back to non-streaming
-                    logger.warning(
-                        "TTS stream endpoint failed, falling back",
-                        status=response.status_code,
-                    )
-                    await _generate_tts_fallback(
-                        tts_service, session_id, text, websocket, client
-                    )
-                    return
+        try:
+            # Use the streaming TTS endpoint for chunked delivery; identical
+            # concurrent sentences share one upstream synthesis
+            async for chunk in stream_tts_audio(tts_service.url, payload):
+                # Send binary audio frames over WebSocket
+                await channel.send_audio(seq, chunk)
+        except UpstreamStatusError as e:
+            # Stream endpoint failed — fall back to non-streaming
+            logger.warning(
+                "TTS stream endpoint failed, falling back",
+                status=e.status_code,
+            )
+            async with httpx.AsyncClient(follow_redirects=True) as client:
+                await _generate_tts_fallback(
+                    tts_service, session_id, text, channel, client, seq
+                )
+            return
 
-            # Signal the client that TTS streaming is complete
-            await websocket.send_json({
-                "type": "tts_end",
-            })
+        # Signal the client that TTS streaming is complete
+        await channel.send_audio_end(seq)
                 
     except Exception as e:
         logger.error("TTS processing error", error=str(e))
-        await websocket.send_json({
+        await channel.send_event({
             "type": "error",
             "message": "TTS processing failed",
         })
@@ -352,10 +553,16 @@ async def _generate_tts_fallback(
     tts_service,
     session_id: str,
     text: str,
-    websocket: WebSocket,
+    channel: ClientChannel,
     client: httpx.AsyncClient,
+    seq: int = 0,
 ):
-    """Fallback: fetch full TTS audio and send as base64 JSON."""
+    """Fallback: fetch full TTS audio in one piece.
+
+    Binary-protocol clients get it as a single audio frame; JSON clients
+    get base64 inside a ``tts_audio`` message. The fallback asks for MP3,
+    which the TTS service can always produce.
+    """
     try:
         response = await client.post(
             f"{tts_service.url}/synthesize/",
@@ -363,25 +570,33 @@ async def _generate_tts_fallback(
                 "session_id": session_id,
                 "text": text,
                 "voice_id": "default",
+                "format": "mp3",
             },
             timeout=30.0,
         )
 
-        if response.status_code == 200:
+        if response.status_code == 200 and channel.binary:
+            if settings.TTS_STREAM_FORMAT != "mp3":
+                # Nothing was streamed yet; correct the format announced for this sentence
+                await channel.send_audio_start(seq, tts_content_type("mp3"))
+            await channel.send_audio(seq, response.content)
+            await channel.send_audio_end(seq)
+        elif response.status_code == 200:
             audio_base64 = base64.b64encode(response.content).decode("utf-8")
-            await websocket.send_json({
+            # Audio, not control: it must queue behind earlier sentences' audio
+            await channel.send_event({
                 "type": "tts_audio",
                 "audio": audio_base64,
-                "format": "wav",
-            })
+                "format": "mp3",
+            }, priority=PRIORITY_AUDIO)
         else:
-            await websocket.send_json({
+            await channel.send_event({
                 "type": "error",
                 "message": "TTS generation failed",
             })
     except Exception as e:
         logger.error("TTS fallback error", error=str(e))
-        await websocket.send_json({
+        await channel.send_event({
             "type": "error",
             "message": "TTS processing failed",
         })
@@ -0,0 +1,133 @@
+"""Bounded audio buffering for WebSocket connections."""
+import tempfile
+from typing import AsyncGenerator, List, Optional
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+MB = 1024 * 1024
+
+# Block size used when reading back spilled audio
+SPILL_READ_SIZE = 64 * 1024
+
+
+class AudioLimitExceeded(Exception):
+    """Raised when an utterance or the process exceeds its audio budget."""
+
+
+class AudioBudget:
+    """Process-wide count of audio bytes held in memory."""
+
+    def __init__(self, limit_bytes: Optional[int] = None):
+        self.limit_bytes = settings.AUDIO_BUFFER_BUDGET_MB * MB if limit_bytes is None else limit_bytes
+        self.buffered_bytes = 0
+        self.peak_bytes = 0
+        self.rejected = 0
+
+    def reserve(self, size: int) -> None:
+        """Account for ``size`` more bytes, or raise AudioLimitExceeded."""
+        if self.buffered_bytes + size > self.limit_bytes:
+            self.rejected += 1
+            raise AudioLimitExceeded("Gateway audio buffer budget exhausted")
+        self.buffered_bytes += size
+        self.peak_bytes = max(self.peak_bytes, self.buffered_bytes)
+
+    def release(self, size: int) -> None:
+        """Return ``size`` bytes to the budget."""
+        self.buffered_bytes = max(self.buffered_bytes - size, 0)
+
+    def get_stats(self) -> dict:
+        """Buffered bytes gauge and limits."""
+        return {
+            "buffered_bytes": self.buffered_bytes,
+            "peak_bytes": self.peak_bytes,
+            "limit_bytes": self.limit_bytes,
+            "rejected": self.rejected,
+        }
+
+
+# Global audio budget instance
+audio_budget = AudioBudget()
+
+
+class AudioBuffer:
+    """One utterance, kept as a list of received frames.
+
+    Frames are never concatenated. Each utterance is capped at
+    MAX_AUDIO_SIZE_MB, and in-memory bytes count against the process-wide
+    budget. Past AUDIO_SPILL_THRESHOLD_MB (0 disables spilling) the audio
+    moves to a temporary file and no longer counts against the budget.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        spill_threshold: Optional[int] = None,
+        budget: Optional[AudioBudget] = None,
+    ):
+        self.max_bytes = settings.MAX_AUDIO_SIZE_MB * MB if max_bytes is None else max_bytes
+        self.spill_threshold = (
+            settings.AUDIO_SPILL_THRESHOLD_MB * MB if spill_threshold is None else spill_threshold
+        )
+        self._budget = budget or audio_budget
+        self._chunks: List[bytes] = []
+        self._memory_bytes = 0
+        self._spill = None
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def spilled(self) -> bool:
+        return self._spill is not None
+
+    def append(self, chunk: bytes) -> None:
+        """Add a frame, or raise AudioLimitExceeded."""
+        if self.size + len(chunk) > self.max_bytes:
+            raise AudioLimitExceeded(f"Audio exceeds {self.max_bytes // MB}MB")
+
+        if self._spill is not None:
+            self._spill.write(chunk)
+        else:
+            self._budget.reserve(len(chunk))
+            self._chunks.append(chunk)
+            self._memory_bytes += len(chunk)
+            if self.spill_threshold and self._memory_bytes > self.spill_threshold:
+                self._spill_to_disk()
+        self.size += len(chunk)
+
+    async def iter_chunks(self) -> AsyncGenerator[bytes, None]:
+        """Yield the buffered audio without joining it."""
+        if self._spill is None:
+            for chunk in self._chunks:
+                yield chunk
+            return
+        self._spill.seek(0)
+        while True:
+            block = self._spill.read(SPILL_READ_SIZE)
+            if not block:
+                return
+            yield block
+
+    def clear(self) -> None:
+        """Drop the audio and return its memory to the budget."""
+        self._budget.release(self._memory_bytes)
+        self._chunks = []
+        self._memory_bytes = 0
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        self.size = 0
+
+    def _spill_to_disk(self) -> None:
+        self._spill = tempfile.TemporaryFile()
+        for chunk in self._chunks:
+            self._spill.write(chunk)
+        logger.info("Spilled audio buffer to disk", size=self._memory_bytes)
+        self._budget.release(self._memory_bytes)
+        self._chunks = []
+        self._memory_bytes = 0
@@ -0,0 +1,106 @@
+"""Per-session pinning of the spoken language."""
+from typing import Any, Dict, Optional
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+
+class SessionLanguage:
+    """Language state of one session: the pinned code and the detection streak."""
+
+    def __init__(self, language: Optional[str] = None):
+        self.language = language
+        self.candidate: Optional[str] = None
+        self.streak = 0
+
+
+class LanguagePinner:
+    """Pin a session's language once detection is confident, and send it as a hint.
+
+    While unpinned, utterances are sent without a language and the STT
+    service detects it. After STT_LANGUAGE_PIN_AFTER consecutive utterances
+    detected as the same language with at least STT_LANGUAGE_PIN_CONFIDENCE,
+    the language is pinned and passed as a hint, which skips detection.
+    A hinted utterance decoded below STT_LANGUAGE_REDETECT_CONFIDENCE
+    releases the pin so the next one is detected again.
+    """
+
+    def __init__(
+        self,
+        pin_confidence: Optional[float] = None,
+        redetect_confidence: Optional[float] = None,
+        pin_after: Optional[int] = None,
+    ):
+        self.enabled = settings.STT_LANGUAGE_PINNING
+        self.pin_confidence = settings.STT_LANGUAGE_PIN_CONFIDENCE if pin_confidence is None else pin_confidence
+        self.redetect_confidence = (
+            settings.STT_LANGUAGE_REDETECT_CONFIDENCE if redetect_confidence is None else redetect_confidence
+        )
+        self.pin_after = settings.STT_LANGUAGE_PIN_AFTER if pin_after is None else pin_after
+        self.hinted = 0
+        self.detected = 0
+        self.pinned = 0
+        self.released = 0
+
+    def hint(self, state: SessionLanguage) -> Optional[str]:
+        """Language to send with the next utterance, or None to detect it."""
+        if not self.enabled or not state.language:
+            self.detected += 1
+            return None
+        self.hinted += 1
+        return state.language
+
+    def observe(self, state: SessionLanguage, result: Dict[str, Any]) -> bool:
+        """Update the session from an STT result; return True if the pin changed."""
+        if not self.enabled:
+            return False
+
+        if state.language:
+            # With a hint the provider does not detect; a poor decode is the
+            # sign that the speaker switched language
+            confidence = result.get("confidence")
+            if confidence is None or confidence >= self.redetect_confidence:
+                return False
+            logger.info("Language pin released", language=state.language, confidence=confidence)
+            state.language = None
+            state.candidate, state.streak = None, 0
+            self.released += 1
+            return True
+
+        language = result.get("language")
+        # Groq reports no language probability; fall back to the decode confidence
+        score = result.get("language_probability")
+        if score is None:
+            score = result.get("confidence")
+        if not language or score is None or score < self.pin_confidence:
+            state.candidate, state.streak = None, 0
+            return False
+
+        if language == state.candidate:
+            state.streak += 1
+        else:
+            state.candidate, state.streak = language, 1
+        if state.streak < self.pin_after:
+            return False
+
+        logger.info("Language pinned", language=language, score=score)
+        state.language = language
+        self.pinned += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pinning statistics."""
+        return {
+            "enabled": self.enabled,
+            "hinted": self.hinted,
+            "detected": self.detected,
+            "pinned": self.pinned,
+            "released": self.released,
+        }
+
+
+# Global language pinner instance
+language_pinner = LanguagePinner()
@@ -91,11 +91,17 @@ class RedisClient:
             raise RuntimeError("Redis not connected")
         return await self._client.hgetall(key)
     
-    async def publish(self, channel: str, message: str) -> None:
-        """Publish message to channel."""
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish message to channel; returns the number of subscribers reached."""
         if not self._client:
             raise RuntimeError("Redis not connected")
-        await self._client.publish(channel, message)
+        return await self._client.publish(channel, message)
+    
+    def pubsub(self):
+        """Create a pub/sub connection."""
+        if not self._client:
+            raise RuntimeError("Redis not connected")
+        return self._client.pubsub()
     
     # Session-specific methods
     
@@ -0,0 +1,122 @@
+"""In-flight request coalescing (singleflight) for upstream calls."""
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+def make_key(*parts: Any) -> str:
+    """Build a coalescing key from JSON-serializable request parts."""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class UpstreamStatusError(Exception):
+    """Raised by a coalesced producer when the upstream answered non-200."""
+
+    def __init__(self, status_code: int, body: str = ""):
+        super().__init__(f"Upstream returned {status_code}")
+        self.status_code = status_code
+        self.body = body
+
+
+class _StreamFlight:
+    """One shared upstream stream and the chunks it produced so far."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.consumers = 0
+        self.task: Optional[asyncio.Task] = None
+        self.changed = asyncio.Event()
+
+    def notify(self) -> None:
+        event, self.changed = self.changed, asyncio.Event()
+        event.set()
+
+
+class RequestCoalescer:
+    """Share one upstream call between concurrent identical requests.
+
+    Streams are produced by a background task so a disconnecting caller
+    never cuts the stream short for the others; every caller receives all
+    chunks from the beginning, including callers that join mid-flight. The
+    producer is cancelled once the last caller goes away.
+    """
+
+    def __init__(self):
+        self._streams: Dict[str, _StreamFlight] = {}
+        self.flights = 0
+        self.coalesced = 0
+
+    async def stream(
+        self,
+        key: str,
+        factory: Callable[[], AsyncIterator[bytes]],
+    ) -> AsyncGenerator[bytes, None]:
+        """Iterate a shared upstream byte stream."""
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = _StreamFlight()
+            self._streams[key] = flight
+            flight.task = asyncio.create_task(self._produce(key, flight, factory))
+            self.flights += 1
+        else:
+            self.coalesced += 1
+            logger.debug("Coalesced upstream stream", key=key, consumers=flight.consumers + 1)
+
+        flight.consumers += 1
+        try:
+            index = 0
+            while True:
+                if index < len(flight.chunks):
+                    yield flight.chunks[index]
+                    index += 1
+                    continue
+                if flight.error is not None:
+                    raise flight.error
+                if flight.done:
+                    return
+                await flight.changed.wait()
+        finally:
+            flight.consumers -= 1
+            if flight.consumers == 0 and not flight.done and flight.task:
+                flight.task.cancel()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get coalescing statistics."""
+        return {
+            "in_flight": len(self._streams),
+            "flights": self.flights,
+            "coalesced": self.coalesced,
+        }
+
+    async def _produce(
+        self,
+        key: str,
+        flight: _StreamFlight,
+        factory: Callable[[], AsyncIterator[bytes]],
+    ) -> None:
+        try:
+            async for chunk in factory():
+                flight.chunks.append(chunk)
+                flight.notify()
+        except asyncio.CancelledError:
+            # A caller joining while the producer winds down gets an ordinary error
+            flight.error = RuntimeError("Upstream stream cancelled")
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            flight.notify()
+
+
+# Global request coalescer instance
+request_coalescer = RequestCoalescer()
@@ -1,18 +1,63 @@
 """Session management service."""
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
+import asyncio
 import json
+import weakref
 import structlog
 
 from app.services.redis_client import redis_client
+from app.services.service_registry import service_registry
+from app.services.summarizer import conversation_summarizer
+from app.services.token_counter import count_tokens, count_message_tokens
 from app.config import settings
 
 logger = structlog.get_logger()
 
+# Upper bound on sessions whose LLM context sync state is tracked in-process
+MAX_TRACKED_LLM_CONTEXTS = 10000
+
+
+@dataclass
+class LLMContext:
+    """Context to send to the LLM service for one turn."""
+    messages: List[Dict[str, str]]
+    version: int
+    delta: bool = False
+    summarized_count: int = 0
+    # Index of the oldest conversation message in the window
+    start: int = 0
+    
+    def payload(self) -> Dict[str, Any]:
+        """Request fields for the LLM service's /generate endpoint."""
+        return {
+            "messages": self.messages,
+            "context_version": self.version,
+            "delta": self.delta,
+            "context_start": self.start,
+        }
+
 
 class SessionManager:
     """Manage user sessions and conversation memory."""
     
+    def __init__(self):
+        self._summary_tasks: Dict[str, asyncio.Task] = {}
+        # session_id -> (context version, summarized_count, window start) last
+        # acknowledged by the LLM service
+        self._llm_synced: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()
+        # Serializes read-modify-write of a session document within this process
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+    
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[session_id] = lock
+        return lock
+    
     async def create_session(
         self,
         user_id: Optional[str] = None,
@@ -30,6 +75,7 @@ class SessionManager:
             "memory": {
                 "messages": [],
                 "summary": None,
+                "summarized_count": 0,
                 "created_at": datetime.utcnow().isoformat(),
                 "updated_at": datetime.utcnow().isoformat(),
             },
@@ -49,6 +95,11 @@ class SessionManager:
     
     async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get session by ID."""
+        async with self._lock(session_id):
+            return await self._touch(session_id)
+    
+    async def _touch(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load a session and record activity; the caller holds its lock."""
         session = await redis_client.get_session(session_id)
         if session:
             # Update last activity
@@ -59,6 +110,7 @@ class SessionManager:
     async def delete_session(self, session_id: str) -> bool:
         """Delete a session."""
         await redis_client.delete_session(session_id)
+        self._llm_synced.pop(session_id, None)
         logger.info("Session deleted", session_id=session_id)
         return True
     
@@ -70,49 +122,255 @@ class SessionManager:
         metadata: Optional[Dict[str, Any]] = None
     ) -> bool:
         """Add a message to session memory."""
-        session = await self.get_session(session_id)
-        if not session:
-            return False
-        
         message = {
             "role": role,
             "content": content,
             "timestamp": datetime.utcnow().isoformat(),
+            "tokens": count_tokens(content),
             "metadata": metadata or {},
         }
         
-        session["memory"]["messages"].append(message)
-        session["memory"]["updated_at"] = datetime.utcnow().isoformat()
-        
-        await redis_client.set_session(session_id, session)
+        async with self._lock(session_id):
+            session = await self._touch(session_id)
+            if not session:
+                return False
+            
+            session["memory"]["messages"].append(message)
+            session["memory"]["updated_at"] = datetime.utcnow().isoformat()
+            
+            await redis_client.set_session(session_id, session)
         return True
     
     async def get_conversation_context(
         self,
         session_id: str,
-        max_messages: int = 10
+        max_messages: Optional[int] = None,
+        max_tokens: Optional[int] = None,
     ) -> list:
-        """Get recent conversation context."""
+        """Get recent conversation context within a token budget.
+        
+        The newest messages are kept until either limit is reached; the most
+        recent message is always included. Older turns are represented by the
+        rolling summary, which is refreshed in the background.
+        """
         session = await self.get_session(session_id)
         if not session:
             return []
         
-        messages = session["memory"]["messages"]
-        recent = messages[-max_messages:] if len(messages) > max_messages else messages
-        
-        return [{"role": m["role"], "content": m["content"]} for m in recent]
+        return self._build_context(session_id, session["memory"], max_messages, max_tokens)
     
-    async def clear_memory(self, session_id: str) -> bool:
-        """Clear conversation memory."""
+    async def get_llm_context(self, session_id: str, resync: bool = False) -> LLMContext:
+        """Get the context for the next LLM call, as a delta when possible.
+        
+        A delta carries only the messages added since the version the LLM
+        service last acknowledged, plus the window start, so the LLM service
+        drops the same old turns the token budget drops here. A full window
+        is sent on the first turn, after the rolling summary changed, when
+        the window start moved back, or when ``resync`` is requested (the
+        LLM service answered 409 for a delta).
+        """
         session = await self.get_session(session_id)
         if not session:
-            return False
+            return LLMContext(messages=[], version=0)
+        
+        memory = session["memory"]
+        messages = memory["messages"]
+        version = len(messages)
+        summarized_count = memory.get("summarized_count", 0)
+        summary_message, start = self._select_window(session_id, memory)
+        
+        synced = None if resync else self._llm_synced.get(session_id)
+        if (
+            settings.CONTEXT_DELTA_ENABLED
+            and synced is not None
+            and synced[1] == summarized_count
+            and synced[2] <= start
+            and 0 < version - synced[0] <= settings.CONTEXT_MAX_MESSAGES
+        ):
+            return LLMContext(
+                messages=[{"role": m["role"], "content": m["content"]} for m in messages[synced[0]:]],
+                version=version,
+                delta=True,
+                summarized_count=summarized_count,
+                start=start,
+            )
         
-        session["memory"]["messages"] = []
-        session["memory"]["summary"] = None
-        session["memory"]["updated_at"] = datetime.utcnow().isoformat()
+        return LLMContext(
+            messages=self._window_messages(memory, summary_message, start),
+            version=version,
+            summarized_count=summarized_count,
+            start=start,
+        )
+    
+    def mark_llm_synced(
+        self,
+        session_id: str,
+        context: LLMContext,
+        version: Optional[int],
+    ) -> None:
+        """Record the context version the LLM service acknowledged."""
+        if not settings.CONTEXT_DELTA_ENABLED:
+            return
+        if version is None:
+            self._llm_synced.pop(session_id, None)
+            return
+        self._llm_synced[session_id] = (version, context.summarized_count, context.start)
+        self._llm_synced.move_to_end(session_id)
+        while len(self._llm_synced) > MAX_TRACKED_LLM_CONTEXTS:
+            self._llm_synced.popitem(last=False)
+    
+    def _build_context(
+        self,
+        session_id: str,
+        memory: Dict[str, Any],
+        max_messages: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+    ) -> List[Dict[str, str]]:
+        """Assemble summary plus the newest messages that fit the budget."""
+        summary_message, start = self._select_window(session_id, memory, max_messages, max_tokens)
+        return self._window_messages(memory, summary_message, start)
+    
+    @staticmethod
+    def _window_messages(
+        memory: Dict[str, Any],
+        summary_message: Optional[Dict[str, str]],
+        start: int,
+    ) -> List[Dict[str, str]]:
+        context = [{"role": m["role"], "content": m["content"]} for m in memory["messages"][start:]]
+        if summary_message:
+            context.insert(0, summary_message)
+        return context
+    
+    def _select_window(
+        self,
+        session_id: str,
+        memory: Dict[str, Any],
+        max_messages: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Tuple[Optional[Dict[str, str]], int]:
+        """Summary message and window start for the budget; schedules summaries."""
+        messages = memory["messages"]
+        summary = memory.get("summary")
         
-        await redis_client.set_session(session_id, session)
+        max_messages = max_messages or settings.CONTEXT_MAX_MESSAGES
+        budget = max_tokens or settings.CONTEXT_MAX_TOKENS
+        summary_message = None
+        if summary:
+            summary_message = {
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {summary}",
+            }
+            budget -= count_message_tokens(summary_message)
+        
+        start = self._select_context_start(messages, max_messages, budget)
+        if self._can_summarize():
+            self._schedule_summary(session_id, memory, start)
+            start = self._retain_unsummarized(memory, start)
+        
+        return summary_message, start
+    
+    @staticmethod
+    def _select_context_start(
+        messages: List[Dict[str, Any]],
+        max_messages: int,
+        budget: int,
+    ) -> int:
+        """Index of the oldest message that fits the message and token limits."""
+        start = len(messages)
+        used = 0
+        while start > 0 and len(messages) - start < max_messages:
+            tokens = count_message_tokens(messages[start - 1])
+            if used + tokens > budget and start < len(messages):
+                break
+            used += tokens
+            start -= 1
+        return start
+    
+    @staticmethod
+    def _can_summarize() -> bool:
+        return settings.SUMMARY_ENABLED and service_registry.get_healthy_service("llm") is not None
+    
+    @staticmethod
+    def _retain_unsummarized(memory: Dict[str, Any], context_start: int) -> int:
+        """Move the window start back over evicted turns the summary does not cover yet.
+        
+        Turns leave the context only once they are folded into the summary.
+        At most SUMMARY_MAX_PENDING_MESSAGES of them are kept past the budget,
+        so a summarizer that keeps failing cannot grow the prompt without bound.
+        """
+        summarized_count = memory.get("summarized_count", 0)
+        floor = max(context_start - settings.SUMMARY_MAX_PENDING_MESSAGES, 0)
+        return max(min(context_start, summarized_count), floor)
+    
+    def _schedule_summary(
+        self,
+        session_id: str,
+        memory: Dict[str, Any],
+        context_start: int,
+    ) -> None:
+        """Start a background summary update once enough turns fell out of context."""
+        if session_id in self._summary_tasks:
+            return
+        
+        pending = context_start - memory.get("summarized_count", 0)
+        if pending < settings.SUMMARY_MIN_MESSAGES:
+            return
+        
+        task = asyncio.create_task(self._update_summary(session_id, context_start))
+        self._summary_tasks[session_id] = task
+        task.add_done_callback(lambda _: self._summary_tasks.pop(session_id, None))
+    
+    async def _update_summary(self, session_id: str, upto: int) -> None:
+        """Fold messages[summarized_count:upto] into the session summary."""
+        session = await redis_client.get_session(session_id)
+        if not session:
+            return
+        
+        memory = session["memory"]
+        start = memory.get("summarized_count", 0)
+        summary = await conversation_summarizer.summarize(
+            session_id,
+            memory.get("summary"),
+            memory["messages"][start:upto],
+        )
+        if not summary:
+            return
+        
+        # Re-read under the lock so turns added meanwhile are kept
+        async with self._lock(session_id):
+            session = await redis_client.get_session(session_id)
+            if (
+                not session
+                or session["memory"].get("summarized_count", 0) != start
+                or len(session["memory"]["messages"]) < upto
+            ):
+                return
+            
+            session["memory"]["summary"] = summary
+            session["memory"]["summarized_count"] = upto
+            await redis_client.set_session(session_id, session)
+        
+        logger.info(
+            "Conversation summary updated",
+            session_id=session_id,
+            summarized_count=upto,
+            summary_tokens=count_tokens(summary),
+        )
+    
+    async def clear_memory(self, session_id: str) -> bool:
+        """Clear conversation memory."""
+        async with self._lock(session_id):
+            session = await self._touch(session_id)
+            if not session:
+                return False
+            
+            session["memory"]["messages"] = []
+            session["memory"]["summary"] = None
+            session["memory"]["summarized_count"] = 0
+            session["memory"]["updated_at"] = datetime.utcnow().isoformat()
+            self._llm_synced.pop(session_id, None)
+            
+            await redis_client.set_session(session_id, session)
         return True
     
     async def update_config(
@@ -121,12 +379,13 @@ class SessionManager:
         config: Dict[str, Any]
     ) -> bool:
         """Update session configuration."""
-        session = await self.get_session(session_id)
-        if not session:
-            return False
-        
-        session["config"].update(config)
-        await redis_client.set_session(session_id, session)
+        async with self._lock(session_id):
+            session = await self._touch(session_id)
+            if not session:
+                return False
+            
+            session["config"].update(config)
+            await redis_client.set_session(session_id, session)
         return True
 
 
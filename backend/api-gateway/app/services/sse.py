@@ -0,0 +1,48 @@
+"""Server-sent event framing helpers for relaying upstream streams."""
+from typing import Any, AsyncIterator, AsyncGenerator, Dict
+
+from app.services import json_codec
+
+FRAME_SEPARATOR = b"\n\n"
+DATA_PREFIX = b"data: "
+
+# The LLM service's last frame carries "done": true. A quote inside a JSON
+# string is always escaped, so these byte patterns cannot occur in token text.
+_FINAL_MARKERS = (b'"done":true', b'"done": true')
+
+
+async def iter_sse_frames(chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+    """Split a byte stream into complete SSE frames, separator included."""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer.extend(chunk)
+        start = 0
+        while True:
+            end = buffer.find(FRAME_SEPARATOR, start)
+            if end == -1:
+                break
+            end += len(FRAME_SEPARATOR)
+            yield bytes(buffer[start:end])
+            start = end
+        if start:
+            del buffer[:start]
+    if buffer.strip():
+        yield bytes(buffer) + FRAME_SEPARATOR
+
+
+def is_final_frame(frame: bytes) -> bool:
+    """True if the frame is the LLM service's closing frame."""
+    return any(marker in frame for marker in _FINAL_MARKERS)
+
+
+def parse_frame(frame: bytes) -> Dict[str, Any]:
+    """Decode the JSON payload of a single-line ``data:`` frame."""
+    payload = frame.strip()
+    if payload.startswith(DATA_PREFIX):
+        payload = payload[len(DATA_PREFIX):]
+    return json_codec.loads(payload)
+
+
+def encode_frame(data: Dict[str, Any]) -> bytes:
+    """Encode a dict as an SSE ``data:`` frame."""
+    return DATA_PREFIX + json_codec.dumps(data) + FRAME_SEPARATOR
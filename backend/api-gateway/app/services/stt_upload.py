@@ -0,0 +1,92 @@
+"""Chunked streaming upload of an utterance to the STT service."""
+import asyncio
+from typing import AsyncGenerator, Optional
+
+import httpx
+import structlog
+
+from app.config import settings
+from app.services.audio_buffer import MB, AudioBudget, AudioLimitExceeded, audio_budget
+
+logger = structlog.get_logger()
+
+
+class STTUpload:
+    """Forward audio frames to the STT service's /transcribe/stream while recording.
+
+    The request is opened when recording starts and its body is fed frame
+    by frame, so the upload is already complete when speech ends and
+    ``finish()`` only waits for the transcription. Frames waiting to be
+    sent count against the process-wide audio budget, and the utterance is
+    capped at MAX_AUDIO_SIZE_MB. Once the request has ended (or failed),
+    further frames are dropped and ``finish()`` reports the outcome.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        stt_url: str,
+        session_id: str,
+        language: Optional[str] = None,
+        timeout: float = 60.0,
+        max_bytes: Optional[int] = None,
+        budget: Optional[AudioBudget] = None,
+    ):
+        self._queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+        self._budget = budget or audio_budget
+        self._queued_bytes = 0
+        self.max_bytes = settings.MAX_AUDIO_SIZE_MB * MB if max_bytes is None else max_bytes
+        self.bytes_sent = 0
+        params = {"session_id": session_id}
+        if language:
+            params["language"] = language
+        self._task = asyncio.create_task(
+            client.post(
+                f"{stt_url}/transcribe/stream",
+                content=self._body(),
+                params=params,
+                headers={"Content-Type": "application/octet-stream"},
+                timeout=timeout,
+            )
+        )
+        # Retrieve failures of aborted uploads so they are not reported as lost
+        self._task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def feed(self, chunk: bytes) -> None:
+        """Queue an audio frame for upload, or raise AudioLimitExceeded."""
+        if self._task.done():
+            # Nothing reads the queue any more
+            return
+        if self.bytes_sent + len(chunk) > self.max_bytes:
+            raise AudioLimitExceeded(f"Audio exceeds {self.max_bytes // MB}MB")
+        self._budget.reserve(len(chunk))
+        self._queued_bytes += len(chunk)
+        self.bytes_sent += len(chunk)
+        self._queue.put_nowait(chunk)
+
+    async def finish(self) -> httpx.Response:
+        """End the body and wait for the transcription response."""
+        self._queue.put_nowait(None)
+        try:
+            return await self._task
+        finally:
+            # Frames the request never consumed (it failed early) go back to the budget
+            self._release()
+
+    def abort(self) -> None:
+        """Cancel the upload."""
+        self._task.cancel()
+        self._release()
+
+    def _release(self) -> None:
+        self._budget.release(self._queued_bytes)
+        self._queued_bytes = 0
+
+    async def _body(self) -> AsyncGenerator[bytes, None]:
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                return
+            self._queued_bytes -= len(chunk)
+            self._budget.release(len(chunk))
+            yield chunk
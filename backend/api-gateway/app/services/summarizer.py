@@ -0,0 +1,87 @@
+"""Rolling conversation summaries for long sessions."""
+from typing import Dict, List, Optional
+
+import httpx
+import structlog
+
+from app.config import settings
+from app.services.service_registry import service_registry
+
+logger = structlog.get_logger()
+
+SUMMARY_INSTRUCTIONS = (
+    "Update the running summary of a voice conversation between a user and an "
+    "AI assistant. Keep names, facts, preferences and open questions. Drop small "
+    "talk. Reply with the updated summary only, in at most {max_words} words."
+)
+
+
+class ConversationSummarizer:
+    """Incrementally summarize conversation turns that no longer fit in context."""
+
+    def build_prompt(
+        self,
+        previous_summary: Optional[str],
+        messages: List[Dict],
+    ) -> List[Dict[str, str]]:
+        """Build the chat messages for a summary update."""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        parts = []
+        if previous_summary:
+            parts.append(f"Current summary:\n{previous_summary}")
+        parts.append(f"New conversation turns:\n{transcript}")
+
+        return [
+            {
+                "role": "system",
+                "content": SUMMARY_INSTRUCTIONS.format(
+                    max_words=int(settings.SUMMARY_MAX_TOKENS * 0.75)
+                ),
+            },
+            {"role": "user", "content": "\n\n".join(parts)},
+        ]
+
+    async def summarize(
+        self,
+        session_id: str,
+        previous_summary: Optional[str],
+        messages: List[Dict],
+    ) -> Optional[str]:
+        """Fold new messages into the previous summary via the LLM service."""
+        llm_service = service_registry.get_healthy_service("llm")
+        if not llm_service or not messages:
+            return None
+
+        try:
+            async with httpx.AsyncClient(follow_redirects=True) as client:
+                # /generate/chat does not touch the LLM service's session memory
+                response = await client.post(
+                    f"{llm_service.url}/generate/chat",
+                    json={
+                        "session_id": session_id,
+                        "messages": self.build_prompt(previous_summary, messages),
+                        "stream": False,
+                        "temperature": 0.0,
+                        "max_tokens": settings.SUMMARY_MAX_TOKENS,
+                    },
+                    timeout=60.0,
+                )
+
+            if response.status_code != 200:
+                logger.warning(
+                    "Summary generation failed",
+                    session_id=session_id,
+                    status=response.status_code,
+                )
+                return None
+
+            summary = response.json()["choices"][0]["message"]["content"].strip()
+            return summary or None
+
+        except Exception as e:
+            logger.error("Summary generation error", session_id=session_id, error=str(e))
+            return None
+
+
+# Global summarizer instance
+conversation_summarizer = ConversationSummarizer()
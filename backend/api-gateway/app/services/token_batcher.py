@@ -0,0 +1,87 @@
+"""Coalesce LLM token deltas into fewer WebSocket frames."""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+
+SENTENCE_BOUNDARIES = (".", "!", "?", "\n")
+
+
+class TokenBatcher:
+    """Buffer consecutive token deltas and send them as one frame.
+
+    A batch is flushed when the oldest buffered token has waited
+    ``window_ms``, when it reaches ``max_bytes``, when a token ends a
+    sentence, and on ``flush()`` at the end of the stream. A window of 0
+    sends every token on its own.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        window_ms: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self._send = send
+        self._window = (settings.WS_TOKEN_FLUSH_MS if window_ms is None else window_ms) / 1000
+        self._max_bytes = settings.WS_TOKEN_FLUSH_BYTES if max_bytes is None else max_bytes
+        self._parts: List[str] = []
+        self._size = 0
+        self._oldest: Optional[float] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.tokens = 0
+        self.frames = 0
+        self._delay_total = 0.0
+        self._delay_max = 0.0
+
+    async def add(self, text: str) -> None:
+        """Buffer a token delta, flushing if a limit is reached."""
+        self.tokens += 1
+        if not self._parts:
+            self._oldest = time.monotonic()
+        self._parts.append(text)
+        self._size += len(text.encode("utf-8"))
+
+        if (
+            self._window <= 0
+            or self._size >= self._max_bytes
+            or any(p in text for p in SENTENCE_BOUNDARIES)
+        ):
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_window())
+
+    async def flush(self) -> None:
+        """Send everything buffered as one frame."""
+        timer, self._timer = self._timer, None
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+
+        async with self._lock:
+            if not self._parts:
+                return
+            text = "".join(self._parts)
+            delay = time.monotonic() - self._oldest
+            self._parts = []
+            self._size = 0
+            self._oldest = None
+
+            self.frames += 1
+            self._delay_total += delay
+            self._delay_max = max(self._delay_max, delay)
+            await self._send(text)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Frames sent and latency added by batching for this turn."""
+        return {
+            "tokens": self.tokens,
+            "frames": self.frames,
+            "avg_added_latency_ms": round(self._delay_total / self.frames * 1000, 2) if self.frames else 0.0,
+            "max_added_latency_ms": round(self._delay_max * 1000, 2),
+        }
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self._window)
+        await self.flush()
@@ -0,0 +1,45 @@
+"""Token counting for conversation context budgets."""
+from functools import lru_cache
+from typing import Dict, Optional
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+# Per-message overhead for role markers and separators in chat prompts
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Rough characters-per-token ratio used when no tokenizer is installed
+APPROX_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the tokenizer once; None if tiktoken is unavailable."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(settings.TOKENIZER_ENCODING)
+    except Exception as e:
+        logger.warning("Tokenizer unavailable, using approximate token counts", error=str(e))
+        return None
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Count tokens in a piece of text."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // APPROX_CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message: Dict) -> int:
+    """Count tokens for a chat message, reusing a stored count when present."""
+    tokens = message.get("tokens")
+    if tokens is None:
+        tokens = count_tokens(message.get("content"))
+    return tokens + MESSAGE_OVERHEAD_TOKENS
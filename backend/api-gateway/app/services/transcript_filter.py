@@ -0,0 +1,70 @@
+"""Screening of transcriptions before they reach the LLM."""
+from typing import Any, Dict, Optional
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+REASON_NO_SPEECH = "no_speech"
+REASON_LOW_CONFIDENCE = "low_confidence"
+
+
+class TranscriptFilter:
+    """Reject noise and unreliable transcriptions.
+
+    A result is rejected when the STT service reports a no-speech
+    probability above STT_MAX_NO_SPEECH_PROB, or a confidence below
+    STT_MIN_CONFIDENCE. Results without scores are accepted.
+    """
+
+    def __init__(self, min_confidence: Optional[float] = None, max_no_speech_prob: Optional[float] = None):
+        self.min_confidence = settings.STT_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        self.max_no_speech_prob = (
+            settings.STT_MAX_NO_SPEECH_PROB if max_no_speech_prob is None else max_no_speech_prob
+        )
+        self.accepted = 0
+        self.filtered = {REASON_NO_SPEECH: 0, REASON_LOW_CONFIDENCE: 0}
+        self.confirmed = 0
+
+    def check(self, result: Dict[str, Any]) -> Optional[str]:
+        """Return the rejection reason for an STT result, or None to accept it."""
+        no_speech = result.get("no_speech_prob")
+        confidence = result.get("confidence")
+        if no_speech is not None and no_speech > self.max_no_speech_prob:
+            reason = REASON_NO_SPEECH
+        elif confidence is not None and confidence < self.min_confidence:
+            reason = REASON_LOW_CONFIDENCE
+        else:
+            self.accepted += 1
+            return None
+
+        self.filtered[reason] += 1
+        logger.info(
+            "Transcription filtered",
+            reason=reason,
+            confidence=confidence,
+            no_speech_prob=no_speech,
+            text_length=len(result.get("text", "")),
+        )
+        return reason
+
+    def record_confirmed(self) -> None:
+        """Count a filtered utterance that the user confirmed."""
+        self.confirmed += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get filter statistics."""
+        return {
+            "accepted": self.accepted,
+            "filtered": sum(self.filtered.values()),
+            "filtered_by_reason": dict(self.filtered),
+            "confirmed": self.confirmed,
+            "min_confidence": self.min_confidence,
+            "max_no_speech_prob": self.max_no_speech_prob,
+        }
+
+
+# Global transcript filter instance
+transcript_filter = TranscriptFilter()
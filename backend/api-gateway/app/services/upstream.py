@@ -0,0 +1,80 @@
+"""Upstream calls from the gateway to backend services."""
+from typing import Any, AsyncGenerator, Dict
+
+import httpx
+import structlog
+
+from app.config import settings
+from app.services.request_coalescer import request_coalescer, make_key, UpstreamStatusError
+
+logger = structlog.get_logger()
+
+# Content types of the TTS service's output formats
+TTS_CONTENT_TYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+    "opus": "audio/ogg; codecs=opus",
+    "pcm": "audio/L16; rate=24000; channels=1",
+}
+
+
+def tts_content_type(fmt: str) -> str:
+    """MIME type of TTS audio in ``fmt`` ("ogg" is Ogg Opus)."""
+    fmt = "opus" if fmt == "ogg" else fmt
+    return TTS_CONTENT_TYPES.get(fmt, "application/octet-stream")
+
+
+def stream_tts_audio(
+    tts_url: str,
+    payload: Dict[str, Any],
+    coalesce: bool = True,
+    chunk_size: int = 4096,
+) -> AsyncGenerator[bytes, None]:
+    """Stream synthesized audio from the TTS service's /synthesize/stream.
+
+    Concurrent requests for the same text, voice, speed and format are
+    coalesced into one upstream call; the session ID is not part of the key.
+    A coalesced flight keeps its chunks for late joiners, so callers that
+    need constant memory pass ``coalesce=False``.
+    Raises UpstreamStatusError if the TTS service answers non-200.
+    """
+
+    async def fetch() -> AsyncGenerator[bytes, None]:
+        async with httpx.AsyncClient(follow_redirects=True) as client:
+            async with client.stream(
+                "POST",
+                f"{tts_url}/synthesize/stream",
+                json=payload,
+                timeout=30.0,
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise UpstreamStatusError(response.status_code, body.decode("utf-8", "replace"))
+                async for chunk in response.aiter_bytes(chunk_size=chunk_size):
+                    yield chunk
+
+    if not coalesce or not settings.COALESCE_TTS_REQUESTS:
+        return fetch()
+
+    key = make_key(
+        "tts",
+        tts_url,
+        payload["text"],
+        payload.get("voice_id"),
+        payload.get("speed", 1.0),
+        payload.get("format"),
+    )
+    return request_coalescer.stream(key, fetch)
+
+
+async def generate_llm(llm_url: str, payload: Dict[str, Any]) -> httpx.Response:
+    """Call the LLM service's non-streaming /generate endpoint.
+
+    Unlike TTS, LLM requests are never coalesced: every gateway request
+    belongs to a session, and the LLM service updates that session's
+    memory and context cache on each generation, so two requests are
+    never interchangeable even when their messages are identical. Repeated
+    stateless questions are answered by the LLM service's response cache.
+    """
+    async with httpx.AsyncClient(follow_redirects=True) as client:
+        return await client.post(f"{llm_url}/generate", json=payload, timeout=60.0)
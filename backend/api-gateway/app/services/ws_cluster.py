@@ -0,0 +1,186 @@
+"""Cross-node WebSocket delivery over Redis pub/sub.
+
+Each gateway node records the sessions whose sockets it holds under
+``ws:owner:{session_id}`` and listens on its own channel ``ws:node:{node_id}``
+plus the shared ``ws:broadcast`` channel. A message for a session held by
+another node is published to that node's channel; broadcasts are published
+once and fanned out locally by every node.
+"""
+import asyncio
+import json
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+import structlog
+
+from app.config import settings
+from app.services.redis_client import redis_client
+
+logger = structlog.get_logger()
+
+OWNER_KEY = "ws:owner:{session_id}"
+NODE_CHANNEL = "ws:node:{node_id}"
+BROADCAST_CHANNEL = "ws:broadcast"
+
+DeliverFn = Callable[[str, Dict[str, Any]], Awaitable[bool]]
+BroadcastFn = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def default_node_id() -> str:
+    """Host, PID and a random suffix, unique across restarts."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class ClusterRelay:
+    """Route WebSocket messages between gateway nodes."""
+
+    def __init__(self, node_id: Optional[str] = None):
+        self.node_id = node_id or settings.NODE_ID or default_node_id()
+        self.enabled = settings.WS_CLUSTER_ENABLED
+        self._owned: Set[str] = set()
+        self._deliver: Optional[DeliverFn] = None
+        self._broadcast: Optional[BroadcastFn] = None
+        self._tasks: list = []
+        self.routed = 0
+        self.received = 0
+
+    @property
+    def node_channel(self) -> str:
+        return NODE_CHANNEL.format(node_id=self.node_id)
+
+    async def start(self, deliver: DeliverFn, broadcast: BroadcastFn) -> None:
+        """Subscribe to this node's channels and start listening."""
+        self._deliver = deliver
+        self._broadcast = broadcast
+        if not self.enabled:
+            return
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._refresh_loop()),
+        ]
+        logger.info("WebSocket cluster relay started", node_id=self.node_id)
+
+    async def stop(self) -> None:
+        """Stop listening and release owned sessions."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        for session_id in list(self._owned):
+            await self.release(session_id)
+
+    async def claim(self, session_id: str) -> None:
+        """Record this node as the owner of a session's socket."""
+        self._owned.add(session_id)
+        if not self.enabled:
+            return
+        try:
+            await redis_client.set(
+                OWNER_KEY.format(session_id=session_id), self.node_id, settings.SESSION_TTL
+            )
+        except Exception as e:
+            logger.warning("Failed to claim WebSocket session", session_id=session_id, error=str(e))
+
+    async def release(self, session_id: str) -> None:
+        """Drop ownership, unless another node has claimed the session since."""
+        self._owned.discard(session_id)
+        if not self.enabled:
+            return
+        key = OWNER_KEY.format(session_id=session_id)
+        try:
+            owner = await redis_client.get(key)
+            # A reconnect on this node may have claimed it again meanwhile
+            if owner == self.node_id and session_id not in self._owned:
+                await redis_client.delete(key)
+        except Exception as e:
+            logger.warning("Failed to release WebSocket session", session_id=session_id, error=str(e))
+
+    async def send(self, session_id: str, message: Dict[str, Any]) -> bool:
+        """Publish a message to the node that owns the session.
+
+        Returns False if no live node owns it.
+        """
+        if not self.enabled:
+            return False
+        owner = await redis_client.get(OWNER_KEY.format(session_id=session_id))
+        if not owner or owner == self.node_id:
+            return False
+        receivers = await redis_client.publish(
+            NODE_CHANNEL.format(node_id=owner),
+            self._envelope(message, session_id),
+        )
+        self.routed += 1
+        return bool(receivers)
+
+    async def publish_broadcast(self, message: Dict[str, Any]) -> None:
+        """Ask every other node to broadcast to its local sockets."""
+        if not self.enabled:
+            return
+        await redis_client.publish(BROADCAST_CHANNEL, self._envelope(message))
+
+    async def handle(self, channel: str, data: str) -> None:
+        """Dispatch one pub/sub message to local sockets."""
+        envelope = json.loads(data)
+        if envelope.get("origin") == self.node_id:
+            return
+        self.received += 1
+        if channel == BROADCAST_CHANNEL:
+            await self._broadcast(envelope["message"])
+        elif not await self._deliver(envelope["session_id"], envelope["message"]):
+            logger.debug("Routed message for unknown session", session_id=envelope["session_id"])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get relay statistics."""
+        return {
+            "node_id": self.node_id,
+            "enabled": self.enabled,
+            "owned_sessions": len(self._owned),
+            "routed": self.routed,
+            "received": self.received,
+        }
+
+    def _envelope(self, message: Dict[str, Any], session_id: Optional[str] = None) -> str:
+        return json.dumps({"origin": self.node_id, "session_id": session_id, "message": message})
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = redis_client.pubsub()
+                await pubsub.subscribe(self.node_channel, BROADCAST_CHANNEL)
+                async for item in pubsub.listen():
+                    if item.get("type") != "message":
+                        continue
+                    try:
+                        await self.handle(item["channel"], item["data"])
+                    except Exception as e:
+                        logger.error("Failed to handle relayed message", error=str(e))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("WebSocket relay subscription lost", error=str(e))
+                await asyncio.sleep(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.reset()
+                    except Exception:
+                        pass
+
+    async def _refresh_loop(self) -> None:
+        # Keep ownership alive for connections that outlive SESSION_TTL
+        interval = max(settings.SESSION_TTL // 2, 1)
+        while True:
+            await asyncio.sleep(interval)
+            for session_id in list(self._owned):
+                await self.claim(session_id)
+
+
+# Global cluster relay instance
+cluster_relay = ClusterRelay()
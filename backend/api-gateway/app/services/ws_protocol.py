@@ -0,0 +1,252 @@
+"""Wire protocol for the audio-stream WebSocket.
+
+Clients that offer the ``voxflow.binary.v1`` subprotocol at connect time get
+compact binary frames for the high-volume events. Each frame is one type
+byte followed by its payload:
+
+    0x01 TOKEN            UTF-8 token delta
+    0x02 TRANSCRIPTION    flags byte (bit 0: partial) + UTF-8 text
+    0x03 AUDIO_START      uint16 sentence seq + UTF-8 media type
+    0x04 AUDIO            uint16 sentence seq + audio bytes
+    0x05 AUDIO_END        uint16 sentence seq
+
+Integers are big-endian and sentence sequence numbers wrap at 65536.
+Everything else (errors, pong, the final llm_chunk carrying full_response)
+is still sent as a JSON text frame. Clients that do not negotiate the
+subprotocol receive the original JSON messages and raw audio frames.
+"""
+import asyncio
+import heapq
+import itertools
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+BINARY_SUBPROTOCOL = "voxflow.binary.v1"
+
+FRAME_TOKEN = 0x01
+FRAME_TRANSCRIPTION = 0x02
+FRAME_AUDIO_START = 0x03
+FRAME_AUDIO = 0x04
+FRAME_AUDIO_END = 0x05
+
+# Send priorities, lowest first
+PRIORITY_CONTROL = 0
+PRIORITY_AUDIO = 1
+PRIORITY_TEXT = 2
+
+_SEQ = struct.Struct(">BH")
+
+
+def negotiate_subprotocol(websocket: WebSocket) -> Optional[str]:
+    """Pick the subprotocol to accept from the client's offer."""
+    offered = websocket.scope.get("subprotocols") or []
+    return BINARY_SUBPROTOCOL if BINARY_SUBPROTOCOL in offered else None
+
+
+def encode_token(text: str) -> bytes:
+    return bytes((FRAME_TOKEN,)) + text.encode("utf-8")
+
+
+def encode_transcription(text: str, is_partial: bool) -> bytes:
+    return bytes((FRAME_TRANSCRIPTION, 1 if is_partial else 0)) + text.encode("utf-8")
+
+
+def encode_audio_start(seq: int, media_type: str) -> bytes:
+    return _SEQ.pack(FRAME_AUDIO_START, seq & 0xFFFF) + media_type.encode("utf-8")
+
+
+def encode_audio(seq: int, chunk: bytes) -> bytes:
+    return _SEQ.pack(FRAME_AUDIO, seq & 0xFFFF) + chunk
+
+
+def encode_audio_end(seq: int) -> bytes:
+    return _SEQ.pack(FRAME_AUDIO_END, seq & 0xFFFF)
+
+
+class ClientChannel:
+    """Send events to one client in its negotiated protocol.
+
+    Sends are queued and written by a single writer task, so a slow client
+    only ever blocks its own producers. The queue is a bounded priority
+    queue: control frames go before audio, audio before text, and frames of
+    the same class keep their order. When the queue is full, the
+    ``drop_partial`` policy discards the oldest queued token delta or partial
+    transcription (the final message repeats the full text), and
+    ``disconnect`` closes the connection. Control frames are never dropped.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        subprotocol: Optional[str] = None,
+        max_queue: Optional[int] = None,
+        overflow: Optional[str] = None,
+    ):
+        self.websocket = websocket
+        self.binary = subprotocol == BINARY_SUBPROTOCOL
+        self.closed = False
+        self._max_queue = settings.WS_SEND_QUEUE_SIZE if max_queue is None else max_queue
+        self._overflow = overflow or settings.WS_SEND_QUEUE_OVERFLOW
+        self._queue: List[Tuple[int, int, bool, bool, Any]] = []
+        self._order = itertools.count()
+        self._cond = asyncio.Condition()
+        self._writer: Optional[asyncio.Task] = None
+        self._writing = False
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def start(self) -> None:
+        """Start the writer task."""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    def close(self) -> None:
+        """Stop the writer; queued frames are discarded."""
+        self.closed = True
+        if self._writer is not None:
+            self._writer.cancel()
+
+    async def drain(self) -> None:
+        """Wait until every queued frame has been written."""
+        async with self._cond:
+            while (self._queue or self._writing) and not self.closed:
+                await self._cond.wait()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and delivery counters for this connection."""
+        return {
+            "binary": self.binary,
+            "depth": len(self._queue),
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+        }
+
+    async def send_event(self, message: Dict[str, Any], priority: int = PRIORITY_CONTROL) -> None:
+        """Send an event as a JSON text frame."""
+        await self._enqueue(priority, False, message)
+
+    async def send_token(self, text: str) -> None:
+        """Send an LLM token delta."""
+        if self.binary:
+            await self._enqueue(PRIORITY_TEXT, True, encode_token(text), droppable=True)
+        else:
+            await self._enqueue(PRIORITY_TEXT, False, {
+                "type": "llm_chunk",
+                "content": text,
+                "is_final": False,
+            }, droppable=True)
+
+    async def send_transcription(self, text: str, is_partial: bool = False) -> None:
+        """Send a transcription result."""
+        if self.binary:
+            frame = encode_transcription(text, is_partial)
+        else:
+            frame = {"type": "transcription", "text": text, "is_partial": is_partial}
+        await self._enqueue(PRIORITY_TEXT, self.binary, frame, droppable=is_partial)
+
+    async def send_audio_start(self, seq: int, media_type: str) -> None:
+        """Announce the audio for sentence ``seq``."""
+        if self.binary:
+            await self._enqueue(PRIORITY_AUDIO, True, encode_audio_start(seq, media_type))
+        else:
+            await self._enqueue(PRIORITY_AUDIO, False, {"type": "tts_start", "format": media_type, "seq": seq})
+
+    async def send_audio(self, seq: int, chunk: bytes) -> None:
+        """Send one audio chunk for sentence ``seq``."""
+        await self._enqueue(PRIORITY_AUDIO, True, encode_audio(seq, chunk) if self.binary else chunk)
+
+    async def send_audio_end(self, seq: int) -> None:
+        """Mark the end of the audio for sentence ``seq``."""
+        if self.binary:
+            await self._enqueue(PRIORITY_AUDIO, True, encode_audio_end(seq))
+        else:
+            await self._enqueue(PRIORITY_AUDIO, False, {"type": "tts_end", "seq": seq})
+
+    async def _enqueue(
+        self,
+        priority: int,
+        is_bytes: bool,
+        frame: Any,
+        droppable: bool = False,
+    ) -> None:
+        async with self._cond:
+            if priority != PRIORITY_CONTROL:
+                while not self.closed and len(self._queue) >= self._max_queue:
+                    if self._overflow == "disconnect":
+                        self._overflow_disconnect()
+                    elif not self._drop_stale():
+                        # Nothing droppable queued: wait for the writer
+                        await self._cond.wait()
+            if self.closed:
+                return
+
+            heapq.heappush(self._queue, (priority, next(self._order), droppable, is_bytes, frame))
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._cond.notify_all()
+
+    def _drop_stale(self) -> bool:
+        stale = [i for i, item in enumerate(self._queue) if item[2]]
+        if not stale:
+            return False
+        oldest = min(stale, key=lambda i: self._queue[i][1])
+        self._queue.pop(oldest)
+        heapq.heapify(self._queue)
+        self.dropped += 1
+        return True
+
+    def _overflow_disconnect(self) -> None:
+        logger.warning("WebSocket send queue overflow, disconnecting", depth=len(self._queue))
+        self.dropped += len(self._queue)
+        self._queue.clear()
+        self.close_socket(1013, "Send queue overflow")
+
+    def close_socket(self, code: int, reason: str) -> None:
+        """Close the channel and, in the background, its socket."""
+        self.close()
+        asyncio.create_task(self._close_socket(code, reason))
+
+    async def _close_socket(self, code: int, reason: str) -> None:
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    async def _write_loop(self) -> None:
+        try:
+            while True:
+                async with self._cond:
+                    while not self._queue:
+                        await self._cond.wait()
+                    _, _, _, is_bytes, frame = heapq.heappop(self._queue)
+                    self._writing = True
+                    self._cond.notify_all()
+
+                if is_bytes:
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_json(frame)
+                self.sent += 1
+
+                async with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.debug("WebSocket writer stopped", error=str(e))
+        finally:
+            # Release producers blocked on a full queue
+            self.closed = True
+            self._writing = False
+            self._queue.clear()
+            async with self._cond:
+                self._cond.notify_all()
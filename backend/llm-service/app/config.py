@@ -54,8 +54,31 @@ class Settings(BaseSettings):
     STREAM_CHUNK_SIZE: int = Field(default=10, env="STREAM_CHUNK_SIZE")
     REQUEST_TIMEOUT: int = Field(default=60, env="REQUEST_TIMEOUT")
     
+    # Upstream scheduling (Groq quota; 0 = no client-side limit)
+    GROQ_REQUESTS_PER_MINUTE: int = Field(default=30, env="GROQ_REQUESTS_PER_MINUTE")
+    GROQ_TOKENS_PER_MINUTE: int = Field(default=6000, env="GROQ_TOKENS_PER_MINUTE")
+    UPSTREAM_MAX_CONNECTIONS: int = Field(default=20, env="UPSTREAM_MAX_CONNECTIONS")
+    UPSTREAM_TIMEOUT: float = Field(default=60.0, env="UPSTREAM_TIMEOUT")  # seconds per attempt
+    UPSTREAM_RETRY_DEADLINE_S: float = Field(default=20.0, env="UPSTREAM_RETRY_DEADLINE_S")
+    UPSTREAM_BACKOFF_BASE_S: float = Field(default=0.5, env="UPSTREAM_BACKOFF_BASE_S")
+    UPSTREAM_BACKOFF_MAX_S: float = Field(default=8.0, env="UPSTREAM_BACKOFF_MAX_S")
+    
     # Context
     MAX_CONTEXT_MESSAGES: int = Field(default=10, env="MAX_CONTEXT_MESSAGES")
+    CONTEXT_CACHE_MAX_SESSIONS: int = Field(default=1000, env="CONTEXT_CACHE_MAX_SESSIONS")
+    CONTEXT_CACHE_TTL: int = Field(default=3600, env="CONTEXT_CACHE_TTL")  # seconds
+
+    # Response Cache (opt-in, stateless questions only)
+    RESPONSE_CACHE_ENABLED: bool = Field(default=False, env="RESPONSE_CACHE_ENABLED")
+    RESPONSE_CACHE_TTL: int = Field(default=3600, env="RESPONSE_CACHE_TTL")  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(default=1024, env="RESPONSE_CACHE_MAX_ENTRIES")
+    RESPONSE_CACHE_SEMANTIC_ENABLED: bool = Field(default=True, env="RESPONSE_CACHE_SEMANTIC_ENABLED")
+    RESPONSE_CACHE_SEMANTIC_MAX_ENTRIES: int = Field(default=256, env="RESPONSE_CACHE_SEMANTIC_MAX_ENTRIES")
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD: float = Field(default=0.92, env="RESPONSE_CACHE_SIMILARITY_THRESHOLD")
+    RESPONSE_CACHE_EMBEDDING_MODEL: str = Field(default="all-MiniLM-L6-v2", env="RESPONSE_CACHE_EMBEDDING_MODEL")
+
+    # Usage Statistics
+    USAGE_STATS_MAX_SESSIONS: int = Field(default=1000, env="USAGE_STATS_MAX_SESSIONS")
     
     # Logging
     LOG_LEVEL: str = Field(default="INFO", env="LOG_LEVEL")
@@ -5,6 +5,9 @@ import structlog
 
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 
+from app.services.upstream_scheduler import PRIORITY_INTERACTIVE, upstream_scheduler
+from app.services.usage_stats import TokenUsage, usage_stats
+
 logger = structlog.get_logger()
 
 
@@ -26,11 +29,15 @@ class LLMEngine:
         if not settings.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY not set")
             
+        # Calls share the scheduler's connection pool, whose response hook
+        # tracks Groq's rate-limit headers; retries are the scheduler's job
         self.model = ChatGroq(
             temperature=settings.DEFAULT_TEMPERATURE,
             model_name=settings.GROQ_MODEL,
             groq_api_key=settings.GROQ_API_KEY,
             max_tokens=settings.DEFAULT_MAX_TOKENS,
+            max_retries=0,
+            http_async_client=upstream_scheduler.client,
         )
         
         # Bind tools
@@ -44,6 +51,7 @@ class LLMEngine:
         self.model = None
         self.model_with_tools = None
         self.is_initialized = False
+        await upstream_scheduler.close()
         logger.info("LLM engine shutdown")
     
     def _convert_messages(self, messages: List[Dict[str, str]]) -> List:
@@ -66,6 +74,49 @@ class LLMEngine:
         
         return lc_messages
 
+    def _recall(
+        self,
+        messages: List[Dict[str, str]],
+        session_id: Optional[str] = None,
+    ) -> List[str]:
+        """Long-term memory relevant to the last message and not already in the window.
+
+        Memory is queried before the new user message is stored, so the turn
+        being answered is never echoed back as "relevant past information".
+        """
+        from app.services.memory import memory_manager
+
+        if not session_id or not messages:
+            return []
+        in_window = {m["content"] for m in messages}
+        return [
+            m for m in memory_manager.retrieve_context(session_id, messages[-1]["content"])
+            if m not in in_window
+        ]
+
+    def _build_prompt(
+        self,
+        messages: List[Dict[str, str]],
+        session_id: Optional[str] = None,
+        past_messages: Optional[List[str]] = None,
+    ) -> List:
+        """Convert messages, inject recalled memory and remember the new user message."""
+        from app.services.memory import memory_manager
+        from langchain_core.messages import SystemMessage
+
+        lc_messages = self._convert_messages(messages)
+        if not session_id or not messages:
+            return lc_messages
+
+        if past_messages:
+            context_str = "\nRelevant past information:\n" + "\n".join([f"- {m}" for m in past_messages])
+            lc_messages.insert(1, SystemMessage(content=f"Context from memory: {context_str}"))
+
+        if messages[-1]["role"] == "user":
+            memory_manager.add_message(session_id, "user", messages[-1]["content"])
+
+        return lc_messages
+
     async def _handle_tool_calls(self, response, lc_messages):
         """Execute tool calls if present and return updated messages."""
         from app.tools.base import TOOLS
@@ -107,12 +158,39 @@ class LLMEngine:
         
         return lc_messages, True
 
+    async def _invoke(self, model, lc_messages, priority: int):
+        """Invoke the model under the upstream scheduler."""
+        return await upstream_scheduler.run(
+            lambda: model.ainvoke(lc_messages),
+            priority=priority,
+            tokens=_estimate_tokens(lc_messages),
+        )
+
+    async def _open_stream(self, lc_messages, priority: int):
+        """Start streaming and return (stream, first chunk).
+
+        Failures before the first chunk (429s, connection errors) are
+        retried by the scheduler; once content has been yielded a failure
+        is passed to the caller.
+        """
+        async def first_chunk():
+            stream = self.model.astream(lc_messages)
+            return stream, await anext(stream, None)
+
+        return await upstream_scheduler.run(
+            first_chunk,
+            priority=priority,
+            tokens=_estimate_tokens(lc_messages),
+        )
+
     async def generate(
         self,
         messages: List[Dict[str, str]],
         session_id: Optional[str] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """Generate a complete response with tool support and memory."""
         if not self.is_initialized:
@@ -120,42 +198,58 @@ class LLMEngine:
         
         start_time = time.time()
         
-        # Step 1: Add new user message to memory
         from app.services.memory import memory_manager
-        if session_id and messages and messages[-1]["role"] == "user":
-            memory_manager.add_message(session_id, "user", messages[-1]["content"])
         
-        # Step 2: Retrieve relevant context (RAG)
-        context_str = ""
-        if session_id and messages:
-            past_messages = memory_manager.retrieve_context(session_id, messages[-1]["content"])
-            if past_messages:
-                context_str = "\nRelevant past information:\n" + "\n".join([f"- {m}" for m in past_messages])
-
-        lc_messages = self._convert_messages(messages)
+        # Serve stateless repeated questions from the response cache
+        from app.services.response_cache import response_cache
+        past_messages = self._recall(messages, session_id)
+        cacheable = use_cache and response_cache.is_cacheable(messages, past_messages)
+        if cacheable:
+            cached = await response_cache.lookup(messages[-1]["content"])
+            if cached is not None:
+                if session_id:
+                    memory_manager.add_message(session_id, "user", messages[-1]["content"])
+                    memory_manager.add_message(session_id, "assistant", cached.text)
+                return {
+                    "text": cached.text,
+                    "latency_ms": round((time.time() - start_time) * 1000, 2),
+                    "tokens_used": None,
+                    "cached": True,
+                }
         
-        # Inject RAG context into system prompt or as a new message
-        if context_str:
-            from langchain_core.messages import SystemMessage
-            lc_messages.insert(1, SystemMessage(content=f"Context from memory: {context_str}"))
+        # Step 1: Retrieve relevant context (RAG) and remember the new user message
+        lc_messages = self._build_prompt(messages, session_id, past_messages)
 
-        # Step 3: Check for tool calls
-        response = await self.model_with_tools.ainvoke(lc_messages)
+        # Step 2: Check for tool calls; generation time spans every provider
+        # call whose completion tokens are counted, so throughput is not inflated
+        usage = TokenUsage()
+        generation_start = time.time()
+        response = await self._invoke(self.model_with_tools, lc_messages, priority)
+        usage.add(getattr(response, "usage_metadata", None))
+        usage.provider_calls += 1
         lc_messages, tool_executed = await self._handle_tool_calls(response, lc_messages)
         
         if tool_executed:
-            response = await self.model.ainvoke(lc_messages)
+            response = await self._invoke(self.model, lc_messages, priority)
+            usage.add(getattr(response, "usage_metadata", None))
+            usage.provider_calls += 1
+        usage.generation_ms = (time.time() - generation_start) * 1000
         
-        # Step 4: Add AI response to memory
+        # Step 3: Add AI response to memory
         if session_id:
             memory_manager.add_message(session_id, "assistant", response.content)
         
+        if cacheable and not tool_executed:
+            await response_cache.store(messages[-1]["content"], [response.content])
+        
+        self._record_usage(usage, session_id)
         latency_ms = (time.time() - start_time) * 1000
         
         return {
             "text": response.content,
             "latency_ms": round(latency_ms, 2),
-            "tokens_used": None,
+            "tokens_used": usage.total_tokens or None,
+            "usage": usage.as_dict(),
         }
     
     async def generate_stream(
@@ -164,62 +258,114 @@ class LLMEngine:
         session_id: Optional[str] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        usage: Optional[TokenUsage] = None,
+        priority: int = PRIORITY_INTERACTIVE,
     ) -> AsyncGenerator[str, None]:
-        """Generate streaming response with tool support and memory."""
+        """Generate streaming response with tool support and memory.
+        
+        If ``usage`` is given it is filled with the provider-reported token
+        usage once the stream is exhausted.
+        """
+        if usage is None:
+            usage = TokenUsage()
         if not self.is_initialized:
             raise RuntimeError("Engine not initialized")
         
-        # Step 1: Add new user message to memory
         from app.services.memory import memory_manager
-        if session_id and messages and messages[-1]["role"] == "user":
-            memory_manager.add_message(session_id, "user", messages[-1]["content"])
-
-        # Step 2: Retrieve relevant context (RAG)
-        context_str = ""
-        if session_id and messages:
-            past_messages = memory_manager.retrieve_context(session_id, messages[-1]["content"])
-            if past_messages:
-                context_str = "\nRelevant past information:\n" + "\n".join([f"- {m}" for m in past_messages])
 
-        lc_messages = self._convert_messages(messages)
+        # Replay stateless repeated questions from the response cache
+        from app.services.response_cache import response_cache
+        past_messages = self._recall(messages, session_id)
+        cacheable = response_cache.is_cacheable(messages, past_messages)
+        if cacheable:
+            cached = await response_cache.lookup(messages[-1]["content"])
+            if cached is not None:
+                async for content in response_cache.replay(cached):
+                    yield content
+                if session_id:
+                    memory_manager.add_message(session_id, "user", messages[-1]["content"])
+                    memory_manager.add_message(session_id, "assistant", cached.text)
+                return
 
-        if context_str:
-            from langchain_core.messages import SystemMessage
-            lc_messages.insert(1, SystemMessage(content=f"Context from memory: {context_str}"))
+        # Step 1: Retrieve relevant context (RAG) and remember the new user message
+        lc_messages = self._build_prompt(messages, session_id, past_messages)
         
-        # Step 3: Check for tool calls
-        response = await self.model_with_tools.ainvoke(lc_messages)
+        # Step 2: Check for tool calls; its completion tokens count towards
+        # usage, so it is timed along with the stream
+        generation_start = time.time()
+        response = await self._invoke(self.model_with_tools, lc_messages, priority)
+        usage.add(getattr(response, "usage_metadata", None))
+        usage.provider_calls += 1
         lc_messages, tool_executed = await self._handle_tool_calls(response, lc_messages)
         
-        # Step 4: Stream the final response
+        # Step 3: Stream the final response
         start_request_time = time.time()
         first_token = True
-        full_response = ""
+        chunks: List[str] = []
         
-        async for chunk in self.model.astream(lc_messages):
+        stream, chunk = await self._open_stream(lc_messages, priority)
+        while chunk is not None:
             if first_token:
                 self._first_token_latency_ms = (time.time() - start_request_time) * 1000
                 first_token = False
             
+            # Groq reports usage on the last chunk of the stream
+            usage.add(getattr(chunk, "usage_metadata", None))
+            
             content = chunk.content if hasattr(chunk, 'content') else str(chunk)
             if content:
-                full_response += content
+                chunks.append(content)
                 yield content
+            chunk = await anext(stream, None)
+        
+        usage.provider_calls += 1
+        usage.generation_ms = (time.time() - generation_start) * 1000
+        self._record_usage(usage, session_id)
         
-        # Step 5: Add AI response to memory
+        # Step 4: Add AI response to memory
         if session_id:
-            memory_manager.add_message(session_id, "assistant", full_response)
+            memory_manager.add_message(session_id, "assistant", "".join(chunks))
+        
+        if cacheable and not tool_executed:
+            await response_cache.store(messages[-1]["content"], chunks)
+    
+    def _record_usage(self, usage: TokenUsage, session_id: Optional[str]) -> None:
+        """Aggregate a generation's usage into the per-model/per-session stats."""
+        from app.config import settings
+        
+        usage_stats.record(settings.GROQ_MODEL, usage, session_id)
+        logger.info(
+            "Generation usage",
+            session_id=session_id,
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+            tokens_per_second=round(usage.tokens_per_second, 2) if usage.tokens_per_second else None,
+        )
     
     def get_info(self) -> Dict[str, Any]:
         """Get engine information."""
         from app.config import settings
+        from app.services.context_cache import context_cache
+        from app.services.response_cache import response_cache
         return {
             "initialized": self.is_initialized,
             "provider": "groq",
             "model": settings.GROQ_MODEL,
             "first_token_latency_ms": round(self._first_token_latency_ms, 2) if self._first_token_latency_ms else None,
+            "response_cache": response_cache.get_stats(),
+            "context_cache": context_cache.get_stats(),
+            "upstream": upstream_scheduler.get_stats(),
         }
 
 
+def _estimate_tokens(lc_messages) -> int:
+    """Rough prompt size for the token bucket (~4 characters per token).
+
+    Groq's x-ratelimit-remaining-tokens header corrects the bucket after
+    each response, so the estimate only needs to be in the right range.
+    """
+    return sum(len(str(getattr(m, "content", ""))) for m in lc_messages) // 4
+
+
 # Global engine instance
 llm_engine = LLMEngine()
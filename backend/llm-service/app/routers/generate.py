@@ -1,15 +1,18 @@
 """Text generation endpoints."""
 from typing import List, Dict, Any, Optional
-import json
 import time
 
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ValidationInfo, field_validator
 import structlog
 
 from app.models.llm_engine import llm_engine
 from app.config import settings
+from app.services.context_cache import context_cache, ContextVersionMismatch
+from app.services.usage_stats import TokenUsage, usage_stats
+from app.services import json_codec
+from app.services.upstream_scheduler import PRIORITIES, UpstreamBusy, parse_priority
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -17,6 +20,7 @@ router = APIRouter()
 # Validation limits
 MAX_MESSAGES = 50
 MAX_MESSAGE_CONTENT_LENGTH = 10000
+MAX_TOTAL_CONTENT_LENGTH = 50000
 
 
 class GenerateRequest(BaseModel):
@@ -26,6 +30,14 @@ class GenerateRequest(BaseModel):
     stream: bool = True
     temperature: Optional[float] = None
     max_tokens: Optional[int] = None
+    # Delta context protocol: context_version is the conversation's message
+    # count after `messages`; with delta=True only new messages are sent.
+    # context_start is the index of the oldest message in the caller's window.
+    context_version: Optional[int] = None
+    delta: bool = False
+    context_start: Optional[int] = None
+    # Upstream scheduling class: interactive calls are admitted before batch
+    priority: str = "interactive"
 
     @field_validator('messages')
     @classmethod
@@ -43,6 +55,10 @@ class GenerateRequest(BaseModel):
                 raise ValueError(
                     f"Message {i} content exceeds max length of {MAX_MESSAGE_CONTENT_LENGTH} characters"
                 )
+        if sum(len(msg['content']) for msg in v) > MAX_TOTAL_CONTENT_LENGTH:
+            raise ValueError(
+                f"Total message content exceeds max length of {MAX_TOTAL_CONTENT_LENGTH} characters"
+            )
         return v
 
     @field_validator('temperature')
@@ -59,12 +75,64 @@ class GenerateRequest(BaseModel):
             raise ValueError("max_tokens must be between 1 and 8192")
         return v
 
+    @field_validator('context_version')
+    @classmethod
+    def validate_context_version(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and v < 0:
+            raise ValueError("context_version must not be negative")
+        return v
+
+    @field_validator('context_start')
+    @classmethod
+    def validate_context_start(cls, v: Optional[int], info: ValidationInfo) -> Optional[int]:
+        if v is None:
+            return v
+        version = info.data.get('context_version')
+        if v < 0 or (version is not None and v > version):
+            raise ValueError("context_start must be between 0 and context_version")
+        return v
+
+    @field_validator('priority')
+    @classmethod
+    def validate_priority(cls, v: str) -> str:
+        if v not in PRIORITIES:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+        return v
+
+    @field_validator('delta')
+    @classmethod
+    def validate_delta(cls, v: bool, info: ValidationInfo) -> bool:
+        if v and info.data.get('context_version') is None:
+            raise ValueError("delta requests require context_version")
+        return v
+
 
 class GenerateResponse(BaseModel):
     """Generation response."""
     text: str
     latency_ms: float
     tokens_used: Optional[int] = None
+    usage: Optional[Dict[str, Any]] = None
+    cached: bool = False
+    context_version: Optional[int] = None
+
+
+def sse_frame(data: Dict[str, Any]) -> bytes:
+    """Encode one server-sent event frame."""
+    return b"data: " + json_codec.dumps(data) + b"\n\n"
+
+
+def resolve_context(request: GenerateRequest) -> List[Dict[str, str]]:
+    """Resolve the prompt window for a request, applying the delta protocol."""
+    if request.context_version is None:
+        return request.messages
+    if request.delta:
+        return context_cache.apply_delta(
+            request.session_id, request.context_version, request.messages, request.context_start
+        )
+    return context_cache.resync(
+        request.session_id, request.context_version, request.messages, request.context_start
+    )
 
 
 @router.post("/")
@@ -73,22 +141,58 @@ async def generate(request: GenerateRequest):
     
     start_time = time.time()
     
+    try:
+        messages = resolve_context(request)
+    except ContextVersionMismatch as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"error": "context_resync_required", "version": e.expected},
+        )
+    
     try:
         if request.stream:
-            # Return streaming response
+            usage = TokenUsage()
+            chunks = llm_engine.generate_stream(
+                messages=messages,
+                session_id=request.session_id,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                usage=usage,
+                priority=parse_priority(request.priority),
+            )
+            # Run the scheduled provider calls up to the first token before
+            # the response starts, so throttling still maps to a 503
+            first = await anext(chunks, None)
+            
             async def stream_generator():
-                full_text = ""
+                parts: List[str] = []
+                try:
+                    if first is not None:
+                        parts.append(first)
+                        yield sse_frame({"chunk": first, "done": False})
+                    async for chunk in chunks:
+                        parts.append(chunk)
+                        yield sse_frame({"chunk": chunk, "done": False})
+                except Exception as e:
+                    # Headers are sent; end the stream with an explicit failure
+                    logger.error("Generation stream failed", error=str(e), session_id=request.session_id)
+                    yield sse_frame({"chunk": "", "done": True, "error": "Generation failed"})
+                    return
                 
-                async for chunk in llm_engine.generate_stream(
-                    messages=request.messages,
-                    session_id=request.session_id,
-                    temperature=request.temperature,
-                    max_tokens=request.max_tokens,
-                ):
-                    full_text += chunk
-                    yield f"data: {json.dumps({'chunk': chunk, 'done': False})}\n\n"
+                full_text = "".join(parts)
+                context_version = None
+                if request.context_version is not None:
+                    context_version = context_cache.append(
+                        request.session_id, {"role": "assistant", "content": full_text}
+                    )
                 
-                yield f"data: {json.dumps({'chunk': '', 'done': True, 'full_response': full_text})}\n\n"
+                yield sse_frame({
+                    "chunk": "",
+                    "done": True,
+                    "full_response": full_text,
+                    "context_version": context_version,
+                    "usage": usage.as_dict(),
+                })
             
             return StreamingResponse(
                 stream_generator(),
@@ -101,20 +205,33 @@ async def generate(request: GenerateRequest):
         else:
             # Return complete response
             result = await llm_engine.generate(
-                messages=request.messages,
+                messages=messages,
                 session_id=request.session_id,
                 temperature=request.temperature,
                 max_tokens=request.max_tokens,
+                priority=parse_priority(request.priority),
             )
             
+            context_version = None
+            if request.context_version is not None:
+                context_version = context_cache.append(
+                    request.session_id, {"role": "assistant", "content": result["text"]}
+                )
+            
             latency_ms = (time.time() - start_time) * 1000
             
             return GenerateResponse(
                 text=result["text"],
                 latency_ms=round(latency_ms, 2),
                 tokens_used=result.get("tokens_used"),
+                usage=result.get("usage"),
+                cached=result.get("cached", False),
+                context_version=context_version,
             )
             
+    except UpstreamBusy as e:
+        logger.warning("Generation throttled", session_id=request.session_id)
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error("Generation failed", error=str(e), session_id=request.session_id)
         raise HTTPException(status_code=500, detail="Generation failed. Please try again.")
@@ -129,7 +246,11 @@ async def chat_completion(request: GenerateRequest):
             messages=request.messages,
             temperature=request.temperature,
             max_tokens=request.max_tokens,
+            priority=parse_priority(request.priority),
+            # Used by the gateway's summarizer; summaries must never be shared
+            use_cache=False,
         )
+        usage = result.get("usage") or {}
         
         return {
             "id": f"chatcmpl-{request.session_id}",
@@ -147,12 +268,14 @@ async def chat_completion(request: GenerateRequest):
                 }
             ],
             "usage": {
-                "prompt_tokens": None,
-                "completion_tokens": None,
+                "prompt_tokens": usage.get("prompt_tokens"),
+                "completion_tokens": usage.get("completion_tokens"),
                 "total_tokens": result.get("tokens_used"),
             },
         }
         
+    except UpstreamBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error("Chat completion failed", error=str(e))
         raise HTTPException(status_code=500, detail="Completion failed. Please try again.")
@@ -172,3 +295,18 @@ async def list_models():
         ],
         "current_provider": settings.LLM_PROVIDER,
     }
+
+
+@router.get("/stats")
+async def generation_stats():
+    """Token usage and throughput, in total and per model."""
+    return usage_stats.get_stats()
+
+
+@router.get("/stats/{session_id}")
+async def session_generation_stats(session_id: str):
+    """Token usage and throughput for one session."""
+    stats = usage_stats.get_session_stats(session_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No usage recorded for session")
+    return {"session_id": session_id, **stats}
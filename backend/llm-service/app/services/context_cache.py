@@ -0,0 +1,162 @@
+"""Hot per-session conversation context for the delta protocol.
+
+The gateway numbers every message it stores for a session; ``version`` is the
+number of messages the conversation holds after the last applied message.
+A delta request carries only the messages added since the version this
+service already has. If the versions disagree the caller must resync by
+sending the full context.
+
+Requests may also carry ``start``, the index of the oldest conversation
+message in the gateway's window. The gateway trims its window by a token
+budget, so the cache drops exactly the messages before ``start`` instead
+of applying its own MAX_CONTEXT_MESSAGES bound, and both sides keep the
+same window.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class SessionContext:
+    """Cached context window for one session."""
+    version: int
+    pinned: List[Dict[str, str]] = field(default_factory=list)
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    # Oldest message index kept, when the gateway manages the window
+    start: Optional[int] = None
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def window(self) -> List[Dict[str, str]]:
+        return self.pinned + self.messages
+
+    def trim_to(self, start: int) -> None:
+        """Drop messages before index ``start``."""
+        first = self.version - len(self.messages)
+        if start > first:
+            del self.messages[:start - first]
+        self.start = start
+
+
+class ContextVersionMismatch(Exception):
+    """Raised when a delta does not apply to the cached context."""
+
+    def __init__(self, session_id: str, expected: Optional[int]):
+        super().__init__(f"Context for session {session_id} must be resynced")
+        self.session_id = session_id
+        self.expected = expected
+
+
+class ContextCache:
+    """LRU of per-session context windows with TTL."""
+
+    def __init__(self):
+        self._sessions: "OrderedDict[str, SessionContext]" = OrderedDict()
+        self._max_sessions = settings.CONTEXT_CACHE_MAX_SESSIONS
+        self._ttl = settings.CONTEXT_CACHE_TTL
+        self._max_messages = settings.MAX_CONTEXT_MESSAGES
+        self.resyncs = 0
+        self.deltas = 0
+
+    def get(self, session_id: str) -> Optional[SessionContext]:
+        """Get the cached context if present and fresh."""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.updated_at > self._ttl:
+            del self._sessions[session_id]
+            return None
+        self._sessions.move_to_end(session_id)
+        return entry
+
+    def resync(
+        self,
+        session_id: str,
+        version: int,
+        messages: List[Dict[str, str]],
+        start: Optional[int] = None,
+    ) -> List[Dict[str, str]]:
+        """Replace the cached context with a full window from the gateway."""
+        split = 0
+        while split < len(messages) and messages[split]["role"] == "system":
+            split += 1
+
+        entry = SessionContext(
+            version=version,
+            pinned=list(messages[:split]),
+            messages=list(messages[split:]),
+        )
+        if start is not None:
+            entry.trim_to(start)
+        self._store(session_id, entry)
+        self.resyncs += 1
+        return entry.window()
+
+    def apply_delta(
+        self,
+        session_id: str,
+        version: int,
+        messages: List[Dict[str, str]],
+        start: Optional[int] = None,
+    ) -> List[Dict[str, str]]:
+        """Append new messages; raise ContextVersionMismatch on a gap.
+
+        A ``start`` before the oldest cached message cannot be served
+        from the cache and also requires a resync.
+        """
+        entry = self.get(session_id)
+        base_version = version - len(messages)
+        if entry is None or entry.version != base_version:
+            raise ContextVersionMismatch(session_id, entry.version if entry else None)
+        if start is not None and start < entry.version - len(entry.messages):
+            raise ContextVersionMismatch(session_id, entry.version)
+
+        entry.messages.extend(messages)
+        entry.version = version
+        if start is not None:
+            entry.trim_to(start)
+        self._store(session_id, entry)
+        self.deltas += 1
+        return entry.window()
+
+    def append(self, session_id: str, message: Dict[str, str]) -> Optional[int]:
+        """Append a message produced by this service; returns the new version."""
+        entry = self.get(session_id)
+        if entry is None:
+            return None
+        entry.messages.append(message)
+        entry.version += 1
+        self._store(session_id, entry)
+        return entry.version
+
+    def invalidate(self, session_id: str) -> None:
+        """Forget a session's context."""
+        self._sessions.pop(session_id, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache statistics."""
+        return {
+            "sessions": len(self._sessions),
+            "resyncs": self.resyncs,
+            "deltas": self.deltas,
+        }
+
+    def _store(self, session_id: str, entry: SessionContext) -> None:
+        if entry.start is None and len(entry.messages) > self._max_messages:
+            del entry.messages[:-self._max_messages]
+        entry.updated_at = time.monotonic()
+        self._sessions[session_id] = entry
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self._max_sessions:
+            self._sessions.popitem(last=False)
+
+
+# Global context cache instance
+context_cache = ContextCache()
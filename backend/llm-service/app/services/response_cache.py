@@ -0,0 +1,272 @@
+"""Response cache for repeated stateless questions."""
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncGenerator, Callable, Dict, List, Optional, Sequence, Any
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+# Words that make a question depend on earlier turns ("what about it?")
+REFERENTIAL_WORDS = frozenset({
+    "it", "its", "that", "this", "those", "these", "he", "she", "him", "her",
+    "they", "them", "their", "again", "above", "previous", "earlier", "last",
+})
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Normalize a prompt for exact-match lookup."""
+    text = _PUNCTUATION_RE.sub(" ", text.lower())
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+@dataclass
+class CacheEntry:
+    """Cached answer, stored as the chunks the model streamed."""
+    prompt: str
+    chunks: List[str]
+    expires_at: float
+    embedding: Optional[Any] = None
+    hits: int = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return (now or time.monotonic()) >= self.expires_at
+
+
+@dataclass
+class CacheStats:
+    """Cache hit/miss counters."""
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    skipped: int = 0
+    stores: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "stores": self.stores,
+        }
+
+
+class ResponseCache:
+    """Two-tier LLM response cache.
+
+    The first tier is an exact-match LRU keyed by the normalized prompt.
+    The second tier compares prompt embeddings against a bounded set of
+    recent entries and accepts the closest one above a similarity threshold.
+    Only stateless turns are cached; see ``is_cacheable``.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[str], Sequence[float]]] = None,
+    ):
+        self.enabled = settings.RESPONSE_CACHE_ENABLED
+        self._ttl = settings.RESPONSE_CACHE_TTL
+        self._max_entries = settings.RESPONSE_CACHE_MAX_ENTRIES
+        self._semantic_enabled = settings.RESPONSE_CACHE_SEMANTIC_ENABLED
+        self._semantic_max_entries = settings.RESPONSE_CACHE_SEMANTIC_MAX_ENTRIES
+        self._threshold = settings.RESPONSE_CACHE_SIMILARITY_THRESHOLD
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._semantic_keys: "OrderedDict[str, None]" = OrderedDict()
+        self._embed_fn = embed_fn
+        self._embed_lock = threading.Lock()
+        self.stats = CacheStats()
+
+    # Guard
+
+    def is_cacheable(
+        self,
+        messages: List[Dict[str, str]],
+        recalled: Optional[Sequence[str]] = None,
+    ) -> bool:
+        """Return True if the turn is a stateless question.
+
+        A turn is context-dependent when the conversation already has turns
+        before the last message (including system messages, which carry the
+        gateway's rolling summary), when long-term memory was ``recalled``
+        for it, or when the question refers back to something said earlier.
+        """
+        if not self.enabled or not messages or messages[-1].get("role") != "user":
+            return False
+
+        if len(messages) > 1 or recalled:
+            self.stats.skipped += 1
+            return False
+
+        words = set(normalize_prompt(messages[-1].get("content", "")).split())
+        if not words or words & REFERENTIAL_WORDS:
+            self.stats.skipped += 1
+            return False
+
+        return True
+
+    # Lookup / store
+
+    async def lookup(self, prompt: str) -> Optional[CacheEntry]:
+        """Find a cached answer for the prompt, exact match first."""
+        key = normalize_prompt(prompt)
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.is_expired(now):
+                self._evict(key)
+            else:
+                self._entries.move_to_end(key)
+                entry.hits += 1
+                self.stats.exact_hits += 1
+                return entry
+
+        if self._semantic_enabled and self._semantic_keys:
+            entry = await self._semantic_lookup(key, now)
+            if entry is not None:
+                entry.hits += 1
+                self.stats.semantic_hits += 1
+                return entry
+
+        self.stats.misses += 1
+        return None
+
+    async def store(
+        self,
+        prompt: str,
+        chunks: List[str],
+        ttl: Optional[int] = None,
+    ) -> None:
+        """Store an answer for the prompt with a per-entry TTL."""
+        key = normalize_prompt(prompt)
+        if not key or not chunks:
+            return
+
+        entry = CacheEntry(
+            prompt=key,
+            chunks=list(chunks),
+            expires_at=time.monotonic() + (ttl if ttl is not None else self._ttl),
+        )
+
+        if self._semantic_enabled:
+            entry.embedding = await self._embed(key)
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self._semantic_keys.pop(oldest, None)
+
+        if entry.embedding is not None:
+            self._semantic_keys[key] = None
+            self._semantic_keys.move_to_end(key)
+            while len(self._semantic_keys) > self._semantic_max_entries:
+                self._semantic_keys.popitem(last=False)
+
+        self.stats.stores += 1
+
+    async def replay(self, entry: CacheEntry) -> AsyncGenerator[str, None]:
+        """Replay a cached answer at the granularity it was streamed."""
+        for chunk in entry.chunks:
+            yield chunk
+            await asyncio.sleep(0)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+        self._semantic_keys.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "semantic_entries": len(self._semantic_keys),
+            **self.stats.as_dict(),
+        }
+
+    # Internals
+
+    def _evict(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._semantic_keys.pop(key, None)
+
+    async def _semantic_lookup(self, key: str, now: float) -> Optional[CacheEntry]:
+        import numpy as np
+
+        query = await self._embed(key)
+        if query is None:
+            return None
+
+        candidates = []
+        for candidate_key in list(self._semantic_keys):
+            entry = self._entries.get(candidate_key)
+            if entry is None or entry.is_expired(now):
+                self._evict(candidate_key)
+                continue
+            candidates.append(entry)
+
+        if not candidates:
+            return None
+
+        matrix = np.stack([entry.embedding for entry in candidates])
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self._threshold:
+            return None
+
+        logger.debug(
+            "Semantic cache hit",
+            prompt=key,
+            matched=candidates[best].prompt,
+            score=round(float(scores[best]), 3),
+        )
+        return candidates[best]
+
+    async def _embed(self, text: str):
+        """Embed text as a unit-length vector, or None if embeddings are unavailable."""
+        import numpy as np
+
+        try:
+            vector = await asyncio.to_thread(self._encode, text)
+        except ImportError as e:
+            logger.warning("Semantic response cache disabled, embeddings unavailable", error=str(e))
+            self._semantic_enabled = False
+            return None
+        except Exception as e:
+            logger.error("Cache embedding failed", error=str(e))
+            return None
+
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _encode(self, text: str) -> Sequence[float]:
+        """Run the embedding model (called in a worker thread)."""
+        if self._embed_fn is None:
+            # Concurrent misses must not load the model twice
+            with self._embed_lock:
+                if self._embed_fn is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    model = SentenceTransformer(settings.RESPONSE_CACHE_EMBEDDING_MODEL)
+                    self._embed_fn = model.encode
+        return self._embed_fn(text)
+
+
+# Global response cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,298 @@
+"""Quota-aware scheduling of calls to the Groq API.
+
+Every upstream call goes through one scheduler per process, which owns:
+
+- a persistent ``httpx.AsyncClient`` connection pool,
+- client-side token buckets for requests and tokens per minute, kept in
+  step with the ``x-ratelimit-*`` headers Groq returns,
+- priority admission: interactive calls are admitted before batch calls,
+- retries of 429/5xx and connection errors with jittered exponential
+  backoff, honouring ``retry-after`` and bounded by a deadline.
+
+The same module is used by the STT and LLM services.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+import httpx
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+PRIORITIES = {"interactive": PRIORITY_INTERACTIVE, "batch": PRIORITY_BATCH}
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class UpstreamBusy(Exception):
+    """Raised when a call cannot be admitted before its deadline."""
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse Groq reset durations ("7.66s", "2m59.56s", "120ms") or plain seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Continuously refilling bucket of ``per_minute`` units; 0 means unlimited."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available."""
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self._rate
+
+    def consume(self, amount: float) -> None:
+        if self.capacity:
+            self.level -= min(amount, self.capacity)
+
+    def clamp(self, remaining: float) -> None:
+        """Lower the level to what the server says is left."""
+        if self.capacity:
+            self._refill()
+            self.level = min(self.level, remaining)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class UpstreamScheduler:
+    """Admit, send and retry Groq calls within the account's quota."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ):
+        rpm = settings.GROQ_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        tpm = settings.GROQ_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._blocked_until = 0.0
+        self._waiters: List[Tuple[int, int]] = []
+        self._order = itertools.count()
+        self._changed = asyncio.Event()
+        self._client: Optional[httpx.AsyncClient] = None
+        self.calls = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.rate_limited = 0
+        self.wait_ms = 0.0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared connection pool; responses update the rate-limit state."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.UPSTREAM_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+                ),
+                event_hooks={"response": [self._on_response]},
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE, tokens: int = 0) -> None:
+        """Wait for a request slot, serving higher priorities first."""
+        entry = (priority, next(self._order))
+        heapq.heappush(self._waiters, entry)
+        self._notify()
+        start = time.monotonic()
+        try:
+            while True:
+                if self._waiters[0] == entry:
+                    delay = max(
+                        self._blocked_until - time.monotonic(),
+                        self.requests.delay_for(1),
+                        self.tokens.delay_for(tokens),
+                    )
+                    if delay <= 0:
+                        self.requests.consume(1)
+                        self.tokens.consume(tokens)
+                        heapq.heappop(self._waiters)
+                        self._notify()
+                        return
+                    await self._wait(delay)
+                else:
+                    await self._wait(None)
+        except BaseException:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self._notify()
+            raise
+        finally:
+            self.wait_ms += (time.monotonic() - start) * 1000
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        priority: int = PRIORITY_INTERACTIVE,
+        tokens: int = 0,
+        deadline_s: Optional[float] = None,
+    ) -> Any:
+        """Run ``call`` under the quota, retrying transient failures.
+
+        ``call`` is invoked again on each attempt, so it must rebuild its
+        request. An ``httpx.Response`` with a retryable status is retried;
+        once the deadline would be passed the last response is returned (or
+        the last error raised) for the caller to handle.
+        """
+        deadline = time.monotonic() + (deadline_s or settings.UPSTREAM_RETRY_DEADLINE_S)
+        attempt = 0
+        failure = None
+        while True:
+            try:
+                await asyncio.wait_for(self.acquire(priority, tokens), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self.gave_up += 1
+                if isinstance(failure, Exception):
+                    raise failure
+                if failure is not None:
+                    # A retry that could not be admitted in time returns the last failure
+                    return failure
+                raise UpstreamBusy("Upstream quota exhausted; try again shortly")
+
+            self.calls += 1
+            try:
+                result = await call()
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                failure, status, headers = e, getattr(e, "status_code", None), _headers_of(e)
+            else:
+                if not isinstance(result, httpx.Response) or result.status_code not in RETRY_STATUSES:
+                    return result
+                failure, status, headers = result, result.status_code, result.headers
+
+            retry_after = parse_duration(headers.get("retry-after")) if headers else None
+            if status == 429:
+                self.rate_limited += 1
+                if retry_after:
+                    self._block(retry_after)
+            delay = max(retry_after or 0.0, self._backoff(attempt))
+            if time.monotonic() + delay > deadline:
+                self.gave_up += 1
+                logger.warning("Upstream call failed after retries", status=status, attempts=attempt + 1)
+                if isinstance(failure, Exception):
+                    raise failure
+                return failure
+
+            self.retries += 1
+            attempt += 1
+            logger.info("Retrying upstream call", status=status, attempt=attempt, delay_s=round(delay, 2))
+            await asyncio.sleep(delay)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Align the buckets with Groq's x-ratelimit-* response headers."""
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            try:
+                remaining = float(remaining)
+            except ValueError:
+                continue
+            bucket.clamp(remaining)
+            if remaining <= 0:
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if reset:
+                    self._block(reset)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler statistics."""
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "rate_limited": self.rate_limited,
+            "waiting": len(self._waiters),
+            "wait_ms": round(self.wait_ms, 2),
+            "blocked_for_s": round(max(self._blocked_until - time.monotonic(), 0.0), 2),
+            "requests_available": round(self.requests.level, 2) if self.requests.capacity else None,
+            "tokens_available": round(self.tokens.level, 2) if self.tokens.capacity else None,
+        }
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        self.update_from_headers(response.headers)
+
+    def _block(self, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spread retries from many callers across the window
+        ceiling = min(settings.UPSTREAM_BACKOFF_MAX_S, settings.UPSTREAM_BACKOFF_BASE_S * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _wait(self, timeout: Optional[float]) -> None:
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def parse_priority(name: Optional[str]) -> int:
+    """Map "interactive"/"batch" to a priority; unknown names are interactive."""
+    return PRIORITIES.get((name or "").lower(), PRIORITY_INTERACTIVE)
+
+
+def _is_retryable(error: Exception) -> bool:
+    if getattr(error, "status_code", None) in RETRY_STATUSES:
+        return True
+    if isinstance(error, (httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    # Connection errors raised by the groq SDK
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _headers_of(error: Exception) -> Optional[Mapping[str, str]]:
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None)
+
+
+# Global upstream scheduler instance
+upstream_scheduler = UpstreamScheduler()
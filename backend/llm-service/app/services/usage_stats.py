@@ -0,0 +1,112 @@
+"""Token accounting and generation throughput statistics."""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+
+@dataclass
+class TokenUsage:
+    """Provider-reported token usage for one generation."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    generation_ms: float = 0.0
+    provider_calls: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        if not self.completion_tokens or not self.generation_ms:
+            return None
+        return self.completion_tokens / (self.generation_ms / 1000)
+
+    def add(self, usage_metadata: Optional[Dict[str, Any]]) -> None:
+        """Add LangChain ``usage_metadata`` from a provider response or chunk."""
+        if not usage_metadata:
+            return
+        self.prompt_tokens += usage_metadata.get("input_tokens", 0) or 0
+        self.completion_tokens += usage_metadata.get("output_tokens", 0) or 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        tps = self.tokens_per_second
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "generation_ms": round(self.generation_ms, 2),
+            "tokens_per_second": round(tps, 2) if tps else None,
+        }
+
+
+@dataclass
+class UsageCounters:
+    """Aggregated usage for a model or session."""
+    requests: int = 0
+    provider_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    generation_ms: float = 0.0
+
+    def record(self, usage: TokenUsage) -> None:
+        self.requests += 1
+        self.provider_calls += usage.provider_calls
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        self.generation_ms += usage.generation_ms
+
+    def as_dict(self) -> Dict[str, Any]:
+        seconds = self.generation_ms / 1000
+        return {
+            "requests": self.requests,
+            "provider_calls": self.provider_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "avg_tokens_per_second": round(self.completion_tokens / seconds, 2) if seconds else None,
+        }
+
+
+class UsageStats:
+    """Per-model, per-session and total token counters."""
+
+    def __init__(self):
+        self._max_sessions = settings.USAGE_STATS_MAX_SESSIONS
+        self._totals = UsageCounters()
+        self._models: Dict[str, UsageCounters] = {}
+        self._sessions: "OrderedDict[str, UsageCounters]" = OrderedDict()
+
+    def record(self, model: str, usage: TokenUsage, session_id: Optional[str] = None) -> None:
+        """Record one generation."""
+        self._totals.record(usage)
+        self._models.setdefault(model, UsageCounters()).record(usage)
+
+        if session_id:
+            counters = self._sessions.get(session_id)
+            if counters is None:
+                counters = UsageCounters()
+                self._sessions[session_id] = counters
+            counters.record(usage)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get totals and per-model counters."""
+        return {
+            "totals": self._totals.as_dict(),
+            "models": {name: c.as_dict() for name, c in self._models.items()},
+            "tracked_sessions": len(self._sessions),
+        }
+
+    def get_session_stats(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get counters for one session, if tracked."""
+        counters = self._sessions.get(session_id)
+        return counters.as_dict() if counters else None
+
+
+# Global usage statistics instance
+usage_stats = UsageStats()
@@ -15,33 +15,80 @@ class Settings(BaseSettings):
     PORT: int = Field(default=8001, env="PORT")
     
     # STT Provider
-    STT_PROVIDER: str = Field(default="whisper", env="STT_PROVIDER")
-    # Options: whisper, groq
+    STT_PROVIDER: str = Field(default="groq", env="STT_PROVIDER")
+    # Options: groq, local (whisper is accepted as an alias for groq)
     
-    # Whisper Model
+    # Whisper Model (local provider)
     WHISPER_MODEL: str = Field(default="base", env="WHISPER_MODEL")
     # Options: tiny, base, small, medium, large, large-v2, large-v3
+    WHISPER_MODEL_PATH: str = Field(default="", env="WHISPER_MODEL_PATH")  # CTranslate2 model dir; overrides WHISPER_MODEL
+    STT_WORKERS: int = Field(default=2, env="STT_WORKERS")  # concurrent local inferences
+    STT_CPU_THREADS: int = Field(default=0, env="STT_CPU_THREADS")  # per worker, 0 = library default
     
     # Groq Configuration
     GROQ_API_KEY: str = Field(default="", env="GROQ_API_KEY")
     GROQ_MODEL: str = Field(default="whisper-large-v3", env="GROQ_MODEL")
     
+    # Model routing (Groq): short clips use the fast model, doubtful results escalate to GROQ_MODEL
+    GROQ_FAST_MODEL: str = Field(default="whisper-large-v3-turbo", env="GROQ_FAST_MODEL")  # empty disables routing
+    GROQ_FAST_MODEL_LANGUAGES: str = Field(default="", env="GROQ_FAST_MODEL_LANGUAGES")  # comma-separated; empty = all
+    STT_ROUTE_FAST_MAX_S: float = Field(default=15.0, env="STT_ROUTE_FAST_MAX_S")  # longer audio uses GROQ_MODEL
+    STT_ROUTE_ESCALATE_CONFIDENCE: float = Field(default=0.5, env="STT_ROUTE_ESCALATE_CONFIDENCE")  # 0 disables
+    STT_ROUTE_ASSUMED_KBPS: int = Field(default=32, env="STT_ROUTE_ASSUMED_KBPS")  # to estimate compressed durations
+    
     DEVICE: str = Field(default="auto", env="DEVICE")
     # auto, cpu, cuda
     
-    COMPUTE_TYPE: str = Field(default="float16", env="COMPUTE_TYPE")
+    COMPUTE_TYPE: str = Field(default="int8", env="COMPUTE_TYPE")
     # float16, int8, float32
     
     # Audio Processing
     SAMPLE_RATE: int = Field(default=16000, env="SAMPLE_RATE")
     CHUNK_DURATION_MS: int = Field(default=1000, env="CHUNK_DURATION_MS")
+    AUDIO_PREPROCESS: bool = Field(default=True, env="AUDIO_PREPROCESS")  # downmix/resample WAV and PCM
+    AUDIO_UPLOAD_CODEC: str = Field(default="flac", env="AUDIO_UPLOAD_CODEC")
+    # flac (needs soundfile, falls back to wav), wav
+    AUDIO_PREPROCESS_MAX_MB: int = Field(default=25, env="AUDIO_PREPROCESS_MAX_MB")  # larger WAVs are sent unchanged
+    
+    # Uploads
+    MAX_AUDIO_SIZE_MB: int = Field(default=50, env="MAX_AUDIO_SIZE_MB")
+    SPOOL_MEMORY_MB: int = Field(default=1, env="SPOOL_MEMORY_MB")  # larger uploads spool to disk
     
     # Language
     LANGUAGE: str = Field(default="en", env="LANGUAGE")
     AUTO_DETECT_LANGUAGE: bool = Field(default=True, env="AUTO_DETECT_LANGUAGE")
     
+    # Upstream scheduling (Groq quota; 0 = no client-side limit)
+    GROQ_REQUESTS_PER_MINUTE: int = Field(default=20, env="GROQ_REQUESTS_PER_MINUTE")
+    GROQ_TOKENS_PER_MINUTE: int = Field(default=0, env="GROQ_TOKENS_PER_MINUTE")
+    UPSTREAM_MAX_CONNECTIONS: int = Field(default=20, env="UPSTREAM_MAX_CONNECTIONS")
+    UPSTREAM_TIMEOUT: float = Field(default=30.0, env="UPSTREAM_TIMEOUT")  # seconds per attempt
+    UPSTREAM_RETRY_DEADLINE_S: float = Field(default=20.0, env="UPSTREAM_RETRY_DEADLINE_S")
+    UPSTREAM_BACKOFF_BASE_S: float = Field(default=0.5, env="UPSTREAM_BACKOFF_BASE_S")
+    UPSTREAM_BACKOFF_MAX_S: float = Field(default=8.0, env="UPSTREAM_BACKOFF_MAX_S")
+    
+    # Result cache
+    STT_CACHE_ENABLED: bool = Field(default=True, env="STT_CACHE_ENABLED")
+    STT_CACHE_MAX_ENTRIES: int = Field(default=1024, env="STT_CACHE_MAX_ENTRIES")
+    STT_CACHE_TTL: int = Field(default=3600, env="STT_CACHE_TTL")  # seconds
+    STT_CACHE_REDIS_URL: str = Field(default="", env="STT_CACHE_REDIS_URL")  # shared tier across replicas; empty disables
+    
+    # Long-form audio (/transcribe/file)
+    LONG_FORM_MIN_DURATION_S: int = Field(default=60, env="LONG_FORM_MIN_DURATION_S")  # shorter files go in one request
+    LONG_FORM_CHUNK_S: int = Field(default=30, env="LONG_FORM_CHUNK_S")  # maximum chunk length
+    LONG_FORM_CONCURRENCY: int = Field(default=4, env="LONG_FORM_CONCURRENCY")  # chunks in flight per file
+    LONG_FORM_MAX_JOBS: int = Field(default=2, env="LONG_FORM_MAX_JOBS")  # files transcribed at once
+    SILENCE_THRESHOLD_DB: float = Field(default=-40.0, env="SILENCE_THRESHOLD_DB")  # dBFS
+    MIN_SILENCE_MS: int = Field(default=300, env="MIN_SILENCE_MS")
+    CHUNK_OVERLAP_MS: int = Field(default=1000, env="CHUNK_OVERLAP_MS")  # only where no pause was found
+    
+    # Batch transcription
+    BATCH_SIZE: int = Field(default=4, env="BATCH_SIZE")  # concurrent batch transcriptions, shared by all batches
+    BATCH_MAX_ITEMS: int = Field(default=100, env="BATCH_MAX_ITEMS")
+    BATCH_MAX_SIZE_MB: int = Field(default=500, env="BATCH_MAX_SIZE_MB")  # whole multipart request
+    BATCH_URL_PREFIXES: str = Field(default="", env="BATCH_URL_PREFIXES")  # allowed reference URL prefixes; empty disables
+    
     # Performance
-    BATCH_SIZE: int = Field(default=1, env="BATCH_SIZE")
     BEAM_SIZE: int = Field(default=5, env="BEAM_SIZE")
     BEST_OF: int = Field(default=5, env="BEST_OF")
     
@@ -7,8 +7,10 @@ from fastapi.middleware.cors import CORSMiddleware
 import structlog
 
 from app.config import settings
+from app.middleware import BodySizeLimitMiddleware
 from app.routers import transcribe, health
 from app.models.whisper_model import whisper_engine
+from app.services.result_cache import transcription_cache
 
 logger = structlog.get_logger()
 
@@ -19,16 +21,19 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     # Startup
     logger.info("Starting STT Service", version="1.0.0")
     
-    # Load Whisper model
-    logger.info("Loading Whisper model", model=settings.WHISPER_MODEL)
+    # Load STT provider
+    logger.info("Loading STT provider", provider=settings.STT_PROVIDER)
     await whisper_engine.load_model()
-    logger.info("Whisper model loaded successfully")
+    logger.info("STT provider loaded successfully")
+    
+    await transcription_cache.connect()
     
     yield
     
     # Shutdown
     logger.info("Shutting down STT Service")
     await whisper_engine.unload_model()
+    await transcription_cache.disconnect()
     logger.info("STT Service shutdown complete")
 
 
@@ -48,6 +53,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(BodySizeLimitMiddleware)
+
 # Include routers
 app.include_router(health.router, tags=["Health"])
 app.include_router(transcribe.router, prefix="/transcribe", tags=["Transcription"])
@@ -59,6 +66,7 @@ async def root():
     return {
         "service": "Speech-to-Text Service",
         "version": "1.0.0",
-        "model": settings.WHISPER_MODEL,
+        "provider": settings.STT_PROVIDER,
+        "model": whisper_engine.get_model_info().get("model"),
         "status": "operational",
     }
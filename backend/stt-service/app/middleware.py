@@ -0,0 +1,69 @@
+"""Middleware for STT service."""
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+# Allowance for multipart boundaries and form fields around the audio
+BODY_OVERHEAD_BYTES = 1024 * 1024
+
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies that exceed the audio limit.
+
+    A declared Content-Length over the limit is refused before the body is
+    read. Bodies without one (chunked uploads) are counted as they arrive
+    and cut off with 413 as soon as they cross the limit, so an oversized
+    multipart upload is never spooled in full.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        limit_mb = settings.BATCH_MAX_SIZE_MB if path.endswith("/batch") else settings.MAX_AUDIO_SIZE_MB
+        limit = limit_mb * 1024 * 1024 + BODY_OVERHEAD_BYTES
+        detail = f"Audio file too large (max {limit_mb}MB)"
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length", b"").decode("latin-1")
+        if content_length.isdigit() and int(content_length) > limit:
+            logger.warning("Rejected oversized upload", path=path, size=int(content_length))
+            await JSONResponse(status_code=413, content={"detail": detail})(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    logger.warning("Rejected oversized upload", path=path, size=received)
+                    # Surfaces through the route's exception handling as a 413
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        async def tracked_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except HTTPException as e:
+            if e.status_code != 413 or response_started:
+                raise
+            await JSONResponse(status_code=413, content={"detail": e.detail})(scope, receive, send)
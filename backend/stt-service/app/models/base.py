@@ -0,0 +1,34 @@
+"""Speech-to-text provider interface."""
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+
+class STTProvider(ABC):
+    """A speech-to-text backend selected by STT_PROVIDER."""
+
+    name: str = ""
+
+    def __init__(self):
+        self.is_loaded = False
+
+    @abstractmethod
+    async def load(self) -> None:
+        """Prepare the provider (load weights, check credentials)."""
+
+    async def unload(self) -> None:
+        """Release provider resources."""
+        self.is_loaded = False
+
+    @abstractmethod
+    async def transcribe(
+        self,
+        audio_data: Union[bytes, BinaryIO],
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Transcribe audio; returns text, language, confidence and timing."""
+
+    @abstractmethod
+    def get_info(self) -> Dict[str, Any]:
+        """Describe the provider for health and info endpoints."""
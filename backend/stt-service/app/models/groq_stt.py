@@ -0,0 +1,141 @@
+"""Groq Cloud speech-to-text provider."""
+import asyncio
+import time
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+import structlog
+
+from app.config import settings
+from app.models.base import STTProvider
+from app.services.confidence import language_code, summarize_segments
+from app.services.model_router import model_router
+from app.services.upstream_scheduler import PRIORITY_INTERACTIVE, upstream_scheduler
+
+logger = structlog.get_logger()
+
+GROQ_TRANSCRIPTIONS_URL = "https://api.groq.com/openai/v1/audio/transcriptions"
+
+
+class GroqSTTProvider(STTProvider):
+    """Transcribe through the Groq audio transcription API."""
+
+    name = "groq"
+
+    async def load(self) -> None:
+        """Check credentials."""
+        if not settings.GROQ_API_KEY:
+            raise ValueError("GROQ_API_KEY not set for groq provider")
+
+        self.is_loaded = True
+        logger.info("STT provider set to Groq", model=settings.GROQ_MODEL)
+
+    async def transcribe(
+        self,
+        audio_data: Union[bytes, BinaryIO],
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Transcribe audio to text using Groq Cloud API.
+
+        ``audio_data`` may be bytes or a readable file; files are streamed
+        into the multipart request rather than read into memory. Calls go
+        through the upstream scheduler at ``priority`` (interactive by
+        default), which retries 429s and transient errors. The model is
+        picked by the model router unless ``model`` is given.
+        """
+        start_time = time.time()
+
+        # Downmix/resample uncompressed audio and label the container;
+        # Groq expects a file with a valid extension
+        prepared = await self._prepare(audio_data, kwargs.get("pcm_sample_rate"))
+        priority = kwargs.get("priority", PRIORITY_INTERACTIVE)
+
+        model = kwargs.get("model") or model_router.choose(prepared, language)
+        result = await self._request(prepared, language, model, priority)
+        if model_router.should_escalate(model, result):
+            model = model_router.model
+            result = await self._request(prepared, language, model, priority)
+
+        total_time = (time.time() - start_time) * 1000
+
+        return {
+            **result,
+            "model": model,
+            "timing": {
+                "total_ms": round(total_time, 2),
+                "groq_ms": round(total_time, 2),
+            }
+        }
+
+    async def _request(self, prepared, language: Optional[str], model: str, priority: int) -> Dict[str, Any]:
+        """Send one transcription request; returns text, language and segment scores."""
+        headers = {"Authorization": f"Bearer {settings.GROQ_API_KEY}"}
+
+        def send():
+            # Rebuilt on every attempt so a file upload starts from the beginning
+            if not isinstance(prepared.data, (bytes, bytearray)):
+                prepared.data.seek(0)
+            files = {
+                "file": (prepared.filename, prepared.data, prepared.content_type),
+                "model": (None, model),
+                # Segment log-probs, no-speech probability and detected language
+                "response_format": (None, "verbose_json"),
+            }
+            if language:
+                files["language"] = (None, language)
+            return upstream_scheduler.client.post(GROQ_TRANSCRIPTIONS_URL, headers=headers, files=files)
+
+        response = await upstream_scheduler.run(send, priority=priority)
+
+        if response.status_code != 200:
+            logger.error("Groq STT failed", status=response.status_code, model=model, error=response.text)
+            raise RuntimeError(f"Groq STT failed: {response.text}")
+
+        result = response.json()
+        return {
+            "text": result["text"].strip(),
+            "language": language_code(result.get("language")) or language,
+            "duration": result.get("duration"),
+            **summarize_segments(result.get("segments") or []),
+        }
+
+    async def _prepare(self, audio_data, pcm_sample_rate: Optional[int] = None):
+        """Normalize audio off the event loop; fall back to the raw upload."""
+        from app.services.audio_preprocess import PreparedAudio, prepare_audio
+
+        try:
+            prepared = await asyncio.to_thread(prepare_audio, audio_data, pcm_sample_rate)
+        except ValueError as e:
+            logger.warning("Audio preprocessing failed, uploading as-is", error=str(e))
+            if isinstance(audio_data, (bytes, bytearray)):
+                size = len(audio_data)
+            else:
+                size = audio_data.seek(0, 2)
+                audio_data.seek(0)
+            return PreparedAudio(audio_data, "webm", size, size)
+
+        if prepared.bytes != prepared.original_bytes:
+            logger.info(
+                "Audio normalized for upload",
+                format=prepared.format,
+                original_bytes=prepared.original_bytes,
+                upload_bytes=prepared.bytes,
+            )
+        return prepared
+
+    async def unload(self) -> None:
+        """Close the upstream connection pool."""
+        await upstream_scheduler.close()
+        await super().unload()
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get provider information."""
+        return {
+            "loaded": self.is_loaded,
+            "provider": self.name,
+            "model": settings.GROQ_MODEL,
+            "device": "remote",
+            "routing": model_router.get_stats(),
+            "upstream": upstream_scheduler.get_stats(),
+        }
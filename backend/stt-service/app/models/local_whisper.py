@@ -0,0 +1,164 @@
+"""Local CPU speech-to-text provider (faster-whisper / CTranslate2)."""
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+import structlog
+
+from app.config import settings
+from app.models.base import STTProvider
+from app.services.confidence import summarize_segments
+
+logger = structlog.get_logger()
+
+
+class LocalWhisperProvider(STTProvider):
+    """Run Whisper in-process with int8 weights on a dedicated worker pool.
+
+    Inference never runs on the event loop: the model is loaded and every
+    transcription executes on a pool of STT_WORKERS threads. CTranslate2
+    releases the GIL while decoding, so workers run in parallel and the
+    model's own ``num_workers`` is set to match.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        super().__init__()
+        self._model = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._load_time_ms = 0.0
+
+    @property
+    def model_source(self) -> str:
+        return settings.WHISPER_MODEL_PATH or settings.WHISPER_MODEL
+
+    async def load(self) -> None:
+        """Load the model on the worker pool."""
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.STT_WORKERS,
+            thread_name_prefix="stt-local",
+        )
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        self._model = await loop.run_in_executor(self._executor, self._load_model)
+        self._load_time_ms = (time.time() - start_time) * 1000
+        self.is_loaded = True
+        logger.info(
+            "Local STT model loaded",
+            model=self.model_source,
+            device=settings.DEVICE,
+            compute_type=settings.COMPUTE_TYPE,
+            workers=settings.STT_WORKERS,
+            load_time_ms=round(self._load_time_ms, 2),
+        )
+
+    async def unload(self) -> None:
+        """Drop the model and shut down the worker pool."""
+        self.is_loaded = False
+        self._model = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        logger.info("Local STT model unloaded")
+
+    async def transcribe(
+        self,
+        audio_data: Union[bytes, BinaryIO],
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Transcribe audio on the worker pool."""
+        if self._model is None:
+            raise RuntimeError("Local STT model not loaded")
+
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            self._executor,
+            self._transcribe_sync,
+            audio_data,
+            language,
+            task,
+            kwargs.get("pcm_sample_rate"),
+        )
+        total_time = (time.time() - start_time) * 1000
+        result["timing"]["total_ms"] = round(total_time, 2)
+        return result
+
+    def _load_model(self):
+        from faster_whisper import WhisperModel
+
+        return WhisperModel(
+            self.model_source,
+            device=settings.DEVICE,
+            compute_type=settings.COMPUTE_TYPE,
+            cpu_threads=settings.STT_CPU_THREADS,
+            num_workers=settings.STT_WORKERS,
+        )
+
+    def _transcribe_sync(
+        self,
+        audio_data: Union[bytes, BinaryIO],
+        language: Optional[str],
+        task: str,
+        pcm_sample_rate: Optional[int],
+    ) -> Dict[str, Any]:
+        from app.services.audio_preprocess import load_samples
+
+        start_time = time.time()
+
+        # WAV and PCM are decoded here; compressed input goes to the model's decoder
+        audio = load_samples(audio_data, pcm_sample_rate)
+        if audio is None:
+            audio = io.BytesIO(audio_data) if isinstance(audio_data, (bytes, bytearray)) else audio_data
+
+        segments, info = self._model.transcribe(
+            audio,
+            language=language,
+            task=task,
+            beam_size=settings.BEAM_SIZE,
+            best_of=settings.BEST_OF,
+            vad_filter=settings.USE_VAD,
+        )
+        # Segments are decoded lazily; consume them on this worker
+        segments = list(segments)
+
+        text = "".join(segment.text for segment in segments).strip()
+        scores = summarize_segments([
+            {
+                "start": segment.start,
+                "end": segment.end,
+                "avg_logprob": segment.avg_logprob,
+                "no_speech_prob": segment.no_speech_prob,
+            }
+            for segment in segments
+        ])
+
+        return {
+            "text": text,
+            "language": info.language,
+            # Only meaningful when the language was detected rather than hinted
+            "language_probability": None if language else round(info.language_probability, 4),
+            "duration": info.duration,
+            **scores,
+            "timing": {
+                "inference_ms": round((time.time() - start_time) * 1000, 2),
+            },
+        }
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get provider information."""
+        return {
+            "loaded": self.is_loaded,
+            "provider": self.name,
+            "model": self.model_source,
+            "device": settings.DEVICE,
+            "compute_type": settings.COMPUTE_TYPE,
+            "workers": settings.STT_WORKERS,
+            "load_time_ms": round(self._load_time_ms, 2),
+        }
+
@@ -1,101 +1,108 @@
-"""Groq STT engine for speech-to-text."""
+"""STT engine for speech-to-text, backed by the configured provider."""
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO, Type, Union
 import structlog
 
+from app.models.base import STTProvider
+from app.models.groq_stt import GroqSTTProvider
+from app.models.local_whisper import LocalWhisperProvider
+from app.services.result_cache import transcription_cache
+
 logger = structlog.get_logger()
 
+# STT_PROVIDER values; "whisper" was the historical default and has always meant Groq
+PROVIDERS: Dict[str, Type[STTProvider]] = {
+    "groq": GroqSTTProvider,
+    "whisper": GroqSTTProvider,
+    "local": LocalWhisperProvider,
+}
+
+
+def create_provider(name: str) -> STTProvider:
+    """Instantiate the provider registered under ``name``."""
+    try:
+        return PROVIDERS[name.lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown STT provider: {name} (expected one of {', '.join(PROVIDERS)})")
+
 
 class WhisperEngine:
-    """Groq STT engine."""
-    
+    """STT engine delegating to the provider selected by STT_PROVIDER."""
+
     def __init__(self):
-        self.is_loaded = False
-        self._load_time_ms = 0
-    
-    async def load_model(self, model_name: str = "base", device: str = "auto"):
-        """Initialize STT engine."""
+        self.provider: Optional[STTProvider] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.provider is not None and self.provider.is_loaded
+
+    async def load_model(self, provider: Optional[str] = None):
+        """Initialize the STT provider."""
         from app.config import settings
-        
-        if not settings.GROQ_API_KEY:
-            raise ValueError("GROQ_API_KEY not set for groq provider")
-        
-        self.is_loaded = True
-        logger.info("STT provider set to Groq", model=settings.GROQ_MODEL)
-    
+
+        self.provider = create_provider(provider or settings.STT_PROVIDER)
+        await self.provider.load()
+
     async def unload_model(self):
         """Unload engine."""
-        self.is_loaded = False
+        if self.provider is not None:
+            await self.provider.unload()
         logger.info("STT engine unloaded")
-    
+
     async def transcribe(
         self,
-        audio_data: bytes,
+        audio_data: Union[bytes, BinaryIO],
         language: Optional[str] = None,
         task: str = "transcribe",
         **kwargs
     ) -> Dict[str, Any]:
-        """Transcribe audio to text using Groq Cloud API."""
-        import httpx
-        from app.config import settings
-        
+        """Transcribe audio to text.
+
+        ``audio_data`` may be bytes or a readable file; files are passed on
+        rather than read into memory. Repeated audio is answered from the
+        result cache without calling the provider.
+        """
         if not self.is_loaded:
             raise RuntimeError("Engine not loaded")
-        
+
+        if not transcription_cache.enabled:
+            return await self.provider.transcribe(audio_data, language=language, task=task, **kwargs)
+
         start_time = time.time()
-        
-        url = "https://api.groq.com/openai/v1/audio/transcriptions"
-        headers = {"Authorization": f"Bearer {settings.GROQ_API_KEY}"}
-        
-        # Groq expects a file-like object with a valid extension
-        # We'll use .webm since that's what the gateway sends
-        files = {
-            "file": ("audio.webm", audio_data, "audio/webm"),
-            "model": (None, settings.GROQ_MODEL),
-        }
-        
-        if language:
-            files["language"] = (None, language)
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, files=files, timeout=30.0)
-            
-        if response.status_code != 200:
-            logger.error("Groq STT failed", status=response.status_code, error=response.text)
-            raise RuntimeError(f"Groq STT failed: {response.text}")
-            
-        result = response.json()
-        total_time = (time.time() - start_time) * 1000
-        
-        return {
-            "text": result["text"].strip(),
-            "language": language,
-            "confidence": 1.0,
-            "timing": {
-                "total_ms": round(total_time, 2),
-                "groq_ms": round(total_time, 2),
-            }
-        }
-    
+        info = self.provider.get_info()
+        key = await transcription_cache.make_key(
+            audio_data,
+            provider=info["provider"],
+            model=info.get("model"),
+            language=language,
+            task=task,
+            pcm_sample_rate=kwargs.get("pcm_sample_rate"),
+        )
+        cached = await transcription_cache.get(key)
+        if cached is not None:
+            total_ms = round((time.time() - start_time) * 1000, 3)
+            return {**cached, "cached": True, "timing": {"total_ms": total_ms}}
+
+        result = await self.provider.transcribe(audio_data, language=language, task=task, **kwargs)
+        await transcription_cache.set(key, {k: v for k, v in result.items() if k != "timing"})
+        return result
+
     async def transcribe_streaming(
         self,
-        audio_chunks: bytes,
+        audio_chunks: Union[bytes, BinaryIO],
         partial: bool = True,
         language: Optional[str] = None,
+        **kwargs
     ) -> Dict[str, Any]:
-        """Transcribe streaming audio (falls back to regular transcription for Groq)."""
-        # Groq doesn't support true streaming STT yet via this endpoint, 
-        # but we can simulate it by sending chunks.
-        return await self.transcribe(audio_chunks, language=language)
+        """Transcribe streaming audio (falls back to regular transcription)."""
+        # Neither provider decodes incrementally yet; transcribe the audio received so far
+        return await self.transcribe(audio_chunks, language=language, **kwargs)
 
     def get_model_info(self) -> Dict[str, Any]:
         """Get engine information."""
-        from app.config import settings
-        return {
-            "loaded": self.is_loaded,
-            "provider": "groq",
-            "model": settings.GROQ_MODEL,
-        }
+        if self.provider is None:
+            return {"loaded": False, "provider": None, "cache": transcription_cache.get_stats()}
+        return {**self.provider.get_info(), "cache": transcription_cache.get_stats()}
 
 
 # Global engine instance
@@ -1,25 +1,46 @@
 """Transcription endpoints."""
-from typing import Optional
+from typing import List, Optional
+import json
 import time
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import structlog
 
 from app.models.whisper_model import whisper_engine
 from app.config import settings
+from app.services.audio_spool import AudioTooLarge, readable, spool_stream, upload_size
+from app.services.batch import BatchItem, batch_transcriber
+from app.services.long_form import long_form_transcriber
+from app.services.upstream_scheduler import UpstreamBusy
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+# Maximum accepted audio size (bytes)
+MAX_AUDIO_BYTES = settings.MAX_AUDIO_SIZE_MB * 1024 * 1024
+TOO_LARGE_DETAIL = f"Audio file too large (max {settings.MAX_AUDIO_SIZE_MB}MB)"
+
+
+class TranscriptionSegment(BaseModel):
+    """A transcribed span of a long recording."""
+    index: int
+    start: float
+    end: Optional[float] = None
+    text: str
+
 
 class TranscriptionResponse(BaseModel):
     """Transcription response."""
     text: str
     is_partial: bool = False
     confidence: Optional[float] = None
+    no_speech_prob: Optional[float] = None
     language: Optional[str] = None
+    language_probability: Optional[float] = None
     latency_ms: float
+    segments: Optional[List[TranscriptionSegment]] = None
 
 
 @router.post("/", response_model=TranscriptionResponse)
@@ -29,8 +50,13 @@ async def transcribe_audio(
     chunk_id: Optional[int] = Form(None),
     language: Optional[str] = Form(None),
     is_partial: bool = Form(True),
+    pcm_sample_rate: Optional[int] = Form(None, gt=0),
 ):
-    """Transcribe audio file to text."""
+    """Transcribe audio file to text.
+
+    Set ``pcm_sample_rate`` to upload headerless 16-bit mono PCM; other
+    audio is identified from its container.
+    """
     
     start_time = time.time()
     
@@ -40,21 +66,23 @@ async def transcribe_audio(
         raise HTTPException(status_code=400, detail="Invalid file type. Expected audio.")
     
     try:
-        # Read audio data
-        audio_data = await audio.read()
+        # The upload is already spooled by the form parser; check its size
+        # and hand the file on without reading it into memory
+        audio_size = upload_size(audio)
         
-        if len(audio_data) == 0:
+        if audio_size == 0:
             raise HTTPException(status_code=400, detail="Empty audio file")
         
-        # Check file size (max 50MB)
-        if len(audio_data) > 50 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="Audio file too large (max 50MB)")
+        # Check file size
+        if audio_size > MAX_AUDIO_BYTES:
+            raise HTTPException(status_code=400, detail=TOO_LARGE_DETAIL)
         
         # Transcribe
         result = await whisper_engine.transcribe_streaming(
-            audio_data,
+            readable(audio.file),
             partial=is_partial,
             language=language or (None if settings.AUTO_DETECT_LANGUAGE else settings.LANGUAGE),
+            pcm_sample_rate=pcm_sample_rate,
         )
         
         latency_ms = (time.time() - start_time) * 1000
@@ -71,49 +99,184 @@ async def transcribe_audio(
             text=result["text"],
             is_partial=is_partial,
             confidence=result.get("confidence"),
+            no_speech_prob=result.get("no_speech_prob"),
             language=result.get("language"),
+            language_probability=result.get("language_probability"),
             latency_ms=round(latency_ms, 2),
         )
         
     except HTTPException:
         raise
+    except UpstreamBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error("Transcription failed", error=str(e), session_id=session_id)
         raise HTTPException(status_code=500, detail="Transcription failed. Please try again.")
 
 
-@router.post("/file", response_model=TranscriptionResponse)
-async def transcribe_file(
-    audio: UploadFile = File(...),
-    language: Optional[str] = Form(None),
+@router.post("/stream", response_model=TranscriptionResponse)
+async def transcribe_stream(
+    request: Request,
+    session_id: str = Query(...),
+    language: Optional[str] = Query(None),
 ):
-    """Transcribe complete audio file (non-streaming)."""
+    """Transcribe audio uploaded as a chunked request body.
+
+    The gateway opens this request when the user starts speaking and
+    forwards audio frames as they arrive, so the body is complete as soon
+    as speech ends and no separate upload phase remains.
+    """
     
+    try:
+        spool = await spool_stream(request.stream(), MAX_AUDIO_BYTES)
+    except AudioTooLarge:
+        raise HTTPException(status_code=413, detail=TOO_LARGE_DETAIL)
+    
+    if spool.size == 0:
+        spool.close()
+        raise HTTPException(status_code=400, detail="Empty audio file")
+    
+    # Latency is measured from the end of the upload, not the start of speech
     start_time = time.time()
     
     try:
-        audio_data = await audio.read()
-        
-        result = await whisper_engine.transcribe(
-            audio_data,
-            language=language,
+        result = await whisper_engine.transcribe_streaming(
+            spool.rewind(),
+            partial=False,
+            language=language or (None if settings.AUTO_DETECT_LANGUAGE else settings.LANGUAGE),
         )
         
         latency_ms = (time.time() - start_time) * 1000
         
+        logger.info(
+            "Streamed transcription completed",
+            session_id=session_id,
+            audio_bytes=spool.size,
+            latency_ms=round(latency_ms, 2),
+            text_length=len(result["text"]),
+        )
+        
         return TranscriptionResponse(
             text=result["text"],
             is_partial=False,
             confidence=result.get("confidence"),
+            no_speech_prob=result.get("no_speech_prob"),
             language=result.get("language"),
+            language_probability=result.get("language_probability"),
             latency_ms=round(latency_ms, 2),
         )
         
+    except UpstreamBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error("Streamed transcription failed", error=str(e), session_id=session_id)
+        raise HTTPException(status_code=500, detail="Transcription failed. Please try again.")
+    finally:
+        spool.close()
+
+
+@router.post("/file", response_model=TranscriptionResponse)
+async def transcribe_file(
+    audio: UploadFile = File(...),
+    language: Optional[str] = Form(None),
+    stream: bool = Form(False),
+):
+    """Transcribe a complete audio file.
+
+    Long recordings are split at pauses and the pieces transcribed in
+    parallel. With ``stream`` set, each segment is returned as an NDJSON
+    line as soon as it completes, followed by a line with the full text.
+    """
+    
+    audio_size = upload_size(audio)
+    if audio_size == 0:
+        raise HTTPException(status_code=400, detail="Empty audio file")
+    if audio_size > MAX_AUDIO_BYTES:
+        raise HTTPException(status_code=413, detail=TOO_LARGE_DETAIL)
+    
+    language = language or (None if settings.AUTO_DETECT_LANGUAGE else settings.LANGUAGE)
+    results = long_form_transcriber.transcribe(readable(audio.file), language=language)
+    
+    if stream:
+        async def lines():
+            try:
+                async for result in results:
+                    yield json.dumps(result) + "\n"
+            except UpstreamBusy as e:
+                logger.warning("File transcription rejected", error=str(e))
+                yield json.dumps({"done": True, "error": "Transcription service busy"}) + "\n"
+            except Exception as e:
+                logger.error("File transcription failed", error=str(e))
+                yield json.dumps({"done": True, "error": "Transcription failed"}) + "\n"
+        
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    try:
+        segments = []
+        async for result in results:
+            if result.get("done"):
+                final = result
+            else:
+                segments.append(TranscriptionSegment(**result))
+        
+        return TranscriptionResponse(
+            text=final["text"],
+            is_partial=False,
+            confidence=final.get("confidence"),
+            language=final.get("language"),
+            latency_ms=final["latency_ms"],
+            segments=sorted(segments, key=lambda s: s.index),
+        )
+        
+    except UpstreamBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error("File transcription failed", error=str(e))
         raise HTTPException(status_code=500, detail="Transcription failed. Please try again.")
 
 
+@router.post("/batch")
+async def transcribe_batch(
+    files: List[UploadFile] = File(default=[]),
+    urls: List[str] = Form(default=[]),
+    language: Optional[str] = Form(None),
+):
+    """Transcribe many files and/or audio URLs in one request.
+
+    Items are transcribed concurrently (bounded by BATCH_SIZE across all
+    batches) and results stream back as NDJSON, one line per item in
+    completion order, followed by a summary line.
+    """
+    items = [BatchItem(i, f) for i, f in enumerate(files)]
+    items += [BatchItem(len(items) + i, url) for i, url in enumerate(urls)]
+    
+    if not items:
+        raise HTTPException(status_code=400, detail="No audio files or URLs provided")
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many items (max {settings.BATCH_MAX_ITEMS})")
+    
+    language = language or (None if settings.AUTO_DETECT_LANGUAGE else settings.LANGUAGE)
+    
+    async def results():
+        start_time = time.time()
+        failed = 0
+        async for result in batch_transcriber.run(items, language=language):
+            failed += "error" in result
+            yield json.dumps(result) + "\n"
+        
+        total_ms = round((time.time() - start_time) * 1000, 2)
+        logger.info("Batch transcription completed", items=len(items), failed=failed, total_ms=total_ms)
+        yield json.dumps({"done": True, "items": len(items), "failed": failed, "total_ms": total_ms}) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.get("/batch/stats")
+async def batch_stats():
+    """Batch concurrency and item counters."""
+    return batch_transcriber.get_stats()
+
+
 @router.get("/languages")
 async def list_languages():
     """List supported languages."""
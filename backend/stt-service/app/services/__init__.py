@@ -0,0 +1 @@
+"""Services for STT service."""
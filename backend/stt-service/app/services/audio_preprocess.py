@@ -0,0 +1,389 @@
+"""Audio normalization before upload to the STT provider.
+
+Uncompressed input (WAV, or raw PCM when the caller declares its sample
+rate) is downmixed to mono, resampled to SAMPLE_RATE and re-encoded as
+FLAC when soundfile is installed, otherwise as 16-bit WAV. Browser
+recordings arrive as 48kHz stereo or float PCM, so this typically shrinks
+uploads several-fold. Samples are processed in blocks, so memory use does
+not grow with the recording. Already-compressed containers (webm, ogg,
+mp3, flac), unrecognized data and WAVs over AUDIO_PREPROCESS_MAX_MB are
+passed through unchanged.
+"""
+import io
+import struct
+import tempfile
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import structlog
+
+from app.config import settings
+from app.services.audio_spool import MB, readable
+
+logger = structlog.get_logger()
+
+CONTENT_TYPES = {
+    "wav": "audio/wav",
+    "flac": "audio/flac",
+    "ogg": "audio/ogg",
+    "webm": "audio/webm",
+    "mp3": "audio/mpeg",
+    "mp4": "audio/mp4",
+}
+
+# Frames decoded, resampled and encoded at a time
+BLOCK_FRAMES = 64 * 1024
+
+# WAVE format tags
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+@dataclass
+class PreparedAudio:
+    """Audio ready for upload, with its container format."""
+    data: Union[bytes, BinaryIO]
+    format: str
+    original_bytes: int
+    bytes: int
+    duration: Optional[float] = None  # seconds; unknown for compressed input
+
+    @property
+    def filename(self) -> str:
+        return f"audio.{self.format}"
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES.get(self.format, "application/octet-stream")
+
+
+def sniff_format(header: bytes) -> str:
+    """Identify the container from its first bytes."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[4:8] == b"ftyp":
+        return "mp4"
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return "unknown"
+
+
+@dataclass
+class WavLayout:
+    """Sample format and location of the samples in a WAV (or raw PCM) file."""
+    channels: int
+    rate: int
+    bits: int
+    float_samples: bool
+    data_offset: int
+    data_bytes: int
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.bits // 8 * self.channels
+
+    @property
+    def frames(self) -> int:
+        return self.data_bytes // self.frame_bytes
+
+
+def read_wav_layout(file: BinaryIO) -> WavLayout:
+    """Find the fmt and data chunks of a WAV file without reading the samples."""
+    end = _file_size(file)
+    fmt = None
+    data = None
+    offset = 12
+    while offset + 8 <= end and (fmt is None or data is None):
+        file.seek(offset)
+        chunk_id, size = struct.unpack("<4sI", file.read(8))
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            raw = file.read(min(size, 40))
+            fmt = struct.unpack_from("<HHIIHH", raw)
+            if fmt[0] == WAVE_FORMAT_EXTENSIBLE and size >= 40:
+                # The real format tag is the first two bytes of the sub-format GUID
+                fmt = (struct.unpack_from("<H", raw, 24)[0],) + fmt[1:]
+        elif chunk_id == b"data":
+            # Streamed WAVs may declare more data than was written
+            data = (body, min(size, end - body))
+        offset = body + size + (size & 1)
+
+    if fmt is None or data is None:
+        raise ValueError("WAV file has no fmt or data chunk")
+
+    tag, channels, rate, _, _, bits = fmt
+    return WavLayout(channels, rate, bits, tag == WAVE_FORMAT_IEEE_FLOAT, *data)
+
+
+def parse_wav(data: bytes) -> Tuple[np.ndarray, int, int]:
+    """Decode a WAV file to float32 samples shaped (frames, channels).
+
+    Returns the samples, the sample rate and the source sample width in bits.
+    """
+    layout = read_wav_layout(io.BytesIO(data))
+    raw = data[layout.data_offset:layout.data_offset + layout.data_bytes]
+    return decode_pcm(raw, layout.bits, layout.channels, layout.float_samples), layout.rate, layout.bits
+
+
+def decode_pcm(raw: bytes, bits: int, channels: int, float_samples: bool = False) -> np.ndarray:
+    """Convert interleaved PCM bytes to float32 samples shaped (frames, channels)."""
+    width = bits // 8
+    raw = raw[:len(raw) - len(raw) % (width * channels)]
+    if float_samples and bits == 32:
+        audio = np.frombuffer(raw, dtype="<f4")
+    elif bits == 8:
+        audio = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif bits == 16:
+        audio = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif bits == 24:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        audio = ints.astype(np.float32) / 8388608
+    elif bits == 32:
+        audio = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported PCM sample width: {bits} bits")
+    return audio.reshape(-1, channels)
+
+
+def to_mono(audio: np.ndarray) -> np.ndarray:
+    """Downmix (frames, channels) to one channel."""
+    return audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+
+
+def resample(audio: np.ndarray, rate: int, target: int) -> np.ndarray:
+    """Resample mono audio.
+
+    Integer downsampling ratios (48k or 32k to 16k) average each block of
+    samples, which low-passes before decimating; other ratios fall back to
+    linear interpolation.
+    """
+    if rate == target or audio.size == 0:
+        return audio
+    if rate > target and rate % target == 0:
+        factor = rate // target
+        usable = audio.size - audio.size % factor
+        return audio[:usable].reshape(-1, factor).mean(axis=1)
+    duration = audio.size / rate
+    positions = np.arange(int(duration * target)) * (rate / target)
+    return np.interp(positions, np.arange(audio.size), audio).astype(np.float32)
+
+
+class Resampler:
+    """Resample mono audio block by block.
+
+    Uses the same filters as ``resample``; samples that straddle a block
+    boundary are carried over to the next block.
+    """
+
+    def __init__(self, rate: int, target: int):
+        self.rate = rate
+        self.target = target
+        self.factor = rate // target if rate > target and rate % target == 0 else 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._origin = 0  # source index of the first pending sample
+        self._emitted = 0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self.rate == self.target:
+            return block
+        audio = np.concatenate((self._pending, block))
+        if self.factor:
+            usable = audio.size - audio.size % self.factor
+            self._pending = audio[usable:]
+            return audio[:usable].reshape(-1, self.factor).mean(axis=1)
+        if audio.size == 0:
+            return audio
+        step = self.rate / self.target
+        last = self._origin + audio.size - 1
+        count = int(last / step) + 1 - self._emitted
+        positions = (self._emitted + np.arange(count)) * step - self._origin
+        out = np.interp(positions, np.arange(audio.size), audio).astype(np.float32)
+        self._emitted += count
+        self._pending = audio[-1:]
+        self._origin = last
+        return out
+
+
+def encode_wav(audio: np.ndarray, rate: int) -> bytes:
+    """Encode mono float samples as 16-bit PCM WAV."""
+    pcm = _pcm16(audio)
+    return _wav_header(rate, len(pcm)) + pcm
+
+
+class WavWriter:
+    """Write 16-bit mono WAV incrementally; the sizes are filled in on close."""
+
+    def __init__(self, file: BinaryIO, rate: int):
+        self.file = file
+        self.rate = rate
+        self.data_bytes = 0
+        file.write(_wav_header(rate, 0))
+
+    def write(self, audio: np.ndarray) -> None:
+        pcm = _pcm16(audio)
+        self.file.write(pcm)
+        self.data_bytes += len(pcm)
+
+    def close(self) -> None:
+        self.file.seek(0)
+        self.file.write(_wav_header(self.rate, self.data_bytes))
+        self.file.seek(0, 2)
+
+
+def open_encoder(file: BinaryIO, rate: int) -> Tuple[Any, str]:
+    """Incremental mono encoder writing to ``file``: FLAC if soundfile is installed, else WAV."""
+    if settings.AUDIO_UPLOAD_CODEC == "flac":
+        try:
+            import soundfile as sf
+
+            return sf.SoundFile(file, "w", rate, 1, format="FLAC", subtype="PCM_16"), "flac"
+        except ImportError:
+            pass
+    return WavWriter(file, rate), "wav"
+
+
+def prepare_audio(
+    audio: Union[bytes, BinaryIO],
+    pcm_sample_rate: Optional[int] = None,
+) -> PreparedAudio:
+    """Normalize audio for upload. CPU-bound; call it from a worker thread.
+
+    ``pcm_sample_rate`` declares the audio as headerless 16-bit mono PCM at
+    that rate; otherwise the container is sniffed. Samples are decoded,
+    resampled and encoded BLOCK_FRAMES at a time, and the result is spooled
+    like an upload.
+    """
+    in_memory = isinstance(audio, (bytes, bytearray))
+    container = _container(audio, pcm_sample_rate)
+    size = len(audio) if in_memory else _file_size(audio)
+    if not settings.AUDIO_PREPROCESS or container not in ("wav", "pcm"):
+        # Compressed or unrecognized input is forwarded as-is (still streamed
+        # if it is a file); the label only needs to be an accepted extension
+        label = container if settings.AUDIO_PREPROCESS and container != "unknown" else "webm"
+        return PreparedAudio(audio, label, size, size)
+    if container == "wav" and size > settings.AUDIO_PREPROCESS_MAX_MB * MB:
+        # Large WAVs are uploaded as they are rather than held on a worker thread
+        return PreparedAudio(audio, "wav", size, size)
+
+    source = io.BytesIO(audio) if in_memory else audio
+    layout = _layout(source, container, pcm_sample_rate)
+    target = settings.SAMPLE_RATE
+
+    if (
+        container == "wav"
+        and layout.rate == target
+        and layout.bits == 16
+        and layout.channels == 1
+        and settings.AUDIO_UPLOAD_CODEC != "flac"
+    ):
+        # Already 16-bit mono at the target rate
+        source.seek(0)
+        return PreparedAudio(audio, "wav", size, size, layout.frames / target)
+
+    out = tempfile.SpooledTemporaryFile(max_size=settings.SPOOL_MEMORY_MB * MB)
+    try:
+        encoder, fmt = open_encoder(out, target)
+        resampler = Resampler(layout.rate, target)
+        frames = 0
+        for block in iter_blocks(source, layout):
+            mono = resampler.process(block)
+            encoder.write(np.clip(mono, -1.0, 1.0))
+            frames += mono.size
+        encoder.close()
+    except BaseException:
+        out.close()
+        raise
+
+    encoded = out.seek(0, 2)
+    logger.debug(
+        "Audio normalized",
+        source=container,
+        source_rate=layout.rate,
+        channels=layout.channels,
+        original_bytes=size,
+        bytes=encoded,
+        format=fmt,
+    )
+    return PreparedAudio(readable(out), fmt, size, encoded, frames / target)
+
+
+def load_samples(
+    audio: Union[bytes, BinaryIO],
+    pcm_sample_rate: Optional[int] = None,
+) -> Optional[np.ndarray]:
+    """Decode WAV or declared raw PCM to mono float32 at SAMPLE_RATE.
+
+    Returns None for compressed or unrecognized audio, which needs a real
+    decoder. Only the resampled output is held in memory.
+    """
+    container = _container(audio, pcm_sample_rate)
+    if container not in ("wav", "pcm"):
+        return None
+    source = io.BytesIO(audio) if isinstance(audio, (bytes, bytearray)) else audio
+    layout = _layout(source, container, pcm_sample_rate)
+    resampler = Resampler(layout.rate, settings.SAMPLE_RATE)
+    blocks = [resampler.process(block) for block in iter_blocks(source, layout)]
+    return np.concatenate(blocks).astype(np.float32) if blocks else np.zeros(0, dtype=np.float32)
+
+
+def iter_blocks(file: BinaryIO, layout: WavLayout) -> Iterator[np.ndarray]:
+    """Yield the samples as mono float32 blocks of up to BLOCK_FRAMES."""
+    if layout.frame_bytes == 0:
+        raise ValueError(f"Unsupported PCM sample width: {layout.bits} bits")
+    file.seek(layout.data_offset)
+    remaining = layout.frames * layout.frame_bytes
+    while remaining > 0:
+        raw = file.read(min(BLOCK_FRAMES * layout.frame_bytes, remaining))
+        if not raw:
+            break
+        remaining -= len(raw)
+        yield to_mono(decode_pcm(raw, layout.bits, layout.channels, layout.float_samples))
+
+
+def _container(audio: Union[bytes, BinaryIO], pcm_sample_rate: Optional[int]) -> str:
+    return "pcm" if pcm_sample_rate else _sniff(audio)
+
+
+def _sniff(audio: Union[bytes, BinaryIO]) -> str:
+    if isinstance(audio, (bytes, bytearray)):
+        return sniff_format(bytes(audio[:16]))
+    audio.seek(0)
+    header = audio.read(16)
+    audio.seek(0)
+    return sniff_format(header)
+
+
+def _layout(file: BinaryIO, container: str, pcm_sample_rate: Optional[int]) -> WavLayout:
+    if container == "wav":
+        return read_wav_layout(file)
+    return WavLayout(1, pcm_sample_rate, 16, False, 0, _file_size(file))
+
+
+def _pcm16(audio: np.ndarray) -> bytes:
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def _wav_header(rate: int, data_bytes: int) -> bytes:
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, WAVE_FORMAT_PCM, 1, rate, rate * 2, 2, 16,
+        b"data", data_bytes,
+    )
+
+
+def _file_size(file: BinaryIO) -> int:
+    position = file.tell()
+    size = file.seek(0, 2)
+    file.seek(position)
+    return size
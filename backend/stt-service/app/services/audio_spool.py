@@ -0,0 +1,119 @@
+"""Bounded, spooled buffering of uploaded audio."""
+import io
+import tempfile
+from typing import AsyncIterator, BinaryIO, Optional
+
+from fastapi import UploadFile
+
+from app.config import settings
+
+MB = 1024 * 1024
+
+# Read size when pulling audio from an upload or request body
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class AudioTooLarge(Exception):
+    """Raised as soon as an upload crosses the size limit."""
+
+
+class SpooledAudio:
+    """Audio kept in memory up to SPOOL_MEMORY_MB, then in a temporary file."""
+
+    def __init__(self, memory_bytes: Optional[int] = None):
+        self.max_memory = settings.SPOOL_MEMORY_MB * MB if memory_bytes is None else memory_bytes
+        self.file: BinaryIO = io.BytesIO()
+        self.size = 0
+
+    @property
+    def on_disk(self) -> bool:
+        return not isinstance(self.file, io.BytesIO)
+
+    def write(self, chunk: bytes) -> None:
+        if not self.on_disk and self.size + len(chunk) > self.max_memory:
+            disk = tempfile.TemporaryFile()
+            disk.write(self.file.getbuffer())
+            self.file.close()
+            self.file = disk
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def rewind(self) -> BinaryIO:
+        """Seek to the start and return the file for reading."""
+        self.file.seek(0)
+        return self.file
+
+    def close(self) -> None:
+        self.file.close()
+
+
+async def spool_stream(
+    chunks: AsyncIterator[bytes],
+    max_bytes: int,
+    memory_bytes: Optional[int] = None,
+) -> SpooledAudio:
+    """Spool an async byte stream, raising AudioTooLarge past ``max_bytes``."""
+    spool = SpooledAudio(memory_bytes)
+    try:
+        async for chunk in chunks:
+            if spool.size + len(chunk) > max_bytes:
+                raise AudioTooLarge(f"Audio exceeds {max_bytes // MB}MB")
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+class _SpooledReader(io.RawIOBase):
+    """Read-only view of a SpooledTemporaryFile without ``fileno()``."""
+
+    def __init__(self, file: BinaryIO):
+        super().__init__()
+        self._source = file
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        return self._source.read(size)
+
+    def readall(self) -> bytes:
+        return self._source.read()
+
+    def readinto(self, buffer) -> int:
+        data = self._source.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._source.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._source.tell()
+
+
+def readable(file: BinaryIO) -> BinaryIO:
+    """Rewind a (possibly spooled) file for streaming into an HTTP request.
+
+    httpx sizes file uploads via ``fileno()``, which would force a
+    SpooledTemporaryFile still held in memory to roll over to disk, so such
+    files are wrapped in a view that only reads and seeks.
+    """
+    file.seek(0)
+    if isinstance(file, tempfile.SpooledTemporaryFile):
+        return _SpooledReader(file)
+    return file
+
+
+def upload_size(upload: UploadFile) -> int:
+    """Size of an already-parsed upload, without reading it into memory."""
+    if upload.size is not None:
+        return upload.size
+    upload.file.seek(0, 2)
+    size = upload.file.tell()
+    upload.file.seek(0)
+    return size
@@ -0,0 +1,179 @@
+"""Concurrent transcription of many audio items."""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, List, Optional, Union
+
+import httpx
+import structlog
+from fastapi import UploadFile
+
+from app.config import settings
+from app.models.whisper_model import whisper_engine
+from app.services.audio_spool import (
+    MB,
+    AudioTooLarge,
+    SpooledAudio,
+    readable,
+    spool_stream,
+    upload_size,
+)
+from app.services.upstream_scheduler import PRIORITY_BATCH
+
+logger = structlog.get_logger()
+
+
+class BatchItemError(Exception):
+    """A per-item failure whose message is safe to return to the client."""
+
+
+@dataclass
+class BatchItem:
+    """One uploaded file or audio URL in a batch."""
+    index: int
+    source: Union[UploadFile, str]
+
+    @property
+    def id(self) -> str:
+        if isinstance(self.source, str):
+            return self.source
+        return self.source.filename or f"item-{self.index}"
+
+
+class BatchTranscriber:
+    """Transcribe batch items concurrently, yielding results as each finishes.
+
+    All batch requests share one semaphore of BATCH_SIZE slots, so the
+    number of transcriptions in flight stays within the provider quota no
+    matter how many batches are running. Provider calls are made at batch
+    priority, behind interactive transcriptions.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = concurrency or settings.BATCH_SIZE
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def run(
+        self,
+        items: List[BatchItem],
+        language: Optional[str] = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield one result per item in completion order.
+
+        Closing the generator (e.g. the client went away) cancels the
+        items that have not finished.
+        """
+        tasks = [asyncio.create_task(self._transcribe_item(item, language)) for item in items]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _transcribe_item(self, item: BatchItem, language: Optional[str]) -> Dict[str, Any]:
+        async with self._slots:
+            self.in_flight += 1
+            start_time = time.time()
+            try:
+                result = await self._transcribe_source(item.source, language)
+                self.completed += 1
+                return {
+                    "index": item.index,
+                    "id": item.id,
+                    "text": result["text"],
+                    "language": result.get("language"),
+                    "confidence": result.get("confidence"),
+                    "latency_ms": round((time.time() - start_time) * 1000, 2),
+                }
+            except Exception as e:
+                self.failed += 1
+                logger.warning("Batch item failed", id=item.id, error=str(e))
+                # Provider errors stay in the logs
+                error = str(e) if isinstance(e, BatchItemError) else "Transcription failed"
+                return {"index": item.index, "id": item.id, "error": error}
+            finally:
+                self.in_flight -= 1
+
+    async def _transcribe_source(self, source: Union[UploadFile, str], language: Optional[str]) -> Dict[str, Any]:
+        if not isinstance(source, str):
+            size = upload_size(source)
+            if size == 0:
+                raise BatchItemError("Empty audio file")
+            if size > settings.MAX_AUDIO_SIZE_MB * MB:
+                raise BatchItemError(f"Audio exceeds {settings.MAX_AUDIO_SIZE_MB}MB")
+            return await whisper_engine.transcribe(readable(source.file), language=language, priority=PRIORITY_BATCH)
+
+        spool = await fetch_reference(source)
+        try:
+            return await whisper_engine.transcribe(spool.rewind(), language=language, priority=PRIORITY_BATCH)
+        finally:
+            spool.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batch statistics."""
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _origin(url: httpx.URL):
+    return url.scheme, url.host, url.port or _DEFAULT_PORTS.get(url.scheme)
+
+
+def url_allowed(url: str, prefixes: List[str]) -> bool:
+    """Whether ``url`` lies under one of the allowed URL prefixes.
+
+    Scheme, host and port must match a prefix exactly and the path must
+    start with the prefix's path on a segment boundary; plain string
+    prefixes would also admit hosts like ``cdn.example.com.attacker.net``.
+    """
+    try:
+        target = httpx.URL(url)
+    except httpx.InvalidURL:
+        return False
+    if target.scheme not in _DEFAULT_PORTS or not target.host or ".." in target.path.split("/"):
+        return False
+
+    for prefix in prefixes:
+        try:
+            allowed = httpx.URL(prefix)
+        except httpx.InvalidURL:
+            continue
+        if _origin(target) != _origin(allowed):
+            continue
+        base = allowed.path if allowed.path.endswith("/") else allowed.path + "/"
+        if target.path == allowed.path or target.path.startswith(base):
+            return True
+    return False
+
+
+async def fetch_reference(url: str) -> SpooledAudio:
+    """Download an allowed audio URL into a spool, enforcing the size limit."""
+    prefixes = [p.strip() for p in settings.BATCH_URL_PREFIXES.split(",") if p.strip()]
+    if not url_allowed(url, prefixes):
+        raise BatchItemError("Audio reference not allowed")
+
+    try:
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            async with client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    raise BatchItemError(f"Fetching audio failed with status {response.status_code}")
+                return await spool_stream(response.aiter_bytes(), settings.MAX_AUDIO_SIZE_MB * MB)
+    except AudioTooLarge as e:
+        raise BatchItemError(str(e))
+    except httpx.HTTPError as e:
+        raise BatchItemError(f"Fetching audio failed: {type(e).__name__}")
+
+
+# Global batch transcriber instance
+batch_transcriber = BatchTranscriber()
@@ -0,0 +1,68 @@
+"""Utterance confidence from Whisper segment scores."""
+import math
+from typing import Any, Dict, List, Optional
+
+# Whisper language names (as returned by verbose_json) to ISO codes
+WHISPER_LANGUAGES = {
+    "english": "en", "chinese": "zh", "german": "de", "spanish": "es", "russian": "ru",
+    "korean": "ko", "french": "fr", "japanese": "ja", "portuguese": "pt", "turkish": "tr",
+    "polish": "pl", "catalan": "ca", "dutch": "nl", "arabic": "ar", "swedish": "sv",
+    "italian": "it", "indonesian": "id", "hindi": "hi", "finnish": "fi", "vietnamese": "vi",
+    "hebrew": "he", "ukrainian": "uk", "greek": "el", "malay": "ms", "czech": "cs",
+    "romanian": "ro", "danish": "da", "hungarian": "hu", "tamil": "ta", "norwegian": "no",
+    "thai": "th", "urdu": "ur", "croatian": "hr", "bulgarian": "bg", "lithuanian": "lt",
+    "latin": "la", "maori": "mi", "malayalam": "ml", "welsh": "cy", "slovak": "sk",
+    "telugu": "te", "persian": "fa", "latvian": "lv", "bengali": "bn", "serbian": "sr",
+    "azerbaijani": "az", "slovenian": "sl", "kannada": "kn", "estonian": "et", "macedonian": "mk",
+    "breton": "br", "basque": "eu", "icelandic": "is", "armenian": "hy", "nepali": "ne",
+    "mongolian": "mn", "bosnian": "bs", "kazakh": "kk", "albanian": "sq", "swahili": "sw",
+    "galician": "gl", "marathi": "mr", "punjabi": "pa", "sinhala": "si", "khmer": "km",
+    "shona": "sn", "yoruba": "yo", "somali": "so", "afrikaans": "af", "occitan": "oc",
+    "georgian": "ka", "belarusian": "be", "tajik": "tg", "sindhi": "sd", "gujarati": "gu",
+    "amharic": "am", "yiddish": "yi", "lao": "lo", "uzbek": "uz", "faroese": "fo",
+    "haitian creole": "ht", "pashto": "ps", "turkmen": "tk", "nynorsk": "nn", "maltese": "mt",
+    "sanskrit": "sa", "luxembourgish": "lb", "myanmar": "my", "tibetan": "bo", "tagalog": "tl",
+    "malagasy": "mg", "assamese": "as", "tatar": "tt", "hawaiian": "haw", "lingala": "ln",
+    "hausa": "ha", "bashkir": "ba", "javanese": "jw", "sundanese": "su", "cantonese": "yue",
+}
+
+
+def language_code(name: Optional[str]) -> Optional[str]:
+    """Normalize a Whisper language name or code to its ISO code."""
+    if not name:
+        return None
+    name = name.strip().lower()
+    return WHISPER_LANGUAGES.get(name, name)
+
+
+def summarize_segments(segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Score an utterance from its segments' ``avg_logprob`` and ``no_speech_prob``.
+
+    ``confidence`` is the duration-weighted mean of exp(avg_logprob), the
+    model's average per-token probability. ``no_speech_prob`` is weighted
+    the same way. No segments means no speech was decoded.
+    """
+    if not segments:
+        return {"confidence": 0.0, "no_speech_prob": 1.0, "segments": []}
+
+    weights = [max(s.get("end", 0.0) - s.get("start", 0.0), 0.0) for s in segments]
+    if not sum(weights):
+        weights = [1.0] * len(segments)
+    total = sum(weights)
+
+    confidence = sum(w * math.exp(min(s.get("avg_logprob", 0.0), 0.0)) for w, s in zip(weights, segments)) / total
+    no_speech = sum(w * s.get("no_speech_prob", 0.0) for w, s in zip(weights, segments)) / total
+
+    return {
+        "confidence": round(confidence, 4),
+        "no_speech_prob": round(no_speech, 4),
+        "segments": [
+            {
+                "start": round(s.get("start", 0.0), 3),
+                "end": round(s.get("end", 0.0), 3),
+                "avg_logprob": round(s.get("avg_logprob", 0.0), 4),
+                "no_speech_prob": round(s.get("no_speech_prob", 0.0), 4),
+            }
+            for s in segments
+        ],
+    }
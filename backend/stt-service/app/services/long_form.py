@@ -0,0 +1,371 @@
+"""Silence-based chunking and parallel transcription of long recordings.
+
+Audio longer than LONG_FORM_MIN_DURATION_S is split into chunks of at
+most LONG_FORM_CHUNK_S, cutting in the longest pause found in the second
+half of each window. When no pause is found the cut is hard and the next
+chunk starts CHUNK_OVERLAP_MS earlier; words repeated across that overlap
+are removed when the texts are stitched back together.
+
+The recording is never decoded in full: frame levels for planning are
+computed block by block, and each chunk's samples are read only when that
+chunk is transcribed.
+"""
+import asyncio
+import io
+import re
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, AsyncGenerator, BinaryIO, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import structlog
+
+from app.config import settings
+from app.models.whisper_model import whisper_engine
+from app.services.audio_preprocess import (
+    BLOCK_FRAMES,
+    WavLayout,
+    encode_wav,
+    iter_blocks,
+    read_wav_layout,
+    resample,
+    sniff_format,
+    to_mono,
+)
+from app.services.upstream_scheduler import PRIORITY_BATCH
+
+logger = structlog.get_logger()
+
+# Energy analysis frame
+FRAME_MS = 20
+
+# Longest word run compared when removing overlap duplicates
+MAX_OVERLAP_WORDS = 10
+
+
+@dataclass
+class Chunk:
+    """A span of the recording, in samples."""
+    index: int
+    start: int
+    end: int
+    overlaps_previous: bool = False
+
+    def start_s(self, rate: int) -> float:
+        return round(self.start / rate, 3)
+
+    def end_s(self, rate: int) -> float:
+        return round(self.end / rate, 3)
+
+
+def frame_levels(samples: np.ndarray, rate: int) -> np.ndarray:
+    """RMS level in dBFS of each FRAME_MS frame."""
+    frame = rate * FRAME_MS // 1000
+    count = samples.size // frame
+    frames = samples[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+    return 20 * np.log10(rms + 1e-10)
+
+
+def silent_runs(levels: np.ndarray, threshold_db: float, min_frames: int) -> np.ndarray:
+    """(start, end) frame indices of pauses at least ``min_frames`` long."""
+    silent = np.concatenate(([0], (levels < threshold_db).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(silent))
+    runs = edges.reshape(-1, 2)
+    return runs[(runs[:, 1] - runs[:, 0]) >= min_frames]
+
+
+def plan_chunks(levels: np.ndarray, length: int, rate: int) -> List[Chunk]:
+    """Split a recording of ``length`` samples into chunks no longer than LONG_FORM_CHUNK_S.
+
+    ``levels`` are the recording's frame levels, as from ``frame_levels``.
+    """
+    frame = rate * FRAME_MS // 1000
+    max_len = settings.LONG_FORM_CHUNK_S * rate
+    overlap = settings.CHUNK_OVERLAP_MS * rate // 1000
+    runs = silent_runs(
+        levels,
+        settings.SILENCE_THRESHOLD_DB,
+        max(settings.MIN_SILENCE_MS // FRAME_MS, 1),
+    )
+
+    chunks: List[Chunk] = []
+    start = 0
+    overlapping = False
+    while length - start > max_len:
+        # Prefer the longest pause in the second half of the window
+        lo, hi = (start + max_len // 2) // frame, (start + max_len) // frame
+        clipped = np.clip(runs, lo, hi)
+        lengths = clipped[:, 1] - clipped[:, 0]
+        if lengths.size and lengths.max() > 0:
+            best = clipped[int(lengths.argmax())]
+            cut = int(best.sum() // 2) * frame
+            chunks.append(Chunk(len(chunks), start, cut, overlapping))
+            start, overlapping = cut, False
+        else:
+            cut = start + max_len
+            chunks.append(Chunk(len(chunks), start, cut, overlapping))
+            start, overlapping = cut - overlap, True
+    chunks.append(Chunk(len(chunks), start, length, overlapping))
+    return chunks
+
+
+def merge_overlap(previous: str, text: str) -> str:
+    """Drop the leading words of ``text`` that repeat the end of ``previous``."""
+    before, after = previous.split(), text.split()
+    for k in range(min(MAX_OVERLAP_WORDS, len(before), len(after)), 0, -1):
+        if [_norm(w) for w in before[-k:]] == [_norm(w) for w in after[:k]]:
+            return " ".join(after[k:])
+    return text
+
+
+def stitch(segments: List[Dict[str, Any]]) -> str:
+    """Join chunk texts in order, removing duplicates from overlapping cuts."""
+    parts: List[str] = []
+    for segment in sorted(segments, key=lambda s: s["index"]):
+        text = segment["text"]
+        if segment.get("overlaps_previous") and parts:
+            text = merge_overlap(parts[-1], text)
+        if text:
+            parts.append(text)
+    return " ".join(parts)
+
+
+class AudioReader:
+    """Mono float32 samples of a recording at its own rate, read on demand."""
+
+    rate: int
+    frames: int
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def blocks(self) -> Iterator[np.ndarray]:
+        """Yield the whole recording in blocks of up to BLOCK_FRAMES."""
+        raise NotImplementedError
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Samples from ``start`` to ``end``.
+
+        Chunks share one file handle, so reads are serialized.
+        """
+        with self._lock:
+            return self._read(start, end - start)
+
+    def close(self) -> None:
+        pass
+
+    def _read(self, start: int, count: int) -> np.ndarray:
+        raise NotImplementedError
+
+
+class WavReader(AudioReader):
+    """Reads WAV samples directly from the data chunk."""
+
+    def __init__(self, file: BinaryIO, layout: WavLayout):
+        super().__init__()
+        self.file = file
+        self.layout = layout
+        self.rate = layout.rate
+        self.frames = layout.frames
+
+    def blocks(self) -> Iterator[np.ndarray]:
+        return iter_blocks(self.file, self.layout)
+
+    def _read(self, start: int, count: int) -> np.ndarray:
+        span = replace(
+            self.layout,
+            data_offset=self.layout.data_offset + start * self.layout.frame_bytes,
+            data_bytes=count * self.layout.frame_bytes,
+        )
+        return np.concatenate([np.zeros(0, dtype=np.float32), *iter_blocks(self.file, span)])
+
+
+class SoundFileReader(AudioReader):
+    """Reads any container soundfile can decode."""
+
+    def __init__(self, sound_file):
+        super().__init__()
+        self.sound_file = sound_file
+        self.rate = sound_file.samplerate
+        self.frames = sound_file.frames
+
+    def blocks(self) -> Iterator[np.ndarray]:
+        self.sound_file.seek(0)
+        for block in self.sound_file.blocks(BLOCK_FRAMES, dtype="float32", always_2d=True):
+            yield to_mono(block)
+
+    def close(self) -> None:
+        # Waits for a read still running on a worker thread
+        with self._lock:
+            self.sound_file.close()
+
+    def _read(self, start: int, count: int) -> np.ndarray:
+        self.sound_file.seek(start)
+        return to_mono(self.sound_file.read(count, dtype="float32", always_2d=True))
+
+
+def open_audio(audio: Union[bytes, BinaryIO]) -> Optional[AudioReader]:
+    """Open a recording for chunking without decoding its samples.
+
+    WAV is read directly and other containers through soundfile when it is
+    installed. Returns None when the audio cannot be decoded here, in which
+    case it is transcribed in a single request.
+    """
+    source = io.BytesIO(audio) if isinstance(audio, (bytes, bytearray)) else audio
+    container = sniff_format(_peek(source))
+    if container == "unknown":
+        return None
+
+    try:
+        if container == "wav":
+            return WavReader(source, read_wav_layout(source))
+        import soundfile as sf
+
+        return SoundFileReader(sf.SoundFile(source))
+    except ImportError:
+        return None
+    except Exception as e:
+        logger.debug("Could not open audio for chunking", format=container, error=str(e))
+        return None
+
+
+def scan_levels(reader: AudioReader) -> np.ndarray:
+    """Frame levels of the whole recording, computed one block at a time."""
+    frame = reader.rate * FRAME_MS // 1000
+    levels = [np.zeros(0)]
+    carry = np.zeros(0, dtype=np.float32)
+    for block in reader.blocks():
+        audio = np.concatenate((carry, block))
+        usable = audio.size - audio.size % frame
+        levels.append(frame_levels(audio[:usable], reader.rate))
+        carry = audio[usable:]
+    return np.concatenate(levels)
+
+
+def chunk_wav(reader: AudioReader, chunk: Chunk) -> bytes:
+    """Decode one chunk and encode it as WAV at SAMPLE_RATE."""
+    samples = reader.read(chunk.start, chunk.end)
+    return encode_wav(resample(samples, reader.rate, settings.SAMPLE_RATE), settings.SAMPLE_RATE)
+
+
+class LongFormTranscriber:
+    """Transcribe long recordings as parallel chunks."""
+
+    def __init__(self, concurrency: Optional[int] = None, max_jobs: Optional[int] = None):
+        self.concurrency = concurrency or settings.LONG_FORM_CONCURRENCY
+        # Files beyond the limit wait for a running one to finish
+        self._jobs = asyncio.Semaphore(max_jobs or settings.LONG_FORM_MAX_JOBS)
+
+    async def transcribe(
+        self,
+        audio: Union[bytes, BinaryIO],
+        language: Optional[str] = None,
+        priority: int = PRIORITY_BATCH,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield each chunk's result as it completes, then a final result.
+
+        Chunk results carry ``index``, ``start`` and ``end`` (seconds) and
+        ``text``. The final result has ``done: True`` and the stitched text.
+        Short or undecodable audio yields a single chunk covering the file.
+        Whole-file transcription is offline work, so provider calls default
+        to batch priority. At most LONG_FORM_MAX_JOBS files are transcribed
+        at once.
+        """
+        start_time = time.time()
+        async with self._jobs:
+            reader = await asyncio.to_thread(open_audio, audio)
+            try:
+                async for result in self._transcribe(audio, reader, language, priority, start_time):
+                    yield result
+            finally:
+                if reader is not None:
+                    reader.close()
+
+    async def _transcribe(
+        self,
+        audio: Union[bytes, BinaryIO],
+        reader: Optional[AudioReader],
+        language: Optional[str],
+        priority: int,
+        start_time: float,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        if reader is None or reader.frames < settings.LONG_FORM_MIN_DURATION_S * reader.rate:
+            if not isinstance(audio, (bytes, bytearray)):
+                audio.seek(0)
+            result = await whisper_engine.transcribe(audio, language=language, priority=priority)
+            end = round(reader.frames / reader.rate, 3) if reader is not None else None
+            yield {"index": 0, "start": 0.0, "end": end, "text": result["text"]}
+            yield {**result, "done": True, "segments": 1, "latency_ms": _elapsed(start_time)}
+            return
+
+        rate = reader.rate
+        frame = rate * FRAME_MS // 1000
+        levels = await asyncio.to_thread(scan_levels, reader)
+        chunks = plan_chunks(levels, reader.frames, rate)
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def run(chunk: Chunk) -> Dict[str, Any]:
+            async with slots:
+                text, detected = "", None
+                # Chunks that are all silence are not decoded or sent to the provider
+                loudest = levels[chunk.start // frame:chunk.end // frame].max(initial=-200.0)
+                if loudest >= settings.SILENCE_THRESHOLD_DB:
+                    wav = await asyncio.to_thread(chunk_wav, reader, chunk)
+                    result = await whisper_engine.transcribe(wav, language=language, priority=priority)
+                    text, detected = result["text"], result.get("language")
+                return {
+                    "index": chunk.index,
+                    "start": chunk.start_s(rate),
+                    "end": chunk.end_s(rate),
+                    "text": text,
+                    "language": detected,
+                    "overlaps_previous": chunk.overlaps_previous,
+                }
+
+        tasks = [asyncio.create_task(run(chunk)) for chunk in chunks]
+        segments: List[Dict[str, Any]] = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                segment = await next_done
+                segments.append(segment)
+                yield {k: v for k, v in segment.items() if k not in ("language", "overlaps_previous")}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        languages = [s["language"] for s in sorted(segments, key=lambda s: s["index"]) if s["language"]]
+        latency_ms = _elapsed(start_time)
+        logger.info(
+            "Long-form transcription completed",
+            duration_s=round(reader.frames / rate, 1),
+            segments=len(chunks),
+            latency_ms=latency_ms,
+        )
+        yield {
+            "done": True,
+            "text": stitch(segments),
+            "language": languages[0] if languages else language,
+            "segments": len(chunks),
+            "latency_ms": latency_ms,
+        }
+
+
+def _norm(word: str) -> str:
+    return re.sub(r"\W", "", word.lower())
+
+
+def _peek(file: BinaryIO) -> bytes:
+    file.seek(0)
+    header = file.read(16)
+    file.seek(0)
+    return header
+
+
+def _elapsed(start_time: float) -> float:
+    return round((time.time() - start_time) * 1000, 2)
+
+
+# Global long-form transcriber instance
+long_form_transcriber = LongFormTranscriber()
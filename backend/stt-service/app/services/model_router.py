@@ -0,0 +1,88 @@
+"""Choice of Groq transcription model per utterance."""
+from typing import Any, Dict, Optional
+
+import structlog
+
+from app.config import settings
+from app.services.audio_preprocess import PreparedAudio
+from app.services.upstream_scheduler import upstream_scheduler
+
+logger = structlog.get_logger()
+
+
+def estimate_duration(prepared: PreparedAudio) -> float:
+    """Duration in seconds; compressed uploads are estimated from their size."""
+    if prepared.duration is not None:
+        return prepared.duration
+    return prepared.bytes * 8 / (settings.STT_ROUTE_ASSUMED_KBPS * 1000)
+
+
+class ModelRouter:
+    """Route short clips to a fast model and escalate doubtful results.
+
+    Utterances up to STT_ROUTE_FAST_MAX_S go to GROQ_FAST_MODEL, provided
+    the (hinted) language is one it handles; everything else goes to
+    GROQ_MODEL. A fast result below STT_ROUTE_ESCALATE_CONFIDENCE is
+    transcribed again with GROQ_MODEL, unless callers are already queued
+    for upstream quota, in which case the fast result is kept.
+    """
+
+    def __init__(self):
+        self.fast_model = settings.GROQ_FAST_MODEL
+        self.model = settings.GROQ_MODEL
+        self.fast_max_s = settings.STT_ROUTE_FAST_MAX_S
+        self.escalate_confidence = settings.STT_ROUTE_ESCALATE_CONFIDENCE
+        self.fast_languages = {
+            code.strip().lower() for code in settings.GROQ_FAST_MODEL_LANGUAGES.split(",") if code.strip()
+        }
+        self.routed: Dict[str, int] = {}
+        self.escalated = 0
+        self.escalations_skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.fast_model) and self.fast_max_s > 0 and self.fast_model != self.model
+
+    def choose(self, prepared: PreparedAudio, language: Optional[str] = None) -> str:
+        """Model for an utterance, by duration and language."""
+        model = self.model
+        if self.enabled and estimate_duration(prepared) <= self.fast_max_s:
+            # A language-restricted fast model is only safe when the language is known
+            if not self.fast_languages or (language or "").lower() in self.fast_languages:
+                model = self.fast_model
+        self.routed[model] = self.routed.get(model, 0) + 1
+        return model
+
+    def should_escalate(self, model: str, result: Dict[str, Any]) -> bool:
+        """Whether a result from ``model`` should be redone with the large model."""
+        if model == self.model or not self.escalate_confidence:
+            return False
+        confidence = result.get("confidence")
+        if not (result.get("text") and result.get("segments")):
+            # Nothing decoded, or no segment scores to judge by
+            return False
+        if confidence is None or confidence >= self.escalate_confidence:
+            return False
+        stats = upstream_scheduler.get_stats()
+        if stats["waiting"] or stats["blocked_for_s"]:
+            # A second request would only deepen the quota queue
+            self.escalations_skipped += 1
+            return False
+        self.escalated += 1
+        logger.info("Escalating transcription", from_model=model, to_model=self.model, confidence=confidence)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing statistics."""
+        return {
+            "enabled": self.enabled,
+            "fast_model": self.fast_model,
+            "fast_max_s": self.fast_max_s,
+            "routed": dict(self.routed),
+            "escalated": self.escalated,
+            "escalations_skipped": self.escalations_skipped,
+        }
+
+
+# Global model router instance
+model_router = ModelRouter()
@@ -0,0 +1,146 @@
+"""Transcription result cache keyed by audio fingerprint."""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Optional, Tuple, Union
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+REDIS_KEY = "stt:result:{key}"
+
+# Block size when hashing file uploads
+HASH_BLOCK_SIZE = 256 * 1024
+
+# In-memory clips below this are hashed inline rather than on a thread
+HASH_INLINE_BYTES = 1024 * 1024
+
+
+def fingerprint(audio: Union[bytes, BinaryIO]) -> str:
+    """SHA-256 of the audio content; files are hashed in blocks and rewound."""
+    digest = hashlib.sha256()
+    if isinstance(audio, (bytes, bytearray)):
+        digest.update(audio)
+        return digest.hexdigest()
+    audio.seek(0)
+    for block in iter(lambda: audio.read(HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    audio.seek(0)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """Two-tier cache of transcription results.
+
+    A bounded in-process LRU answers repeats on this replica; an optional
+    Redis tier (STT_CACHE_REDIS_URL) is shared by all replicas. Keys combine
+    the audio hash with everything else that changes the output: provider,
+    model, language and task.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[int] = None):
+        self.enabled = settings.STT_CACHE_ENABLED
+        self.max_entries = max_entries or settings.STT_CACHE_MAX_ENTRIES
+        self.ttl = ttl or settings.STT_CACHE_TTL
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._redis = None
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    async def connect(self) -> None:
+        """Connect the shared Redis tier, if configured."""
+        if not (self.enabled and settings.STT_CACHE_REDIS_URL):
+            return
+        try:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(settings.STT_CACHE_REDIS_URL, decode_responses=True)
+            await self._redis.ping()
+            logger.info("STT result cache using Redis tier")
+        except Exception as e:
+            logger.warning("STT result cache Redis tier unavailable", error=str(e))
+            self._redis = None
+
+    async def disconnect(self) -> None:
+        """Close the Redis tier."""
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def make_key(self, audio: Union[bytes, BinaryIO], **params: Any) -> str:
+        """Cache key for audio plus the parameters that affect the result."""
+        if isinstance(audio, (bytes, bytearray)) and len(audio) < HASH_INLINE_BYTES:
+            digest = fingerprint(audio)
+        else:
+            # Large files take milliseconds to hash; keep that off the event loop
+            digest = await asyncio.to_thread(fingerprint, audio)
+        suffix = ":".join(f"{name}={params[name]}" for name in sorted(params) if params[name] is not None)
+        return f"{digest}:{suffix}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a result in memory, then in Redis."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            del self._entries[key]
+
+        if self._redis is not None:
+            try:
+                data = await self._redis.get(REDIS_KEY.format(key=key))
+            except Exception as e:
+                logger.warning("STT cache Redis lookup failed", error=str(e))
+                data = None
+            if data:
+                result = json.loads(data)
+                self._remember(key, result)
+                self.redis_hits += 1
+                return result
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result in both tiers."""
+        self._remember(key, result)
+        self.stores += 1
+        if self._redis is not None:
+            try:
+                await self._redis.set(REDIS_KEY.format(key=key), json.dumps(result), ex=self.ttl)
+            except Exception as e:
+                logger.warning("STT cache Redis store failed", error=str(e))
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "redis": self._redis is not None,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global transcription cache instance
+transcription_cache = TranscriptionCache()
@@ -0,0 +1,98 @@
+"""Tests for bounded WebSocket audio buffering."""
+import pytest
+
+
+def _budget(limit):
+    from app.services.audio_buffer import AudioBudget
+
+    return AudioBudget(limit_bytes=limit)
+
+
+async def _read(buffer):
+    return b"".join([chunk async for chunk in buffer.iter_chunks()])
+
+
+@pytest.mark.asyncio
+async def test_frames_are_kept_and_counted_against_budget():
+    """Buffered frames should be replayed in order and released on clear."""
+    from app.services.audio_buffer import AudioBuffer
+
+    budget = _budget(100)
+    buffer = AudioBuffer(max_bytes=50, spill_threshold=0, budget=budget)
+
+    buffer.append(b"abc")
+    buffer.append(b"def")
+
+    assert await _read(buffer) == b"abcdef"
+    assert budget.buffered_bytes == 6
+    buffer.clear()
+    assert budget.buffered_bytes == 0
+    assert len(buffer) == 0
+
+
+def test_per_utterance_limit_is_enforced():
+    """An utterance larger than max_bytes should be refused."""
+    from app.services.audio_buffer import AudioBuffer, AudioLimitExceeded
+
+    buffer = AudioBuffer(max_bytes=4, spill_threshold=0, budget=_budget(100))
+    buffer.append(b"abcd")
+
+    with pytest.raises(AudioLimitExceeded):
+        buffer.append(b"e")
+
+
+def test_global_budget_is_shared_between_connections():
+    """Connections together must not exceed the process-wide budget."""
+    from app.services.audio_buffer import AudioBuffer, AudioLimitExceeded
+
+    budget = _budget(6)
+    first = AudioBuffer(max_bytes=50, spill_threshold=0, budget=budget)
+    second = AudioBuffer(max_bytes=50, spill_threshold=0, budget=budget)
+    first.append(b"abcd")
+
+    with pytest.raises(AudioLimitExceeded):
+        second.append(b"efg")
+    assert budget.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_spilled_audio_leaves_the_memory_budget():
+    """Past the spill threshold, audio should move to disk and free the budget."""
+    from app.services.audio_buffer import AudioBuffer
+
+    budget = _budget(100)
+    buffer = AudioBuffer(max_bytes=50, spill_threshold=4, budget=budget)
+    buffer.append(b"abc")
+    buffer.append(b"def")
+    buffer.append(b"ghi")
+
+    assert buffer.spilled
+    assert budget.buffered_bytes == 0
+    assert await _read(buffer) == b"abcdefghi"
+    buffer.clear()
+    assert not buffer.spilled
+
+
+@pytest.mark.asyncio
+async def test_streaming_upload_releases_budget_as_frames_are_sent():
+    """Frames queued for the STT upload should count until they are sent."""
+    import httpx
+    from app.services.audio_buffer import AudioLimitExceeded
+    from app.services.stt_upload import STTUpload
+
+    budget = _budget(100)
+
+    async def handler(request):
+        body = b"".join([chunk async for chunk in request.stream])
+        return httpx.Response(200, json={"size": len(body)})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        upload = STTUpload(client, "http://stt", "s1", max_bytes=8, budget=budget)
+        upload.feed(b"abcd")
+        assert budget.buffered_bytes == 4
+        with pytest.raises(AudioLimitExceeded):
+            upload.feed(b"efghi")
+        response = await upload.finish()
+
+    assert response.json()["size"] == 4
+    assert budget.buffered_bytes == 0
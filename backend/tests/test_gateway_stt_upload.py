@@ -0,0 +1,71 @@
+"""Tests for streaming utterance uploads from the gateway to STT."""
+import asyncio
+
+import httpx
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_frames_are_uploaded_as_one_chunked_body():
+    """Fed frames should arrive at /transcribe/stream as a single request body."""
+    from app.services.stt_upload import STTUpload
+
+    received = {}
+
+    async def handler(request: httpx.Request):
+        received["url"] = str(request.url)
+        received["body"] = b"".join([chunk async for chunk in request.stream])
+        return httpx.Response(200, json={"text": "hello", "latency_ms": 1.0})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        upload = STTUpload(client, "http://stt", "s1", language="en")
+        upload.feed(b"RIFF")
+        await asyncio.sleep(0)
+        upload.feed(b"....WAVE")
+        response = await upload.finish()
+
+    assert response.json()["text"] == "hello"
+    assert received["body"] == b"RIFF....WAVE"
+    assert received["url"] == "http://stt/transcribe/stream?session_id=s1&language=en"
+    assert upload.bytes_sent == 12
+
+
+@pytest.mark.asyncio
+async def test_abort_cancels_pending_upload():
+    """Aborting should cancel the request instead of waiting for more audio."""
+    from app.services.stt_upload import STTUpload
+
+    async def handler(request: httpx.Request):
+        async for _ in request.stream:
+            pass
+        return httpx.Response(200, json={"text": ""})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        upload = STTUpload(client, "http://stt", "s1")
+        upload.feed(b"abc")
+        upload.abort()
+        with pytest.raises(asyncio.CancelledError):
+            await upload._task
+
+
+@pytest.mark.asyncio
+async def test_failed_upload_returns_queued_bytes_to_budget():
+    """Frames a failed request never read must not stay reserved in the budget."""
+    from app.services.audio_buffer import AudioBudget
+    from app.services.stt_upload import STTUpload
+
+    async def handler(request: httpx.Request):
+        raise httpx.ConnectError("STT unavailable", request=request)
+
+    budget = AudioBudget(limit_bytes=1024)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        upload = STTUpload(client, "http://stt", "s1", budget=budget)
+        upload.feed(b"abc")
+        upload.feed(b"defg")
+        assert budget.buffered_bytes == 7
+        with pytest.raises(httpx.ConnectError):
+            await upload.finish()
+
+        upload.feed(b"late")
+
+    assert budget.buffered_bytes == 0
@@ -0,0 +1,82 @@
+"""Tests for the gateway's streaming TTS REST proxy."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+
+def _request():
+    from app.routers.tts import TTSRequest
+
+    return TTSRequest(session_id="s1", text="Hello there.", format="mp3")
+
+
+def _registry():
+    registry = MagicMock()
+    registry.get_healthy_service.return_value = MagicMock(url="http://tts")
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_audio_chunks_are_relayed_as_they_arrive():
+    """The proxy should stream upstream chunks unchanged and report first-byte time."""
+    from app.routers.tts import _open_tts_stream
+
+    closed = False
+
+    async def fake_stream(url, payload, coalesce=True, chunk_size=4096):
+        nonlocal closed
+        assert coalesce is False
+        try:
+            for chunk in (b"ID3", b"frame1", b"frame2"):
+                yield chunk
+        finally:
+            closed = True
+
+    with patch("app.routers.tts.service_registry", _registry()), \
+         patch("app.routers.tts.stream_tts_audio", fake_stream):
+        response = await _open_tts_stream(_request(), attachment=True)
+        body = [chunk async for chunk in response.body_iterator]
+
+    assert body == [b"ID3", b"frame1", b"frame2"]
+    assert response.media_type == "audio/mpeg"
+    assert "x-first-byte-ms" in response.headers
+    assert "attachment" in response.headers["content-disposition"]
+    assert closed
+
+
+@pytest.mark.asyncio
+async def test_upstream_error_maps_to_502_before_streaming():
+    """A non-200 TTS answer should surface as an HTTP error, not an empty 200."""
+    from app.routers.tts import _open_tts_stream
+    from app.services.request_coalescer import UpstreamStatusError
+
+    async def failing_stream(url, payload, coalesce=True, chunk_size=4096):
+        raise UpstreamStatusError(500, "boom")
+        yield b""  # pragma: no cover
+
+    with patch("app.routers.tts.service_registry", _registry()), \
+         patch("app.routers.tts.stream_tts_audio", failing_stream):
+        with pytest.raises(HTTPException) as exc:
+            await _open_tts_stream(_request(), attachment=False)
+
+    assert exc.value.status_code == 502
+
+
+@pytest.mark.asyncio
+async def test_unsupported_format_is_passed_through_as_415():
+    """A format the TTS service cannot produce is a client error, not a gateway failure."""
+    from app.routers.tts import TTSRequest, _open_tts_stream
+    from app.services.request_coalescer import UpstreamStatusError
+
+    async def refusing_stream(url, payload, coalesce=True, chunk_size=4096):
+        assert payload["format"] == "opus"
+        raise UpstreamStatusError(415, "Format 'opus' needs PyAV")
+        yield b""  # pragma: no cover
+
+    with patch("app.routers.tts.service_registry", _registry()), \
+         patch("app.routers.tts.stream_tts_audio", refusing_stream):
+        with pytest.raises(HTTPException) as exc:
+            await _open_tts_stream(TTSRequest(session_id="s1", text="Hi", format="opus"), attachment=False)
+
+    assert exc.value.status_code == 415
@@ -0,0 +1,38 @@
+"""Tests for per-session language pinning."""
+
+
+def test_language_is_pinned_after_confident_detections_and_released_on_poor_decode():
+    """Confident detections should pin a hint; a poor hinted decode should drop it."""
+    from app.services.language_pin import LanguagePinner, SessionLanguage
+
+    pinner = LanguagePinner(pin_confidence=0.8, redetect_confidence=0.5, pin_after=2)
+    spoken = SessionLanguage()
+
+    assert pinner.hint(spoken) is None
+    assert not pinner.observe(spoken, {"language": "de", "language_probability": 0.95, "confidence": 0.9})
+    assert pinner.observe(spoken, {"language": "de", "language_probability": 0.97, "confidence": 0.9})
+    assert pinner.hint(spoken) == "de"
+
+    # Hinted results carry no language probability; only decode confidence counts
+    assert not pinner.observe(spoken, {"language": "de", "confidence": 0.7})
+    assert pinner.observe(spoken, {"language": "de", "confidence": 0.2})
+    assert pinner.hint(spoken) is None
+
+    stats = pinner.get_stats()
+    assert stats["pinned"] == 1
+    assert stats["released"] == 1
+    assert stats["hinted"] == 1
+
+
+def test_uncertain_or_alternating_detections_do_not_pin():
+    """A pin needs consecutive confident detections of the same language."""
+    from app.services.language_pin import LanguagePinner, SessionLanguage
+
+    pinner = LanguagePinner(pin_confidence=0.8, redetect_confidence=0.5, pin_after=2)
+    spoken = SessionLanguage()
+
+    assert not pinner.observe(spoken, {"language": "en", "language_probability": 0.9})
+    assert not pinner.observe(spoken, {"language": "es", "language_probability": 0.9})
+    assert not pinner.observe(spoken, {"language": "es", "language_probability": 0.6})
+    assert not pinner.observe(spoken, {"language": "es", "confidence": 0.9})
+    assert spoken.language is None
@@ -0,0 +1,113 @@
+"""Tests for the LLM service's per-session context cache (delta protocol)."""
+import pytest
+
+
+def _msg(role, content):
+    return {"role": role, "content": content}
+
+
+def _make_cache():
+    from app.services.context_cache import ContextCache
+
+    return ContextCache()
+
+
+def test_resync_pins_leading_system_messages():
+    """System messages at the start of a resync should survive trimming."""
+    cache = _make_cache()
+    cache._max_messages = 2
+
+    window = cache.resync("s1", 4, [
+        _msg("system", "Summary: user is Sam"),
+        _msg("user", "a"),
+        _msg("assistant", "b"),
+        _msg("user", "c"),
+    ])
+
+    assert window[0] == _msg("system", "Summary: user is Sam")
+    assert [m["content"] for m in window[1:]] == ["b", "c"]
+
+
+def test_apply_delta_appends_messages():
+    """A delta at the cached version should extend the window."""
+    cache = _make_cache()
+    cache.resync("s1", 1, [_msg("user", "hi")])
+    cache.append("s1", _msg("assistant", "hello"))
+
+    window = cache.apply_delta("s1", 3, [_msg("user", "how are you?")])
+
+    assert [m["content"] for m in window] == ["hi", "hello", "how are you?"]
+    assert cache.get("s1").version == 3
+
+
+def test_apply_delta_version_gap_raises():
+    """A delta that skips messages should require a resync."""
+    from app.services.context_cache import ContextVersionMismatch
+
+    cache = _make_cache()
+    cache.resync("s1", 1, [_msg("user", "hi")])
+
+    with pytest.raises(ContextVersionMismatch) as exc_info:
+        cache.apply_delta("s1", 4, [_msg("user", "again")])
+
+    assert exc_info.value.expected == 1
+
+
+def test_apply_delta_unknown_session_raises():
+    """A delta for a session with no cached context should require a resync."""
+    from app.services.context_cache import ContextVersionMismatch
+
+    cache = _make_cache()
+
+    with pytest.raises(ContextVersionMismatch) as exc_info:
+        cache.apply_delta("missing", 1, [_msg("user", "hi")])
+
+    assert exc_info.value.expected is None
+
+
+def test_append_unknown_session_returns_none():
+    """append should not create contexts for unknown sessions."""
+    cache = _make_cache()
+
+    assert cache.append("missing", _msg("assistant", "hi")) is None
+
+
+def test_lru_bound_on_sessions():
+    """The cache should hold at most the configured number of sessions."""
+    cache = _make_cache()
+    cache._max_sessions = 2
+
+    for i in range(3):
+        cache.resync(f"s{i}", 1, [_msg("user", "hi")])
+
+    assert cache.get("s0") is None
+    assert cache.get_stats()["sessions"] == 2
+
+
+def test_generate_request_delta_requires_version():
+    """delta=True without context_version should fail validation."""
+    from pydantic import ValidationError
+    from app.routers.generate import GenerateRequest
+
+    with pytest.raises(ValidationError, match="delta requests require context_version"):
+        GenerateRequest(
+            session_id="test-session",
+            messages=[_msg("user", "hi")],
+            delta=True,
+        )
+
+
+def test_apply_delta_trims_to_window_start():
+    """With a window start the cache drops exactly the turns the gateway dropped."""
+    from app.services.context_cache import ContextVersionMismatch
+
+    cache = _make_cache()
+    cache._max_messages = 2
+    cache.resync("s1", 3, [_msg("system", "Summary"), _msg("user", "a"), _msg("assistant", "b"), _msg("user", "c")], 0)
+
+    window = cache.apply_delta("s1", 5, [_msg("assistant", "d"), _msg("user", "e")], 1)
+
+    assert [m["content"] for m in window] == ["Summary", "b", "c", "d", "e"]
+
+    with pytest.raises(ContextVersionMismatch):
+        cache.apply_delta("s1", 6, [_msg("user", "f")], 0)
@@ -0,0 +1,151 @@
+"""Tests for the LLM response cache.
+
+Uses a deterministic bag-of-words embedding so the semantic tier can be
+exercised without loading a sentence-transformers model.
+"""
+import pytest
+
+
+VOCAB = ["what", "can", "you", "do", "hello", "weather", "help", "me", "with"]
+
+
+def _fake_embed(text):
+    words = text.split()
+    return [float(words.count(w)) for w in VOCAB]
+
+
+def _make_cache(enabled=True, embed_fn=_fake_embed):
+    from app.services.response_cache import ResponseCache
+
+    cache = ResponseCache(embed_fn=embed_fn)
+    cache.enabled = enabled
+    return cache
+
+
+def _user(content):
+    return [{"role": "user", "content": content}]
+
+
+def test_normalize_prompt():
+    """Normalization should drop case, punctuation and extra whitespace."""
+    from app.services.response_cache import normalize_prompt
+
+    assert normalize_prompt("  What CAN you   do?! ") == "what can you do"
+
+
+def test_is_cacheable_requires_enabled():
+    """A disabled cache should never consider a turn cacheable."""
+    cache = _make_cache(enabled=False)
+
+    assert cache.is_cacheable(_user("What can you do?")) is False
+
+
+def test_is_cacheable_skips_context_dependent_turns():
+    """Turns with earlier conversation or back-references should be skipped."""
+    cache = _make_cache()
+
+    history = [
+        {"role": "user", "content": "Tell me about Paris"},
+        {"role": "assistant", "content": "Paris is the capital of France."},
+        {"role": "user", "content": "What can you do?"},
+    ]
+    assert cache.is_cacheable(history) is False
+    assert cache.is_cacheable(_user("Can you repeat that?")) is False
+    assert cache.is_cacheable(_user("What can you do?")) is True
+    assert cache.stats.skipped == 2
+
+
+def test_is_cacheable_skips_summaries_and_recalled_memory():
+    """Answers shaped by a session summary or long-term memory are personal."""
+    cache = _make_cache()
+
+    summary = [{"role": "system", "content": "Summary: the user lives in Oslo"}]
+    assert cache.is_cacheable(summary + _user("What is the weather like?")) is False
+    assert cache.is_cacheable(_user("What is the weather like?"), recalled=["I live in Oslo"]) is False
+    assert cache.is_cacheable(_user("What is the weather like?"), recalled=[]) is True
+
+
+@pytest.mark.asyncio
+async def test_exact_hit_after_store():
+    """Stored answers should be returned for the same normalized prompt."""
+    cache = _make_cache(embed_fn=None)
+    cache._semantic_enabled = False
+
+    await cache.store("What can you do?", ["I can ", "help."])
+    entry = await cache.lookup("what can you do")
+
+    assert entry is not None
+    assert entry.text == "I can help."
+    assert cache.stats.exact_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_miss_on_unknown_prompt():
+    """Lookups for unknown prompts should count as misses."""
+    cache = _make_cache()
+
+    assert await cache.lookup("hello") is None
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_entry_expires_after_ttl():
+    """Entries stored with a zero TTL should never be served."""
+    cache = _make_cache()
+
+    await cache.store("hello", ["Hi!"], ttl=0)
+
+    assert await cache.lookup("hello") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_semantic_hit_for_similar_prompt():
+    """Near-identical prompts should hit via the embedding tier."""
+    cache = _make_cache()
+    cache._threshold = 0.9
+
+    await cache.store("what can you do", ["Lots of things."])
+    entry = await cache.lookup("what can you do do")
+
+    assert entry is not None
+    assert entry.text == "Lots of things."
+    assert cache.stats.semantic_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_semantic_miss_below_threshold():
+    """Dissimilar prompts should not match through the embedding tier."""
+    cache = _make_cache()
+
+    await cache.store("what can you do", ["Lots of things."])
+
+    assert await cache.lookup("weather") is None
+
+
+@pytest.mark.asyncio
+async def test_lru_bound_evicts_oldest():
+    """The exact tier should stay within its max entry count."""
+    cache = _make_cache()
+    cache._max_entries = 2
+
+    await cache.store("hello", ["a"])
+    await cache.store("help me", ["b"])
+    await cache.store("weather", ["c"])
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["semantic_entries"] == 2
+    assert "hello" not in cache._entries
+
+
+@pytest.mark.asyncio
+async def test_replay_yields_original_chunks():
+    """Replay should stream the answer at its original token granularity."""
+    cache = _make_cache()
+
+    await cache.store("hello", ["Hi", " there", "!"])
+    entry = await cache.lookup("hello")
+
+    replayed = [chunk async for chunk in cache.replay(entry)]
+    assert replayed == ["Hi", " there", "!"]
@@ -0,0 +1,169 @@
+"""Tests for the quota-aware upstream scheduler."""
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+
+def test_parse_duration_formats():
+    """Groq reset headers and retry-after values should parse to seconds."""
+    from app.services.upstream_scheduler import parse_duration
+
+    assert parse_duration("2") == 2.0
+    assert parse_duration("7.66s") == pytest.approx(7.66)
+    assert parse_duration("2m59.56s") == pytest.approx(179.56)
+    assert parse_duration("120ms") == pytest.approx(0.12)
+    assert parse_duration("") is None
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_are_admitted_before_batch():
+    """When the bucket is empty, waiting interactive calls go first."""
+    from app.services.upstream_scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, UpstreamScheduler
+
+    scheduler = UpstreamScheduler(requests_per_minute=600, tokens_per_minute=0)
+    scheduler.requests.level = 0
+    order = []
+
+    async def call(name, priority):
+        await scheduler.acquire(priority)
+        order.append(name)
+
+    batch = asyncio.create_task(call("batch", PRIORITY_BATCH))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(call("interactive", PRIORITY_INTERACTIVE))
+    await asyncio.gather(batch, interactive)
+
+    assert order == ["interactive", "batch"]
+
+
+def test_rate_limit_headers_clamp_bucket_and_block():
+    """Remaining/reset headers should tighten the client-side view of the quota."""
+    from app.services.upstream_scheduler import UpstreamScheduler
+
+    scheduler = UpstreamScheduler(requests_per_minute=30, tokens_per_minute=6000)
+    scheduler.update_from_headers({
+        "x-ratelimit-remaining-tokens": "1200",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "2.5s",
+    })
+
+    stats = scheduler.get_stats()
+    assert stats["tokens_available"] <= 1201
+    assert 2.0 < stats["blocked_for_s"] <= 2.5
+
+
+@pytest.mark.asyncio
+async def test_429_is_retried_after_retry_after():
+    """A 429 should wait for retry-after and then succeed instead of failing."""
+    from app.services.upstream_scheduler import UpstreamScheduler
+
+    scheduler = UpstreamScheduler(requests_per_minute=0, tokens_per_minute=0)
+    responses = [
+        httpx.Response(429, headers={"retry-after": "0.05"}),
+        httpx.Response(200, json={"ok": True}),
+    ]
+
+    async def call():
+        return responses.pop(0)
+
+    with patch("app.services.upstream_scheduler.settings.UPSTREAM_BACKOFF_BASE_S", 0.01):
+        result = await scheduler.run(call, deadline_s=5)
+
+    assert result.status_code == 200
+    assert scheduler.get_stats()["retries"] == 1
+    assert scheduler.get_stats()["rate_limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_at_deadline():
+    """Past the deadline the last failure should be handed back to the caller."""
+    from app.services.upstream_scheduler import UpstreamScheduler
+
+    scheduler = UpstreamScheduler(requests_per_minute=0, tokens_per_minute=0)
+
+    async def call():
+        return httpx.Response(503)
+
+    result = await scheduler.run(call, deadline_s=0.01)
+
+    assert result.status_code == 503
+    assert scheduler.get_stats()["gave_up"] == 1
+
+
+@pytest.mark.asyncio
+async def test_admission_past_deadline_raises_busy():
+    """A call that cannot be admitted in time should fail fast with UpstreamBusy."""
+    from app.services.upstream_scheduler import UpstreamBusy, UpstreamScheduler
+
+    scheduler = UpstreamScheduler(requests_per_minute=1, tokens_per_minute=0)
+    scheduler.requests.level = 0
+
+    async def call():  # pragma: no cover - never admitted
+        return httpx.Response(200)
+
+    with pytest.raises(UpstreamBusy):
+        await scheduler.run(call, deadline_s=0.05)
+    assert scheduler.get_stats()["waiting"] == 0
+
+
+def _generate_client():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.routers import generate
+
+    app = FastAPI()
+    app.include_router(generate.router, prefix="/generate")
+    return TestClient(app)
+
+
+_STREAM_REQUEST = {
+    "session_id": "s1",
+    "messages": [{"role": "user", "content": "Book a table"}],
+    "stream": True,
+}
+
+
+def test_throttled_streaming_generation_returns_503():
+    """A stream whose first provider call cannot be admitted should fail with 503, not a cut stream."""
+    from unittest.mock import MagicMock
+    from app.models.llm_engine import llm_engine
+    from app.services.upstream_scheduler import PRIORITY_INTERACTIVE, UpstreamScheduler
+
+    scheduler = UpstreamScheduler(requests_per_minute=1, tokens_per_minute=0)
+    scheduler.requests.level = 0
+    model = MagicMock()
+
+    async def generate_stream(**kwargs):
+        # The tool-selection call, scheduled exactly as the engine does
+        await llm_engine._invoke(model, [], PRIORITY_INTERACTIVE)
+        yield "never"  # pragma: no cover
+
+    with patch("app.models.llm_engine.upstream_scheduler", scheduler), \
+            patch("app.services.upstream_scheduler.settings.UPSTREAM_RETRY_DEADLINE_S", 0.05), \
+            patch.object(llm_engine, "generate_stream", generate_stream):
+        response = _generate_client().post("/generate/", json=_STREAM_REQUEST)
+
+    assert response.status_code == 503
+    model.ainvoke.assert_not_called()
+    assert scheduler.get_stats()["waiting"] == 0
+
+
+def test_failure_mid_stream_ends_with_error_frame():
+    """Once streaming has started, a failure should still produce a final done frame."""
+    import json
+    from app.models.llm_engine import llm_engine
+
+    async def generate_stream(**kwargs):
+        yield "Sure"
+        raise RuntimeError("connection reset")
+
+    with patch.object(llm_engine, "generate_stream", generate_stream):
+        response = _generate_client().post("/generate/", json=_STREAM_REQUEST)
+
+    frames = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line]
+    assert response.status_code == 200
+    assert frames[0] == {"chunk": "Sure", "done": False}
+    assert frames[-1]["done"] is True
+    assert frames[-1]["error"] == "Generation failed"
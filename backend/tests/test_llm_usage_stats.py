@@ -0,0 +1,61 @@
+"""Tests for LLM token accounting and usage statistics."""
+
+
+def test_token_usage_sums_usage_metadata():
+    """TokenUsage should sum LangChain usage_metadata and ignore missing values."""
+    from app.services.usage_stats import TokenUsage
+
+    usage = TokenUsage()
+    usage.add({"input_tokens": 100, "output_tokens": 5, "total_tokens": 105})
+    usage.add(None)
+    usage.add({"input_tokens": 120, "output_tokens": 40, "total_tokens": 160})
+
+    assert usage.prompt_tokens == 220
+    assert usage.completion_tokens == 45
+    assert usage.total_tokens == 265
+
+
+def test_token_usage_throughput():
+    """tokens_per_second should be derived from completion tokens and generation time."""
+    from app.services.usage_stats import TokenUsage
+
+    usage = TokenUsage(completion_tokens=50, generation_ms=500)
+
+    assert usage.tokens_per_second == 100
+    assert usage.as_dict()["tokens_per_second"] == 100
+
+
+def test_token_usage_throughput_unknown_without_timing():
+    """Throughput should be None when nothing was generated."""
+    from app.services.usage_stats import TokenUsage
+
+    assert TokenUsage().tokens_per_second is None
+
+
+def test_usage_stats_aggregates_per_model_and_session():
+    """record should update totals, the model counters and the session counters."""
+    from app.services.usage_stats import TokenUsage, UsageStats
+
+    stats = UsageStats()
+    stats.record("llama", TokenUsage(prompt_tokens=10, completion_tokens=20, generation_ms=1000), "s1")
+    stats.record("llama", TokenUsage(prompt_tokens=5, completion_tokens=10, generation_ms=1000), "s2")
+
+    result = stats.get_stats()
+    assert result["totals"]["total_tokens"] == 45
+    assert result["models"]["llama"]["requests"] == 2
+    assert result["models"]["llama"]["avg_tokens_per_second"] == 15
+    assert stats.get_session_stats("s1")["completion_tokens"] == 20
+    assert stats.get_session_stats("missing") is None
+
+
+def test_usage_stats_bounds_tracked_sessions():
+    """Only the most recently active sessions should be tracked."""
+    from app.services.usage_stats import TokenUsage, UsageStats
+
+    stats = UsageStats()
+    stats._max_sessions = 2
+    for i in range(3):
+        stats.record("llama", TokenUsage(completion_tokens=1), f"s{i}")
+
+    assert stats.get_stats()["tracked_sessions"] == 2
+    assert stats.get_session_stats("s0") is None
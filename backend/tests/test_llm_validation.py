@@ -238,3 +238,22 @@ def test_generate_request_max_tokens_none_is_valid():
         messages=_valid_messages(),
     )
     assert req.max_tokens is None
+
+
+def test_generate_request_total_content_too_long():
+    """Total content across messages exceeding MAX_TOTAL_CONTENT_LENGTH should fail."""
+    from app.routers.generate import (
+        GenerateRequest,
+        MAX_MESSAGE_CONTENT_LENGTH,
+        MAX_TOTAL_CONTENT_LENGTH,
+    )
+
+    count = MAX_TOTAL_CONTENT_LENGTH // MAX_MESSAGE_CONTENT_LENGTH + 1
+    with pytest.raises(ValidationError, match="Total message content exceeds"):
+        GenerateRequest(
+            session_id="test-session",
+            messages=[
+                {"role": "user", "content": "x" * MAX_MESSAGE_CONTENT_LENGTH}
+                for _ in range(count)
+            ],
+        )
@@ -0,0 +1,101 @@
+"""Tests for in-flight request coalescing in the gateway."""
+import asyncio
+
+import pytest
+
+
+def _make_coalescer():
+    from app.services.request_coalescer import RequestCoalescer
+
+    return RequestCoalescer()
+
+
+def test_make_key_is_stable_and_order_independent():
+    """Keys should not depend on dict ordering."""
+    from app.services.request_coalescer import make_key
+
+    assert make_key("tts", {"a": 1, "b": 2}) == make_key("tts", {"b": 2, "a": 1})
+    assert make_key("tts", "hello") != make_key("tts", "hello!")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_streams_share_one_upstream_call():
+    """Identical concurrent streams should trigger one producer and fan out all chunks."""
+    coalescer = _make_coalescer()
+    calls = 0
+    release = asyncio.Event()
+
+    async def producer():
+        nonlocal calls
+        calls += 1
+        yield b"a"
+        await release.wait()
+        yield b"b"
+
+    async def consume():
+        return b"".join([chunk async for chunk in coalescer.stream("k", producer)])
+
+    tasks = [asyncio.create_task(consume()) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert results == [b"ab"] * 3
+    assert calls == 1
+    assert coalescer.get_stats()["coalesced"] == 2
+    assert coalescer.get_stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_error_propagates_to_all_consumers():
+    """A failing producer should raise in every consumer."""
+    from app.services.request_coalescer import UpstreamStatusError
+
+    coalescer = _make_coalescer()
+
+    async def producer():
+        await asyncio.sleep(0.01)
+        raise UpstreamStatusError(500)
+        yield b""  # pragma: no cover
+
+    async def consume():
+        return [chunk async for chunk in coalescer.stream("k", producer)]
+
+    results = await asyncio.gather(consume(), consume(), return_exceptions=True)
+
+    assert all(isinstance(r, UpstreamStatusError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_sequential_streams_are_not_coalesced():
+    """A stream started after the previous one finished should call upstream again."""
+    coalescer = _make_coalescer()
+    calls = 0
+
+    async def producer():
+        nonlocal calls
+        calls += 1
+        yield b"x"
+
+    for _ in range(2):
+        assert [c async for c in coalescer.stream("k", producer)] == [b"x"]
+
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_joining_a_cancelled_stream_raises_a_regular_error():
+    """A caller that joins as the producer is cancelled must not see CancelledError."""
+    coalescer = _make_coalescer()
+
+    async def producer():
+        yield b"a"
+        await asyncio.sleep(1)
+        yield b"b"  # pragma: no cover
+
+    first = coalescer.stream("k", producer)
+    assert await first.__anext__() == b"a"
+    await first.aclose()
+
+    with pytest.raises(RuntimeError):
+        [chunk async for chunk in coalescer.stream("k", producer)]
@@ -224,3 +224,217 @@ async def test_delete_session_removes_data(session_mgr):
         retrieved = await session_mgr.get_session(session["id"])
 
     assert retrieved is None
+
+
+@pytest.mark.asyncio
+async def test_add_message_records_token_count(session_mgr):
+    """add_message should store a token count alongside the content."""
+    with patch("app.services.session_manager.redis_client", session_mgr._fake_redis):
+        session = await session_mgr.create_session()
+        await session_mgr.add_message(session["id"], "user", "Hello there, how are you?")
+        updated = await session_mgr.get_session(session["id"])
+
+    assert updated["memory"]["messages"][0]["tokens"] > 0
+
+
+@pytest.mark.asyncio
+async def test_get_conversation_context_token_budget(session_mgr):
+    """get_conversation_context should stop adding messages at the token budget."""
+    with patch("app.services.session_manager.redis_client", session_mgr._fake_redis):
+        session = await session_mgr.create_session()
+        for i in range(6):
+            await session_mgr.add_message(session["id"], "user", f"Message {i} " + "word " * 50)
+
+        context = await session_mgr.get_conversation_context(
+            session["id"], max_messages=10, max_tokens=150
+        )
+
+    assert 1 <= len(context) < 6
+    assert context[-1]["content"].startswith("Message 5")
+
+
+@pytest.mark.asyncio
+async def test_get_conversation_context_always_includes_latest(session_mgr):
+    """The latest message should be included even if it exceeds the budget."""
+    with patch("app.services.session_manager.redis_client", session_mgr._fake_redis):
+        session = await session_mgr.create_session()
+        await session_mgr.add_message(session["id"], "user", "word " * 500)
+
+        context = await session_mgr.get_conversation_context(session["id"], max_tokens=10)
+
+    assert len(context) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_conversation_context_prepends_summary(session_mgr):
+    """A stored summary should be prepended as a system message."""
+    with patch("app.services.session_manager.redis_client", session_mgr._fake_redis):
+        session = await session_mgr.create_session()
+        await session_mgr.add_message(session["id"], "user", "Hello")
+
+        stored = await session_mgr._fake_redis.get_session(session["id"])
+        stored["memory"]["summary"] = "User's name is Sam."
+        stored["memory"]["summarized_count"] = 1
+        await session_mgr._fake_redis.set_session(session["id"], stored)
+
+        context = await session_mgr.get_conversation_context(session["id"])
+
+    assert context[0]["role"] == "system"
+    assert "User's name is Sam." in context[0]["content"]
+    assert context[1] == {"role": "user", "content": "Hello"}
+
+
+@pytest.mark.asyncio
+async def test_update_summary_folds_dropped_messages(session_mgr):
+    """_update_summary should summarize older turns and advance summarized_count."""
+    summarize = AsyncMock(return_value="Talked about messages 0-3.")
+
+    with patch("app.services.session_manager.redis_client", session_mgr._fake_redis), \
+            patch("app.services.session_manager.conversation_summarizer.summarize", summarize):
+        session = await session_mgr.create_session()
+        for i in range(6):
+            await session_mgr.add_message(session["id"], "user", f"Message {i}")
+
+        await session_mgr._update_summary(session["id"], 4)
+        updated = await session_mgr.get_session(session["id"])
+
+    passed_messages = summarize.call_args.args[2]
+    assert [m["content"] for m in passed_messages] == [f"Message {i}" for i in range(4)]
+    assert updated["memory"]["summary"] == "Talked about messages 0-3."
+    assert updated["memory"]["summarized_count"] == 4
+
+
+@pytest.mark.asyncio
+async def test_get_llm_context_full_then_delta(session_mgr):
+    """After the LLM service acknowledges a version, only new messages are sent."""
+    with patch("app.services.session_manager.redis_client", session_mgr._fake_redis):
+        session = await session_mgr.create_session()
+        await session_mgr.add_message(session["id"], "user", "Hello")
+
+        first = await session_mgr.get_llm_context(session["id"])
+        assert first.delta is False
+        assert first.version == 1
+
+        await session_mgr.add_message(session["id"], "assistant", "Hi there")
+        session_mgr.mark_llm_synced(session["id"], first, 2)
+        await session_mgr.add_message(session["id"], "user", "How are you?")
+
+        second = await session_mgr.get_llm_context(session["id"])
+
+    assert second.delta is True
+    assert second.version == 3
+    assert second.messages == [{"role": "user", "content": "How are you?"}]
+    assert second.payload()["context_version"] == 3
+
+
+@pytest.mark.asyncio
+async def test_get_llm_context_resync_sends_full_window(session_mgr):
+    """resync=True should ignore the acknowledged version."""
+    with patch("app.services.session_manager.redis_client", session_mgr._fake_redis):
+        session = await session_mgr.create_session()
+        await session_mgr.add_message(session["id"], "user", "Hello")
+        first = await session_mgr.get_llm_context(session["id"])
+        await session_mgr.add_message(session["id"], "assistant", "Hi there")
+        session_mgr.mark_llm_synced(session["id"], first, 2)
+        await session_mgr.add_message(session["id"], "user", "How are you?")
+
+        context = await session_mgr.get_llm_context(session["id"], resync=True)
+
+    assert context.delta is False
+    assert len(context.messages) == 3
+
+
+@pytest.mark.asyncio
+async def test_evicted_messages_stay_in_context_until_summarized(session_mgr):
+    """Turns pushed out by the budget must not vanish before the summary covers them."""
+    summarize = AsyncMock(return_value=None)
+
+    with patch("app.services.session_manager.redis_client", session_mgr._fake_redis), \
+            patch("app.services.session_manager.service_registry.get_healthy_service", return_value=object()), \
+            patch("app.services.session_manager.conversation_summarizer.summarize", summarize):
+        session = await session_mgr.create_session()
+        for i in range(7):
+            await session_mgr.add_message(session["id"], "user", f"Message {i}")
+
+        context = await session_mgr.get_conversation_context(session["id"], max_messages=5)
+
+        stored = await session_mgr._fake_redis.get_session(session["id"])
+        stored["memory"]["summary"] = "Talked about messages 0-1."
+        stored["memory"]["summarized_count"] = 2
+        await session_mgr._fake_redis.set_session(session["id"], stored)
+
+        summarized = await session_mgr.get_conversation_context(session["id"], max_messages=5)
+
+    # Two evicted turns are below SUMMARY_MIN_MESSAGES, so no summary runs yet
+    summarize.assert_not_called()
+    assert [m["content"] for m in context] == [f"Message {i}" for i in range(7)]
+    assert [m["content"] for m in summarized[1:]] == [f"Message {i}" for i in range(2, 7)]
+
+
+@pytest.mark.asyncio
+async def test_update_summary_keeps_messages_added_concurrently(session_mgr):
+    """Writing the summary must not overwrite a turn appended at the same time."""
+    import asyncio
+
+    class SlowRedis(FakeRedisClient):
+        async def get_session(self, session_id):
+            data = await super().get_session(session_id)
+            await asyncio.sleep(0)
+            return data
+
+    slow_redis = SlowRedis()
+    summarize = AsyncMock(return_value="Talked about messages 0-3.")
+
+    with patch("app.services.session_manager.redis_client", slow_redis), \
+            patch("app.services.session_manager.conversation_summarizer.summarize", summarize):
+        session = await session_mgr.create_session()
+        for i in range(6):
+            await session_mgr.add_message(session["id"], "user", f"Message {i}")
+
+        await asyncio.gather(
+            session_mgr._update_summary(session["id"], 4),
+            session_mgr.add_message(session["id"], "assistant", "Late reply"),
+        )
+        updated = await slow_redis.get_session(session["id"])
+
+    assert updated["memory"]["summarized_count"] == 4
+    assert updated["memory"]["messages"][-1]["content"] == "Late reply"
+
+
+@pytest.mark.asyncio
+async def test_delta_turn_crossing_budget_moves_window_and_summarizes(session_mgr):
+    """Deltas must carry the budget's window start and still trigger summaries."""
+    import asyncio
+
+    summarize = AsyncMock(return_value="Talked about the first turns.")
+
+    with patch("app.services.session_manager.redis_client", session_mgr._fake_redis), \
+            patch("app.services.session_manager.service_registry.get_healthy_service", return_value=object()), \
+            patch("app.services.session_manager.conversation_summarizer.summarize", summarize), \
+            patch("app.services.session_manager.settings.CONTEXT_MAX_TOKENS", 150), \
+            patch("app.services.session_manager.settings.SUMMARY_MAX_PENDING_MESSAGES", 2):
+        session = await session_mgr.create_session()
+        await session_mgr.add_message(session["id"], "user", "Hello")
+
+        first = await session_mgr.get_llm_context(session["id"])
+        await session_mgr.add_message(session["id"], "assistant", "Hi there")
+        session_mgr.mark_llm_synced(session["id"], first, 2)
+        for i in range(6):
+            await session_mgr.add_message(session["id"], "user", f"Message {i} " + "word " * 50)
+
+        second = await session_mgr.get_llm_context(session["id"])
+        assert second.delta is True
+        assert second.start >= 4
+        assert second.payload()["context_start"] == second.start
+        assert len(second.messages) == 6
+
+        await asyncio.gather(*session_mgr._summary_tasks.values())
+        session_mgr.mark_llm_synced(session["id"], second, 8)
+        await session_mgr.add_message(session["id"], "user", "Next")
+
+        third = await session_mgr.get_llm_context(session["id"])
+
+    summarize.assert_called_once()
+    assert third.delta is False
+    assert third.messages[0]["role"] == "system"
+    assert "Talked about the first turns." in third.messages[0]["content"]
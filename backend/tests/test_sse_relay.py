@@ -0,0 +1,53 @@
+"""Tests for the gateway's SSE relay helpers."""
+import pytest
+
+
+async def _iterate(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _collect(chunks):
+    from app.services.sse import iter_sse_frames
+
+    return [frame async for frame in iter_sse_frames(_iterate(chunks))]
+
+
+@pytest.mark.asyncio
+async def test_frames_split_across_chunks_are_reassembled_byte_for_byte():
+    """Frames should come out unchanged regardless of upstream chunking."""
+    stream = b'data: {"chunk":"Hel","done":false}\n\ndata: {"chunk":"lo","done":false}\n\n'
+
+    frames = await _collect([stream[:7], stream[7:40], stream[40:]])
+
+    assert b"".join(frames) == stream
+    assert frames == [
+        b'data: {"chunk":"Hel","done":false}\n\n',
+        b'data: {"chunk":"lo","done":false}\n\n',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_trailing_partial_frame_is_flushed():
+    """An unterminated last frame should still be delivered."""
+    frames = await _collect([b'data: {"chunk":"a","done":false}\n\ndata: {"error":"x"}'])
+
+    assert frames[-1] == b'data: {"error":"x"}\n\n'
+
+
+def test_final_frame_detection_ignores_token_text():
+    """Only the closing frame should be detected, in both JSON spacings."""
+    from app.services.sse import encode_frame, is_final_frame
+
+    assert is_final_frame(b'data: {"chunk": "", "done": true}\n\n')
+    assert is_final_frame(encode_frame({"chunk": "", "done": True}))
+    assert not is_final_frame(encode_frame({"chunk": 'say "done": true', "done": False}))
+
+
+def test_parse_frame_round_trips():
+    """Encoded frames should decode back to the original payload."""
+    from app.services.sse import encode_frame, parse_frame
+
+    payload = {"chunk": "", "done": True, "full_response": "héllo", "context_version": 4}
+
+    assert parse_frame(encode_frame(payload)) == payload
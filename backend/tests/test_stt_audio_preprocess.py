@@ -0,0 +1,129 @@
+"""Tests for STT audio sniffing and normalization."""
+import struct
+
+import numpy as np
+
+
+def _wav(samples: np.ndarray, rate: int, bits: int = 16, float_samples: bool = False) -> bytes:
+    channels = samples.shape[1]
+    if float_samples:
+        data = samples.astype("<f4").tobytes()
+        tag = 3
+    else:
+        data = (samples * 32767).astype("<i2").tobytes()
+        tag = 1
+    width = bits // 8
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(data), b"WAVE",
+        b"fmt ", 16, tag, channels, rate, rate * channels * width, channels * width, bits,
+        b"data", len(data),
+    )
+    return header + data
+
+
+def test_sniff_format_recognizes_containers():
+    """Common containers should be identified from their magic bytes."""
+    from app.services.audio_preprocess import sniff_format
+
+    assert sniff_format(b"RIFF\x00\x00\x00\x00WAVEfmt ") == "wav"
+    assert sniff_format(b"OggS\x00\x02") == "ogg"
+    assert sniff_format(b"\x1a\x45\xdf\xa3\x01") == "webm"
+    assert sniff_format(b"ID3\x04\x00") == "mp3"
+    assert sniff_format(b"\xff\xfb\x90\x00") == "mp3"
+    assert sniff_format(b"\x00\x00\x00\x20ftypM4A ") == "mp4"
+    assert sniff_format(b"\x01\x00\x02\x00") == "unknown"
+
+
+def test_stereo_48k_float_wav_is_downmixed_and_resampled():
+    """48kHz stereo float WAV should become a much smaller 16kHz mono upload."""
+    from unittest.mock import patch
+    from app.services.audio_preprocess import parse_wav, prepare_audio
+
+    t = np.arange(48000) / 48000
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t)
+    stereo = np.stack([tone, tone], axis=1).astype(np.float32)
+    source = _wav(stereo, 48000, bits=32, float_samples=True)
+
+    with patch("app.services.audio_preprocess.settings.AUDIO_UPLOAD_CODEC", "wav"):
+        prepared = prepare_audio(source)
+
+    assert prepared.format == "wav"
+    assert prepared.bytes * 10 < prepared.original_bytes
+    samples, rate, bits = parse_wav(prepared.data.read())
+    assert (rate, bits, samples.shape) == (16000, 16, (16000, 1))
+    assert abs(np.abs(samples).max() - 0.5) < 0.02
+
+
+def test_compressed_audio_passes_through_untouched():
+    """Already-compressed uploads should be forwarded as-is."""
+    import io
+    from app.services.audio_preprocess import prepare_audio
+
+    webm = io.BytesIO(b"\x1a\x45\xdf\xa3" + b"\x00" * 60)
+    prepared = prepare_audio(webm)
+
+    assert prepared.data is webm
+    assert prepared.format == "webm"
+    assert prepared.content_type == "audio/webm"
+
+
+def test_unrecognized_audio_passes_through_untouched():
+    """Data without a known header should not be guessed to be PCM."""
+    from app.services.audio_preprocess import load_samples, prepare_audio
+
+    data = b"\x01\x02" * 100
+    prepared = prepare_audio(data)
+
+    assert prepared.data is data
+    assert prepared.bytes == prepared.original_bytes == len(data)
+    assert load_samples(data) is None
+
+
+def test_declared_pcm_is_resampled_from_its_rate():
+    """Headerless 16-bit PCM should be resampled from the declared rate."""
+    from unittest.mock import patch
+    from app.services.audio_preprocess import parse_wav, prepare_audio
+
+    pcm = (np.full(32000, 0.25) * 32767).astype("<i2").tobytes()
+    with patch("app.services.audio_preprocess.settings.AUDIO_UPLOAD_CODEC", "wav"):
+        prepared = prepare_audio(b"\x01\x02" + pcm[2:], pcm_sample_rate=32000)
+
+    samples, rate, _ = parse_wav(prepared.data.read())
+    assert rate == 16000
+    assert samples.shape[0] == 16000
+
+
+def test_blocks_are_resampled_like_the_whole_recording():
+    """Block-wise decoding should match resampling the recording in one piece."""
+    from unittest.mock import patch
+    from app.services.audio_preprocess import load_samples, resample
+
+    for rate in (48000, 44100):
+        tone = (0.5 * np.sin(2 * np.pi * 440 * np.arange(rate) / rate)).astype(np.float32)
+        source = _wav(tone[:, None], rate)
+        whole = resample(np.round(tone * 32767) / 32768, rate, 16000)
+
+        with patch("app.services.audio_preprocess.BLOCK_FRAMES", 1000):
+            blocked = load_samples(source)
+
+        assert abs(blocked.size - whole.size) <= 1
+        n = min(blocked.size, whole.size)
+        assert np.abs(blocked[:n] - whole[:n]).max() < 1e-4
+
+
+def test_large_wav_skips_preprocessing():
+    """WAVs over AUDIO_PREPROCESS_MAX_MB should be uploaded unchanged."""
+    import io
+    from unittest.mock import patch
+    from app.services.audio_preprocess import prepare_audio
+
+    stereo = np.zeros((48000, 2), dtype=np.float32)
+    upload = io.BytesIO(_wav(stereo, 48000))
+
+    with patch("app.services.audio_preprocess.settings.AUDIO_PREPROCESS_MAX_MB", 0):
+        prepared = prepare_audio(upload)
+
+    assert prepared.data is upload
+    assert prepared.format == "wav"
+    assert prepared.bytes == prepared.original_bytes
@@ -0,0 +1,54 @@
+"""Tests for bounded-concurrency batch transcription."""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_batch_concurrency_is_bounded_and_results_stream_as_completed():
+    """No more than the configured number of items should run at once."""
+    from app.services.batch import BatchItem, BatchTranscriber
+
+    running = 0
+    peak = 0
+
+    async def transcribe(audio, **kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 if audio == "slow" else 0)
+        running -= 1
+        return {"text": audio}
+
+    async def source(src, language):
+        return await transcribe(src)
+
+    batch = BatchTranscriber(concurrency=2)
+    items = [BatchItem(0, "slow")] + [BatchItem(i, f"fast{i}") for i in range(1, 6)]
+    with patch.object(batch, "_transcribe_source", side_effect=source):
+        results = [r async for r in batch.run(items)]
+
+    assert peak == 2
+    assert len(results) == 6
+    assert results[-1]["index"] == 0
+    assert batch.get_stats()["completed"] == 6
+
+
+def test_reference_urls_match_origin_and_path_exactly():
+    """Lookalike hosts, other ports and sibling paths must not pass the allowlist."""
+    from app.services.batch import url_allowed
+
+    prefixes = ["https://cdn.example.com/audio/", "https://files.example.com:8443/calls"]
+
+    assert url_allowed("https://cdn.example.com/audio/a.wav", prefixes)
+    assert url_allowed("https://CDN.example.com:443/audio/a.wav", prefixes)
+    assert url_allowed("https://files.example.com:8443/calls/1.mp3", prefixes)
+
+    assert not url_allowed("https://cdn.example.com.attacker.net/audio/a.wav", prefixes)
+    assert not url_allowed("https://cdn.example.com@attacker.net/audio/a.wav", prefixes)
+    assert not url_allowed("http://cdn.example.com/audio/a.wav", prefixes)
+    assert not url_allowed("https://cdn.example.com:8080/audio/a.wav", prefixes)
+    assert not url_allowed("https://cdn.example.com/audio/%2e%2e/secret", prefixes)
+    assert not url_allowed("https://files.example.com:8443/calls-internal/1.mp3", prefixes)
+    assert not url_allowed("file:///etc/passwd", prefixes)
@@ -0,0 +1,37 @@
+"""Tests for utterance confidence scoring."""
+import math
+
+
+def test_confidence_is_duration_weighted():
+    """Longer segments should dominate the utterance score."""
+    from app.services.confidence import summarize_segments
+
+    scores = summarize_segments([
+        {"start": 0.0, "end": 3.0, "avg_logprob": -0.1, "no_speech_prob": 0.0},
+        {"start": 3.0, "end": 4.0, "avg_logprob": -2.0, "no_speech_prob": 0.8},
+    ])
+
+    expected = (3 * math.exp(-0.1) + math.exp(-2.0)) / 4
+    assert abs(scores["confidence"] - expected) < 1e-3
+    assert scores["no_speech_prob"] == 0.2
+    assert len(scores["segments"]) == 2
+
+
+def test_no_segments_means_no_speech():
+    """An empty decode should score as silence, not as certain speech."""
+    from app.services.confidence import summarize_segments
+
+    scores = summarize_segments([])
+
+    assert scores["confidence"] == 0.0
+    assert scores["no_speech_prob"] == 1.0
+
+
+def test_language_names_map_to_codes():
+    """Verbose output reports language names; callers expect ISO codes."""
+    from app.services.confidence import language_code
+
+    assert language_code("English") == "en"
+    assert language_code("haitian creole") == "ht"
+    assert language_code("de") == "de"
+    assert language_code(None) is None
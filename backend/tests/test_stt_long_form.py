@@ -0,0 +1,152 @@
+"""Tests for silence-based chunking of long recordings."""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+RATE = 16000
+
+
+def _speech(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _pause(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * RATE), dtype=np.float32)
+
+
+def test_chunks_are_cut_inside_pauses():
+    """Cuts should land in the pause nearest the chunk limit, not mid-speech."""
+    from app.services.long_form import frame_levels, plan_chunks
+
+    audio = np.concatenate([_speech(20), _pause(1), _speech(20), _pause(1), _speech(10)])
+    chunks = plan_chunks(frame_levels(audio, RATE), audio.size, RATE)
+
+    assert len(chunks) == 3
+    assert 20 * RATE < chunks[0].end < 21 * RATE
+    assert not any(c.overlaps_previous for c in chunks)
+    assert chunks[-1].end == audio.size
+
+
+def test_unbroken_speech_is_hard_cut_with_overlap():
+    """Without a pause, chunks should overlap so no words are lost at the cut."""
+    from app.services.long_form import frame_levels, plan_chunks
+
+    audio = _speech(70)
+    chunks = plan_chunks(frame_levels(audio, RATE), audio.size, RATE)
+
+    assert all(c.end - c.start <= 30 * RATE for c in chunks)
+    assert chunks[1].overlaps_previous
+    assert chunks[1].start == chunks[0].end - RATE
+
+
+def test_levels_are_scanned_in_blocks_and_chunks_read_on_demand():
+    """Block-wise levels should match the whole recording; chunk reads cover only their span."""
+    import io
+    from app.services.audio_preprocess import encode_wav
+    from app.services.long_form import Chunk, frame_levels, open_audio, scan_levels
+
+    audio = np.concatenate([_speech(3), _pause(1), _speech(2)])
+    wav = encode_wav(audio, RATE)
+
+    with patch("app.services.audio_preprocess.BLOCK_FRAMES", 1234):
+        reader = open_audio(io.BytesIO(wav))
+        levels = scan_levels(reader)
+        span = reader.read(RATE, 2 * RATE)
+
+    assert reader.frames == audio.size
+    np.testing.assert_allclose(levels, frame_levels(np.round(audio * 32767) / 32768, RATE), atol=1e-3)
+    assert span.size == RATE
+    np.testing.assert_allclose(span, audio[RATE:2 * RATE], atol=1e-4)
+    assert open_audio(b"\x01\x02" * 64) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_files_are_capped():
+    """Files beyond LONG_FORM_MAX_JOBS should wait for a running one to finish."""
+    from app.services.audio_preprocess import encode_wav
+    from app.services.long_form import LongFormTranscriber
+
+    running = 0
+    peak = 0
+
+    async def transcribe(audio, **kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"text": "hi", "language": "en"}
+
+    transcriber = LongFormTranscriber(max_jobs=1)
+
+    async def run():
+        return [r async for r in transcriber.transcribe(encode_wav(_speech(2), RATE))]
+
+    with patch("app.services.long_form.whisper_engine.transcribe", AsyncMock(side_effect=transcribe)):
+        results = await asyncio.gather(run(), run(), run())
+
+    assert peak == 1
+    assert all(r[-1]["text"] == "hi" for r in results)
+
+
+def test_overlap_duplicates_are_removed_when_stitching():
+    """Words repeated across an overlapping cut should appear once."""
+    from app.services.long_form import stitch
+
+    segments = [
+        {"index": 1, "text": "the quick brown fox, jumps over", "overlaps_previous": True},
+        {"index": 0, "text": "We saw that the quick brown", "overlaps_previous": False},
+        {"index": 2, "text": "the lazy dog.", "overlaps_previous": False},
+    ]
+
+    assert stitch(segments) == "We saw that the quick brown fox, jumps over the lazy dog."
+
+
+@pytest.mark.asyncio
+async def test_long_recording_is_transcribed_in_parallel():
+    """Chunks should run concurrently and stream before the stitched result."""
+    from app.services.audio_preprocess import encode_wav
+    from app.services.long_form import LongFormTranscriber
+
+    audio = np.concatenate([_speech(25), _pause(1), _speech(25), _pause(1), _speech(25), _pause(5)])
+    running = 0
+    peak = 0
+
+    async def transcribe(wav, **kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"text": f"part{len(wav) // RATE}", "language": "en"}
+
+    engine = AsyncMock(side_effect=transcribe)
+    with patch("app.services.long_form.whisper_engine.transcribe", engine):
+        results = [r async for r in LongFormTranscriber(concurrency=3).transcribe(encode_wav(audio, RATE))]
+
+    final = results[-1]
+    # The trailing pause becomes its own chunk, which is never sent
+    assert final["done"] and final["segments"] == 4
+    assert engine.await_count == 3
+    assert peak == 3
+    assert [r["index"] for r in sorted(results[:-1], key=lambda r: r["start"])] == [0, 1, 2, 3]
+    assert final["text"].count("part") == 3
+    assert final["language"] == "en"
+
+
+@pytest.mark.asyncio
+async def test_short_audio_is_sent_in_one_request():
+    """Audio below the long-form threshold should not be split."""
+    from app.services.audio_preprocess import encode_wav
+    from app.services.long_form import LongFormTranscriber
+
+    engine = AsyncMock(return_value={"text": "hello", "language": "en"})
+    with patch("app.services.long_form.whisper_engine.transcribe", engine):
+        results = [r async for r in LongFormTranscriber().transcribe(encode_wav(_speech(5), RATE))]
+
+    engine.assert_awaited_once()
+    assert results[-1]["text"] == "hello"
+    assert results[0]["end"] == 5.0
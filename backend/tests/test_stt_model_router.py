@@ -0,0 +1,48 @@
+"""Tests for duration- and language-based STT model routing."""
+
+
+def test_router_picks_model_by_duration_and_language():
+    """Long audio and languages the fast model lacks should use the large model."""
+    from unittest.mock import patch
+    from app.services.audio_preprocess import PreparedAudio
+    from app.services.model_router import ModelRouter
+
+    with patch("app.services.model_router.settings.GROQ_FAST_MODEL_LANGUAGES", "en"):
+        router = ModelRouter()
+
+    short = PreparedAudio(b"", "wav", 0, 0, duration=2.0)
+    long = PreparedAudio(b"", "wav", 0, 0, duration=45.0)
+
+    assert router.choose(short, "en") == router.fast_model
+    assert router.choose(short, "fr") == router.model
+    assert router.choose(short, None) == router.model
+    assert router.choose(long, "en") == router.model
+    assert router.get_stats()["routed"] == {router.fast_model: 1, router.model: 3}
+
+
+def test_compressed_duration_is_estimated_from_size():
+    """Without a decoded duration, the assumed bitrate gives an estimate."""
+    from app.services.audio_preprocess import PreparedAudio
+    from app.services.model_router import estimate_duration
+
+    webm = PreparedAudio(b"", "webm", 40_000, 40_000)
+    assert estimate_duration(webm) == 40_000 * 8 / 32_000
+
+
+def test_escalation_is_skipped_under_quota_pressure():
+    """A doubtful fast result is kept while other calls wait for quota."""
+    from unittest.mock import patch
+    from app.services.model_router import ModelRouter
+
+    router = ModelRouter()
+    doubtful = {"text": "turn left", "confidence": 0.2, "segments": [{}]}
+
+    assert not router.should_escalate(router.model, doubtful)
+    with patch("app.services.model_router.upstream_scheduler._waiters", [(0, 0)]):
+        assert not router.should_escalate(router.fast_model, doubtful)
+    assert router.should_escalate(router.fast_model, doubtful)
+    assert not router.should_escalate(router.fast_model, {**doubtful, "confidence": 0.9})
+
+    stats = router.get_stats()
+    assert stats["escalated"] == 1
+    assert stats["escalations_skipped"] == 1
@@ -0,0 +1,134 @@
+"""Tests for STT provider selection and the local worker-pool engine."""
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+
+def test_provider_selected_by_name():
+    """STT_PROVIDER should map to a provider class; unknown names fail loudly."""
+    from app.models.groq_stt import GroqSTTProvider
+    from app.models.local_whisper import LocalWhisperProvider
+    from app.models.whisper_model import create_provider
+
+    assert isinstance(create_provider("groq"), GroqSTTProvider)
+    assert isinstance(create_provider("whisper"), GroqSTTProvider)
+    assert isinstance(create_provider("local"), LocalWhisperProvider)
+    with pytest.raises(ValueError):
+        create_provider("nope")
+
+
+class _FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append((audio, kwargs, threading.current_thread().name))
+        segments = iter([
+            SimpleNamespace(text=" Hello", start=0.0, end=0.5, avg_logprob=0.0, no_speech_prob=0.01),
+            SimpleNamespace(text=" world.", start=0.5, end=1.0, avg_logprob=-0.5, no_speech_prob=0.03),
+        ])
+        return segments, SimpleNamespace(language="en", language_probability=0.98, duration=1.0)
+
+
+@pytest.mark.asyncio
+async def test_local_provider_runs_inference_on_worker_pool():
+    """Inference should run off the event loop, with WAV decoded to 16kHz samples."""
+    from concurrent.futures import ThreadPoolExecutor
+    from app.models.local_whisper import LocalWhisperProvider
+    from app.services.audio_preprocess import encode_wav
+
+    model = _FakeModel()
+    provider = LocalWhisperProvider()
+    provider._model = model
+    provider._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stt-local")
+    provider.is_loaded = True
+
+    wav = encode_wav(np.zeros(32000, dtype=np.float32), 32000)
+    result = await provider.transcribe(wav, language="en")
+    await provider.unload()
+
+    assert len(model.calls) == 1
+    audio, kwargs, thread_name = model.calls[0]
+    assert thread_name.startswith("stt-local")
+    assert isinstance(audio, np.ndarray) and audio.shape == (16000,)
+    assert kwargs["language"] == "en"
+    assert result["text"] == "Hello world."
+    assert result["language"] == "en"
+    assert result["language_probability"] is None  # hinted, not detected
+    assert 0.0 < result["confidence"] < 1.0
+    assert result["no_speech_prob"] == 0.02
+
+
+
+@pytest.mark.asyncio
+async def test_groq_provider_retries_rate_limited_upload():
+    """A 429 from Groq should be retried with the file re-sent from the start."""
+    import io
+    from unittest.mock import patch
+
+    import httpx
+    from app.models.groq_stt import GroqSTTProvider
+    from app.services.upstream_scheduler import UpstreamScheduler
+
+    bodies = []
+
+    def handler(request):
+        bodies.append(request.read())
+        if len(bodies) == 1:
+            return httpx.Response(429, headers={"retry-after": "0.01"})
+        return httpx.Response(200, json={"text": " hi "})
+
+    scheduler = UpstreamScheduler(requests_per_minute=0, tokens_per_minute=0)
+    scheduler._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider = GroqSTTProvider()
+
+    with patch("app.models.groq_stt.upstream_scheduler", scheduler):
+        result = await provider.transcribe(io.BytesIO(b"\x1a\x45\xdf\xa3" + b"webm" * 8))
+    await scheduler.close()
+
+    assert result["text"] == "hi"
+    assert len(bodies) == 2
+    assert all(b"\x1a\x45\xdf\xa3" + b"webm" * 8 in body for body in bodies)
+
+
+@pytest.mark.asyncio
+async def test_groq_provider_routes_short_clip_to_fast_model_and_escalates():
+    """A short clip should use the fast model and be redone on the large one when doubtful."""
+    from unittest.mock import patch
+
+    import httpx
+    from app.models.groq_stt import GroqSTTProvider
+    from app.services.audio_preprocess import encode_wav
+    from app.services.model_router import ModelRouter
+    from app.services.upstream_scheduler import UpstreamScheduler
+
+    models = []
+
+    def handler(request):
+        body = request.read()
+        model = "whisper-large-v3-turbo" if b"whisper-large-v3-turbo" in body else "whisper-large-v3"
+        models.append(model)
+        logprob = -1.5 if model == "whisper-large-v3-turbo" else -0.1
+        return httpx.Response(200, json={
+            "text": " turn left ",
+            "language": "english",
+            "segments": [{"start": 0.0, "end": 1.0, "avg_logprob": logprob, "no_speech_prob": 0.01}],
+        })
+
+    scheduler = UpstreamScheduler(requests_per_minute=0, tokens_per_minute=0)
+    scheduler._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    router = ModelRouter()
+    wav = encode_wav(np.zeros(16000, dtype=np.float32), 16000)
+
+    with patch("app.models.groq_stt.upstream_scheduler", scheduler), \
+            patch("app.models.groq_stt.model_router", router):
+        result = await GroqSTTProvider().transcribe(wav)
+    await scheduler.close()
+
+    assert models == ["whisper-large-v3-turbo", "whisper-large-v3"]
+    assert result["model"] == "whisper-large-v3"
+    assert result["language"] == "en"
+    assert result["confidence"] > 0.9
+    assert router.get_stats()["escalated"] == 1
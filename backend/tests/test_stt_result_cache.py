@@ -0,0 +1,67 @@
+"""Tests for the transcription result cache."""
+import io
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+def _engine(provider_result):
+    from app.models.whisper_model import WhisperEngine
+
+    provider = MagicMock()
+    provider.is_loaded = True
+    provider.get_info.return_value = {"provider": "groq", "model": "whisper-large-v3"}
+    provider.transcribe = AsyncMock(return_value=provider_result)
+    engine = WhisperEngine()
+    engine.provider = provider
+    return engine, provider
+
+
+@pytest.mark.asyncio
+async def test_duplicate_audio_is_served_from_cache():
+    """Identical audio should reach the provider once."""
+    from app.services.result_cache import TranscriptionCache
+
+    engine, provider = _engine({"text": "hello", "language": "en", "timing": {"total_ms": 300}})
+    with patch("app.models.whisper_model.transcription_cache", TranscriptionCache(max_entries=8)) as cache:
+        first = await engine.transcribe(b"clip-bytes", language="en")
+        # A file with the same content hits the same entry
+        second = await engine.transcribe(io.BytesIO(b"clip-bytes"), language="en")
+        other_language = await engine.transcribe(b"clip-bytes", language="fr")
+
+    assert provider.transcribe.await_count == 2
+    assert first["text"] == second["text"] == "hello"
+    assert second["cached"] is True and "cached" not in other_language
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 2, 2)
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used():
+    """The memory tier should stay within its entry bound."""
+    from app.services.result_cache import TranscriptionCache
+
+    cache = TranscriptionCache(max_entries=2)
+    await cache.set("a", {"text": "a"})
+    await cache.set("b", {"text": "b"})
+    await cache.get("a")
+    await cache.set("c", {"text": "c"})
+
+    assert await cache.get("b") is None
+    assert (await cache.get("a"))["text"] == "a"
+    assert cache.get_stats()["entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_fills_memory_tier():
+    """A result stored by another replica should be served and kept locally."""
+    from app.services.result_cache import TranscriptionCache
+
+    cache = TranscriptionCache(max_entries=4)
+    cache._redis = MagicMock()
+    cache._redis.get = AsyncMock(return_value='{"text": "shared"}')
+
+    assert (await cache.get("k"))["text"] == "shared"
+    assert (await cache.get("k"))["text"] == "shared"
+    cache._redis.get.assert_awaited_once()
+    assert cache.get_stats()["redis_hits"] == 1
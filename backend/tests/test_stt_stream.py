@@ -0,0 +1,239 @@
+"""Tests for the STT streaming ingest endpoint."""
+from unittest.mock import AsyncMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+def _client():
+    from app.routers import transcribe
+
+    app = FastAPI()
+    app.include_router(transcribe.router, prefix="/transcribe")
+    return TestClient(app)
+
+
+def test_chunked_body_is_transcribed():
+    """Audio sent as a chunked body should be assembled and transcribed once."""
+    received = []
+
+    async def transcribe(audio, **kwargs):
+        received.append(audio.read())
+        return {"text": "hi there", "language": "en"}
+
+    engine = AsyncMock(side_effect=transcribe)
+
+    def body():
+        yield b"RIFF"
+        yield b"....WAVEdata"
+
+    with patch("app.routers.transcribe.whisper_engine.transcribe_streaming", engine):
+        response = _client().post("/transcribe/stream?session_id=s1", content=body())
+
+    assert response.status_code == 200
+    assert response.json()["text"] == "hi there"
+    assert received == [b"RIFF....WAVEdata"]
+
+
+def test_empty_stream_is_rejected():
+    """An empty body should be a client error, not a transcription."""
+    response = _client().post("/transcribe/stream?session_id=s1", content=b"")
+
+    assert response.status_code == 400
+
+
+def test_oversized_stream_is_rejected_early():
+    """Uploads beyond the size limit should be refused with 413."""
+    with patch("app.routers.transcribe.MAX_AUDIO_BYTES", 8):
+        response = _client().post("/transcribe/stream?session_id=s1", content=b"x" * 16)
+
+    assert response.status_code == 413
+
+
+def test_multipart_upload_is_passed_as_file():
+    """Multipart uploads should reach the engine as a file, not materialized bytes."""
+    received = []
+
+    async def transcribe(audio, **kwargs):
+        received.append(audio)
+        return {"text": "ok"}
+
+    with patch("app.routers.transcribe.whisper_engine.transcribe_streaming", AsyncMock(side_effect=transcribe)):
+        response = _client().post(
+            "/transcribe/",
+            files={"audio": ("a.wav", b"RIFFdata", "audio/wav")},
+            data={"session_id": "s1"},
+        )
+
+    assert response.status_code == 200
+    assert not isinstance(received[0], bytes)
+
+
+def test_pcm_sample_rate_field_declares_raw_pcm():
+    """The pcm_sample_rate form field should reach the provider and the cache key."""
+    from app.models.whisper_model import whisper_engine
+    from app.services.result_cache import TranscriptionCache
+
+    provider = AsyncMock()
+    provider.get_info = lambda: {"provider": "fake", "model": "m"}
+    provider.transcribe.return_value = {"text": "ok"}
+    cache = TranscriptionCache(max_entries=4, ttl=60)
+    cache.enabled = True
+
+    def post(rate):
+        return _client().post(
+            "/transcribe/",
+            files={"audio": ("a.pcm", b"\x01\x02" * 50, "audio/L16")},
+            data={"session_id": "s1", "pcm_sample_rate": str(rate)},
+        )
+
+    with patch.object(whisper_engine, "provider", provider), \
+         patch("app.models.whisper_model.transcription_cache", cache):
+        assert post(8000).status_code == 200
+        assert post(24000).status_code == 200
+        assert post(0).status_code == 422
+
+    rates = [call.kwargs["pcm_sample_rate"] for call in provider.transcribe.await_args_list]
+    assert rates == [8000, 24000]
+
+
+def test_declared_oversized_body_is_rejected_before_reading():
+    """The middleware should refuse a large Content-Length without reading the body."""
+    from app.middleware import BodySizeLimitMiddleware
+
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware)
+
+    @app.post("/upload")
+    async def upload():  # pragma: no cover - must not be reached
+        return {"ok": True}
+
+    with patch("app.middleware.settings.MAX_AUDIO_SIZE_MB", 0), \
+         patch("app.middleware.BODY_OVERHEAD_BYTES", 4):
+        response = TestClient(app).post("/upload", content=b"x" * 16)
+
+    assert response.status_code == 413
+
+
+def test_spool_rolls_to_disk_and_aborts_past_limit():
+    """Spooling should keep memory bounded and stop as soon as the limit is crossed."""
+    import asyncio
+    import pytest
+    from app.services.audio_spool import AudioTooLarge, spool_stream
+
+    async def chunks(n):
+        for _ in range(n):
+            yield b"x" * 10
+
+    spool = asyncio.run(spool_stream(chunks(3), max_bytes=100, memory_bytes=15))
+    assert spool.size == 30
+    assert spool.rewind().read() == b"x" * 30
+    spool.close()
+
+    with pytest.raises(AudioTooLarge):
+        asyncio.run(spool_stream(chunks(20), max_bytes=100, memory_bytes=15))
+
+
+def test_batch_streams_ndjson_per_item():
+    """A batch should yield one NDJSON line per item plus a summary."""
+    import json
+
+    async def transcribe(audio, **kwargs):
+        data = audio.read()
+        if data == b"bad":
+            raise RuntimeError("provider exploded")
+        return {"text": data.decode(), "language": "en"}
+
+    with patch("app.services.batch.whisper_engine.transcribe", AsyncMock(side_effect=transcribe)):
+        response = _client().post(
+            "/transcribe/batch",
+            files=[
+                ("files", ("a.wav", b"one", "audio/wav")),
+                ("files", ("b.wav", b"bad", "audio/wav")),
+                ("files", ("c.wav", b"", "audio/wav")),
+            ],
+            data={"urls": ["http://internal.example/x.wav"]},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    by_index = {line["index"]: line for line in lines[:-1]}
+    assert by_index[0]["text"] == "one"
+    assert by_index[1]["error"] == "Transcription failed"
+    assert by_index[2]["error"] == "Empty audio file"
+    assert by_index[3]["error"] == "Audio reference not allowed"
+    assert lines[-1] == {**lines[-1], "done": True, "items": 4, "failed": 3}
+
+
+def test_batch_without_items_is_rejected():
+    """An empty batch should be a client error."""
+    response = _client().post("/transcribe/batch", data={"language": "en"})
+
+    assert response.status_code == 400
+
+
+def test_file_upload_checks_size_language_and_busy_upstream():
+    """/file should reject empty and oversized uploads and map quota exhaustion to 503."""
+    from app.services.upstream_scheduler import UpstreamBusy
+
+    seen = {}
+
+    async def busy(audio, language=None):
+        seen["language"] = language
+        raise UpstreamBusy("Groq quota exhausted")
+        yield  # pragma: no cover
+
+    client = _client()
+    files = {"audio": ("a.wav", b"RIFFdata", "audio/wav")}
+
+    assert client.post("/transcribe/file", files={"audio": ("a.wav", b"", "audio/wav")}).status_code == 400
+    with patch("app.routers.transcribe.MAX_AUDIO_BYTES", 4):
+        response = client.post("/transcribe/file", files=files)
+    assert response.status_code == 413
+
+    with patch("app.routers.transcribe.long_form_transcriber.transcribe", busy), \
+            patch("app.routers.transcribe.settings.AUTO_DETECT_LANGUAGE", False), \
+            patch("app.routers.transcribe.settings.LANGUAGE", "de"):
+        response = client.post("/transcribe/file", files=files)
+
+    assert response.status_code == 503
+    assert seen["language"] == "de"
+
+
+def test_chunked_multipart_upload_is_cut_off_at_the_limit():
+    """Without Content-Length the middleware should count body bytes as they stream in."""
+    import asyncio
+    import httpx
+    from app.middleware import BodySizeLimitMiddleware
+    from app.routers import transcribe
+
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware)
+    app.include_router(transcribe.router, prefix="/transcribe")
+    sent = []
+
+    async def body():
+        yield b"--b\r\nContent-Disposition: form-data; name=\"audio\"; filename=\"a.wav\"\r\n\r\n"
+        for _ in range(8):
+            sent.append(1)
+            yield b"x" * 16
+
+    async def upload():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://stt") as client:
+            return await client.post(
+                "/transcribe/file",
+                content=body(),
+                headers={"Content-Type": "multipart/form-data; boundary=b"},
+            )
+
+    engine = AsyncMock(return_value={"text": "never"})
+    with patch("app.middleware.settings.MAX_AUDIO_SIZE_MB", 0), \
+         patch("app.middleware.BODY_OVERHEAD_BYTES", 64), \
+         patch("app.routers.transcribe.long_form_transcriber.transcribe", engine):
+        response = asyncio.run(upload())
+
+    assert response.status_code == 413
+    assert len(sent) < 8
+    engine.assert_not_called()
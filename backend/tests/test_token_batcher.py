@@ -0,0 +1,67 @@
+"""Tests for WebSocket token batching."""
+import asyncio
+
+import pytest
+
+
+def _make_batcher(window_ms=1000, max_bytes=512):
+    from app.services.token_batcher import TokenBatcher
+
+    sent = []
+
+    async def send(text):
+        sent.append(text)
+
+    return TokenBatcher(send, window_ms=window_ms, max_bytes=max_bytes), sent
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_coalesced_until_sentence_boundary():
+    """Consecutive tokens should go out as one frame when a sentence ends."""
+    batcher, sent = _make_batcher()
+
+    for token in ("Hel", "lo", " there", "."):
+        await batcher.add(token)
+    await batcher.add(" More")
+    await batcher.flush()
+
+    assert sent == ["Hello there.", " More"]
+    stats = batcher.get_stats()
+    assert stats["tokens"] == 5
+    assert stats["frames"] == 2
+
+
+@pytest.mark.asyncio
+async def test_byte_limit_forces_flush():
+    """A batch should not grow beyond the byte limit."""
+    batcher, sent = _make_batcher(max_bytes=4)
+
+    await batcher.add("ab")
+    await batcher.add("cd")
+    await batcher.add("e")
+
+    assert sent == ["abcd"]
+
+
+@pytest.mark.asyncio
+async def test_window_flushes_idle_tokens():
+    """Buffered tokens should be sent once the time window elapses."""
+    batcher, sent = _make_batcher(window_ms=10)
+
+    await batcher.add("partial")
+    assert sent == []
+    await asyncio.sleep(0.05)
+
+    assert sent == ["partial"]
+    assert batcher.get_stats()["max_added_latency_ms"] >= 10
+
+
+@pytest.mark.asyncio
+async def test_zero_window_sends_every_token():
+    """A window of 0 should keep per-token delivery."""
+    batcher, sent = _make_batcher(window_ms=0)
+
+    await batcher.add("a")
+    await batcher.add("b")
+
+    assert sent == ["a", "b"]
@@ -0,0 +1,24 @@
+"""Tests for screening transcriptions before the LLM stage."""
+
+
+def test_noise_and_low_confidence_are_filtered_and_counted():
+    """Likely non-speech and unreliable transcripts should be rejected with a reason."""
+    from app.services.transcript_filter import TranscriptFilter
+
+    screen = TranscriptFilter(min_confidence=0.4, max_no_speech_prob=0.6)
+
+    assert screen.check({"text": "book a table", "confidence": 0.9, "no_speech_prob": 0.01}) is None
+    assert screen.check({"text": "you", "confidence": 0.8, "no_speech_prob": 0.9}) == "no_speech"
+    assert screen.check({"text": "mm hmm", "confidence": 0.2, "no_speech_prob": 0.1}) == "low_confidence"
+
+    stats = screen.get_stats()
+    assert stats["accepted"] == 1
+    assert stats["filtered"] == 2
+    assert stats["filtered_by_reason"] == {"no_speech": 1, "low_confidence": 1}
+
+
+def test_results_without_scores_are_accepted():
+    """Older STT responses carry no scores and must keep working."""
+    from app.services.transcript_filter import TranscriptFilter
+
+    assert TranscriptFilter().check({"text": "hello"}) is None
@@ -0,0 +1,49 @@
+"""Tests for synthesized audio metadata."""
+import pytest
+
+# MPEG-2 Layer III, 48kbps, 24kHz, mono: Edge-TTS's output format
+FRAME_HEADER = b"\xff\xf3\x64\xc0"
+FRAME = FRAME_HEADER + b"\x00" * 140  # 144-byte frames of 576 samples (24ms)
+
+
+def test_mp3_meter_counts_frames_across_chunk_boundaries():
+    """Duration should come from the frame headers, however the stream is split."""
+    from app.services.audio_output import MP3Meter
+
+    tag = b"ID3\x04\x00\x00\x00\x00\x00\x05" + b"\x00" * 5
+    stream = tag + FRAME * 50
+
+    meter = MP3Meter()
+    for start in range(0, len(stream), 7):
+        meter.feed(stream[start:start + 7])
+
+    assert meter.frames == 50
+    assert meter.sample_rate == 24000
+    assert meter.duration_ms == pytest.approx(1200.0)
+
+
+@pytest.mark.asyncio
+async def test_synthesize_reports_mp3_and_measured_duration():
+    """Edge-TTS output is MP3, and its duration is measured rather than guessed."""
+    from unittest.mock import patch
+    from app.models.tts_engine import TTSEngine
+
+    class FakeCommunicate:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def stream(self):
+            for _ in range(25):
+                yield {"type": "audio", "data": FRAME * 2}
+            yield {"type": "SentenceBoundary", "offset": 500_000, "duration": 9_000_000}
+
+    engine = TTSEngine()
+    engine.is_initialized = True
+    with patch("edge_tts.Communicate", FakeCommunicate):
+        result = await engine.synthesize("Hello there")
+
+    assert result["format"] == "mp3"
+    assert result["content_type"] == "audio/mpeg"
+    assert result["sample_rate"] == 24000
+    assert result["duration_ms"] == 1200.0
+    assert len(result["audio_data"]) == 50 * len(FRAME)
@@ -0,0 +1,110 @@
+"""Tests for output format negotiation and incremental transcoding."""
+import threading
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+
+def test_format_is_negotiated_from_request_or_default():
+    """Known formats and aliases are accepted; anything else is a validation error."""
+    from app.routers.synthesize import SynthesizeRequest
+
+    assert SynthesizeRequest(session_id="s", text="Hi").format == "mp3"
+    assert SynthesizeRequest(session_id="s", text="Hi", format="ogg").format == "opus"
+    assert SynthesizeRequest(session_id="s", text="Hi", format="PCM").format == "pcm"
+    with pytest.raises(ValidationError, match="Unsupported format"):
+        SynthesizeRequest(session_id="s", text="Hi", format="flac")
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_encoded_one_by_one_on_the_worker_pool():
+    """Each provider chunk should be encoded off the event loop as soon as it arrives."""
+    from app.services.transcoder import StreamEncoder, Transcoder
+
+    threads = []
+
+    class UpperEncoder(StreamEncoder):
+        def feed(self, chunk):
+            threads.append(threading.current_thread().name)
+            return chunk.upper()
+
+        def flush(self):
+            return b"!"
+
+    async def provider():
+        for chunk in (b"ab", b"cd"):
+            yield chunk
+
+    transcoder = Transcoder(workers=1)
+    transcoder._codecs_available = True
+    transcoder.create_encoder = lambda fmt: UpperEncoder()
+
+    output = [chunk async for chunk in transcoder.encode_stream(provider(), "opus")]
+    transcoder.shutdown()
+
+    assert output == [b"AB", b"CD", b"!"]
+    assert all(name.startswith("tts-encode") for name in threads)
+    assert transcoder.get_stats()["streams"] == {"opus": 1}
+
+
+@pytest.mark.asyncio
+async def test_encoder_is_closed_when_the_provider_fails():
+    """An interrupted stream must still release the encoder, on the worker pool."""
+    from app.services.transcoder import StreamEncoder, Transcoder
+
+    closed = []
+
+    class TrackingEncoder(StreamEncoder):
+        def close(self):
+            closed.append(threading.current_thread().name)
+
+    async def provider():
+        yield b"ab"
+        raise ConnectionError("provider dropped")
+
+    transcoder = Transcoder(workers=1)
+    transcoder._codecs_available = True
+    transcoder.create_encoder = lambda fmt: TrackingEncoder()
+
+    with pytest.raises(ConnectionError):
+        async for _ in transcoder.encode_stream(provider(), "pcm"):
+            pass
+    stream = transcoder.encode_stream(provider(), "opus")
+    await stream.__anext__()
+    await stream.aclose()
+    transcoder.shutdown()
+
+    assert len(closed) == 2
+    assert all(name.startswith("tts-encode") for name in closed)
+
+
+@pytest.mark.asyncio
+async def test_unavailable_format_is_refused_before_streaming():
+    """Without PyAV only mp3 can be produced; other formats get 415, not mislabelled MP3."""
+    from unittest.mock import patch
+    from app.routers.synthesize import SynthesizeRequest, synthesize_stream
+    from app.services.transcoder import Transcoder
+
+    transcoder = Transcoder(workers=1)
+    transcoder._codecs_available = False
+
+    with patch("app.routers.synthesize.transcoder", transcoder):
+        with pytest.raises(HTTPException) as exc:
+            await synthesize_stream(SynthesizeRequest(session_id="s", text="Hi", format="opus"))
+        response = await synthesize_stream(SynthesizeRequest(session_id="s", text="Hi", format="mp3"))
+
+    assert exc.value.status_code == 415
+    assert response.media_type == "audio/mpeg"
+
+
+def test_streaming_wav_header_describes_pcm():
+    """The WAV header should describe 16-bit mono PCM with open-ended sizes."""
+    import struct
+    from app.services.transcoder import wav_stream_header
+
+    header = wav_stream_header(24000)
+    assert len(header) == 44
+    channels, rate = struct.unpack("<HI", header[22:28])
+    assert (channels, rate) == (1, 24000)
+    assert header[40:44] == b"\xff\xff\xff\xff"
@@ -0,0 +1,171 @@
+"""Tests for cross-node WebSocket delivery."""
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the gateway Redis client."""
+
+    def __init__(self):
+        self.data = {}
+        self.published = []
+        self.subscribers = 1
+
+    async def set(self, key, value, ttl=None):
+        self.data[key] = value
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+        return self.subscribers
+
+
+def _relay(node_id):
+    from app.services.ws_cluster import ClusterRelay
+
+    relay = ClusterRelay(node_id=node_id)
+    relay.enabled = True
+    return relay
+
+
+@pytest.mark.asyncio
+async def test_message_for_remote_session_is_published_to_owner_node():
+    """A session owned by another node should be reached through its channel."""
+    fake = FakeRedis()
+    node_a, node_b = _relay("a"), _relay("b")
+
+    with patch("app.services.ws_cluster.redis_client", fake):
+        await node_b.claim("s1")
+        delivered = await node_a.send("s1", {"type": "notice"})
+
+    assert delivered
+    channel, envelope = fake.published[0]
+    assert channel == "ws:node:b"
+    assert envelope == {"origin": "a", "session_id": "s1", "message": {"type": "notice"}}
+
+
+@pytest.mark.asyncio
+async def test_send_reports_unowned_or_dead_sessions():
+    """Sessions with no owner, or an owner nobody listens for, are not delivered."""
+    fake = FakeRedis()
+    relay = _relay("a")
+
+    with patch("app.services.ws_cluster.redis_client", fake):
+        assert not await relay.send("missing", {"type": "x"})
+        await fake.set("ws:owner:s1", "gone")
+        fake.subscribers = 0
+        assert not await relay.send("s1", {"type": "x"})
+
+
+@pytest.mark.asyncio
+async def test_release_keeps_ownership_claimed_by_another_node():
+    """A node should not delete ownership that moved to another node."""
+    fake = FakeRedis()
+    node_a, node_b = _relay("a"), _relay("b")
+
+    with patch("app.services.ws_cluster.redis_client", fake):
+        await node_a.claim("s1")
+        await node_b.claim("s1")
+        await node_a.release("s1")
+
+    assert fake.data["ws:owner:s1"] == "b"
+
+
+@pytest.mark.asyncio
+async def test_incoming_messages_are_dispatched_locally():
+    """Routed messages go to the session; a node ignores its own broadcasts."""
+    relay = _relay("b")
+    deliver = AsyncMock(return_value=True)
+    broadcast = AsyncMock()
+    relay._deliver, relay._broadcast = deliver, broadcast
+
+    await relay.handle("ws:node:b", json.dumps({"origin": "a", "session_id": "s1", "message": {"n": 1}}))
+    await relay.handle("ws:broadcast", json.dumps({"origin": "a", "session_id": None, "message": {"n": 2}}))
+    await relay.handle("ws:broadcast", json.dumps({"origin": "b", "session_id": None, "message": {"n": 3}}))
+
+    deliver.assert_awaited_once_with("s1", {"n": 1})
+    broadcast.assert_awaited_once_with({"n": 2})
+
+
+@pytest.mark.asyncio
+async def test_stale_disconnect_keeps_reconnected_session():
+    """The old socket's disconnect must not drop the connection that replaced it."""
+    import asyncio
+    from unittest.mock import MagicMock
+    from app.routers.websocket import ConnectionManager
+
+    def _websocket():
+        ws = MagicMock()
+        ws.scope = {"subprotocols": []}
+        ws.accept = AsyncMock()
+        ws.close = AsyncMock()
+        return ws
+
+    fake = FakeRedis()
+    relay = _relay("a")
+    manager = ConnectionManager()
+
+    with patch("app.services.ws_cluster.redis_client", fake), \
+            patch("app.routers.websocket.cluster_relay", relay):
+        old_ws, new_ws = _websocket(), _websocket()
+        old = await manager.connect("s1", old_ws)
+        new = await manager.connect("s1", new_ws)
+        manager.disconnect("s1", old)
+        await asyncio.sleep(0)
+
+        assert old.closed
+        old_ws.close.assert_awaited_once()
+        assert not new.closed
+        assert manager._connections["s1"] is new
+        assert fake.data["ws:owner:s1"] == "a"
+
+        manager.disconnect("s1", new)
+        await asyncio.sleep(0)
+
+    assert "s1" not in manager._connections
+    assert "ws:owner:s1" not in fake.data
+
+
+@pytest.mark.asyncio
+async def test_release_skips_session_reclaimed_on_this_node():
+    """A release racing with a local reconnect must keep the new claim."""
+    fake = FakeRedis()
+    relay = _relay("a")
+
+    async def get_then_reclaim(key):
+        value = fake.data.get(key)
+        relay._owned.add("s1")
+        return value
+
+    with patch("app.services.ws_cluster.redis_client", fake):
+        await relay.claim("s1")
+        fake.get = get_then_reclaim
+        await relay.release("s1")
+
+    assert fake.data["ws:owner:s1"] == "a"
+
+
+@pytest.mark.asyncio
+async def test_stats_do_not_expose_session_ids():
+    """/ws/stats is public, so it should report totals only."""
+    from unittest.mock import MagicMock
+    from app.routers.websocket import ConnectionManager
+
+    ws = MagicMock()
+    ws.scope = {"subprotocols": []}
+    ws.accept = AsyncMock()
+    manager = ConnectionManager()
+
+    with patch("app.routers.websocket.cluster_relay.claim", AsyncMock()):
+        await manager.connect("secret-session", ws)
+    stats = manager.get_stats()
+
+    assert stats["connections"] == 1
+    assert "secret-session" not in json.dumps(stats)
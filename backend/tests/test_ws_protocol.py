@@ -0,0 +1,192 @@
+"""Tests for the audio-stream WebSocket wire protocol."""
+import struct
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+
+def _websocket(subprotocols=None):
+    ws = MagicMock()
+    ws.scope = {"subprotocols": subprotocols or []}
+    ws.send_json = AsyncMock()
+    ws.send_bytes = AsyncMock()
+    return ws
+
+
+def test_negotiation_only_selects_offered_binary_protocol():
+    """Clients that do not offer the subprotocol should stay on JSON."""
+    from app.services.ws_protocol import BINARY_SUBPROTOCOL, negotiate_subprotocol
+
+    assert negotiate_subprotocol(_websocket([BINARY_SUBPROTOCOL])) == BINARY_SUBPROTOCOL
+    assert negotiate_subprotocol(_websocket(["other"])) is None
+    assert negotiate_subprotocol(_websocket()) is None
+
+
+def test_frame_layouts():
+    """Frames should be a type byte followed by the documented payload."""
+    from app.services import ws_protocol as p
+
+    assert p.encode_token("héllo") == b"\x01" + "héllo".encode("utf-8")
+    assert p.encode_transcription("hi", is_partial=True) == b"\x02\x01hi"
+    assert p.encode_audio_start(3, "audio/mpeg") == b"\x03\x00\x03audio/mpeg"
+    assert p.encode_audio(70000, b"\xff\xfb") == struct.pack(">BH", 4, 70000 & 0xFFFF) + b"\xff\xfb"
+    assert p.encode_audio_end(1) == b"\x05\x00\x01"
+
+
+@pytest.mark.asyncio
+async def test_binary_channel_sends_typed_frames():
+    """A binary client should receive no JSON for tokens or audio."""
+    from app.services.ws_protocol import BINARY_SUBPROTOCOL, ClientChannel
+
+    ws = _websocket()
+    channel = ClientChannel(ws, BINARY_SUBPROTOCOL)
+    channel.start()
+
+    await channel.send_token("Hi")
+    await channel.send_audio(2, b"abc")
+    await channel.drain()
+    channel.close()
+
+    ws.send_json.assert_not_called()
+    assert sorted(c.args[0] for c in ws.send_bytes.await_args_list) == [b"\x01Hi", b"\x04\x00\x02abc"]
+
+
+@pytest.mark.asyncio
+async def test_json_channel_keeps_legacy_messages():
+    """Older clients should keep receiving the original JSON and raw audio."""
+    from app.services.ws_protocol import ClientChannel
+
+    ws = _websocket()
+    channel = ClientChannel(ws)
+    channel.start()
+
+    await channel.send_token("Hi")
+    await channel.send_audio(0, b"abc")
+    await channel.drain()
+    channel.close()
+
+    ws.send_json.assert_awaited_once_with({"type": "llm_chunk", "content": "Hi", "is_final": False})
+    ws.send_bytes.assert_awaited_once_with(b"abc")
+
+
+def _sent_frames(ws):
+    return [c.args[0] for c in ws.send_bytes.await_args_list]
+
+
+@pytest.mark.asyncio
+async def test_queue_orders_control_before_audio_before_text():
+    """Queued frames should be written by priority, keeping order within a class."""
+    from app.services.ws_protocol import BINARY_SUBPROTOCOL, ClientChannel
+
+    ws = _websocket()
+    order = []
+    ws.send_bytes = AsyncMock(side_effect=lambda b: order.append(b[0]))
+    ws.send_json = AsyncMock(side_effect=lambda m: order.append(m["type"]))
+    channel = ClientChannel(ws, BINARY_SUBPROTOCOL)
+
+    await channel.send_token("a")
+    await channel.send_audio(0, b"x")
+    await channel.send_token("b")
+    await channel.send_event({"type": "pong"})
+    await channel.send_audio_end(0)
+    channel.start()
+    await channel.drain()
+    channel.close()
+
+    assert order == ["pong", 0x04, 0x05, 0x01, 0x01]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_oldest_token_delta():
+    """With drop_partial, overflow should discard stale token deltas, not audio."""
+    from app.services.ws_protocol import BINARY_SUBPROTOCOL, ClientChannel
+
+    ws = _websocket()
+    channel = ClientChannel(ws, BINARY_SUBPROTOCOL, max_queue=2, overflow="drop_partial")
+
+    await channel.send_token("old")
+    await channel.send_audio(0, b"x")
+    await channel.send_token("new")
+    channel.start()
+    await channel.drain()
+    channel.close()
+
+    assert _sent_frames(ws) == [b"\x04\x00\x00x", b"\x01new"]
+    assert channel.get_stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_disconnects_with_disconnect_policy():
+    """With disconnect, overflow should close the socket and discard the queue."""
+    import asyncio
+    from app.services.ws_protocol import ClientChannel
+
+    ws = _websocket()
+    ws.close = AsyncMock()
+    channel = ClientChannel(ws, max_queue=1, overflow="disconnect")
+
+    await channel.send_token("a")
+    await channel.send_token("b")
+    await asyncio.sleep(0)
+
+    assert channel.closed
+    assert channel.get_stats()["depth"] == 0
+    ws.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_fallback_tts_audio_keeps_its_place_among_audio():
+    """The base64 fallback clip is audio and must not jump ahead of earlier sentences."""
+    from app.routers.websocket import _generate_tts_fallback
+    from app.services.ws_protocol import ClientChannel
+
+    ws = _websocket()
+    order = []
+    ws.send_json = AsyncMock(side_effect=lambda m: order.append(m["type"]))
+    ws.send_bytes = AsyncMock(side_effect=lambda b: order.append("chunk"))
+    channel = ClientChannel(ws)
+
+    client = MagicMock()
+    client.post = AsyncMock(return_value=MagicMock(status_code=200, content=b"mp3"))
+
+    await channel.send_audio_start(0, "audio/mpeg")
+    await channel.send_audio(0, b"x")
+    await _generate_tts_fallback(MagicMock(url="http://tts"), "s1", "Hi.", channel, client, seq=1)
+    await channel.send_event({"type": "pong"})
+    channel.start()
+    await channel.drain()
+    channel.close()
+
+    assert order == ["pong", "tts_start", "chunk", "tts_audio"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status,body", [
+    (503, b'{"detail": "Upstream quota exhausted"}'),
+    (200, b'data: {"chunk": "Sure", "done": false}\n\ndata: {"chunk": "", "done": true, "error": "Generation failed"}\n\n'),
+])
+async def test_failed_llm_stream_reports_error_without_storing_a_turn(status, body):
+    """A non-200 or failed LLM stream must not be delivered or stored as an empty answer."""
+    from unittest.mock import patch
+    import httpx
+    from app.routers import websocket
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(status, content=body))
+    real_client = httpx.AsyncClient
+    sessions = MagicMock()
+    sessions.add_message = AsyncMock()
+    sessions.get_llm_context = AsyncMock(return_value=MagicMock(delta=False, payload=lambda: {}))
+    channel = MagicMock()
+    channel.send_event = AsyncMock()
+    channel.send_token = AsyncMock()
+
+    with patch.object(websocket, "session_manager", sessions), \
+            patch.object(websocket.service_registry, "get_healthy_service", return_value=MagicMock(url="http://llm")), \
+            patch.object(websocket.httpx, "AsyncClient", lambda **kwargs: real_client(transport=transport)):
+        await websocket.process_complete_transcription("s1", "Book a table", channel)
+
+    events = [c.args[0] for c in channel.send_event.await_args_list]
+    assert events[-1]["type"] == "error"
+    assert not any(e.get("is_final") for e in events)
+    assert [c.args[1] for c in sessions.add_message.await_args_list] == ["user"]
+    sessions.mark_llm_synced.assert_not_called()
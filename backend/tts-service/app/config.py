@@ -33,8 +33,10 @@ class Settings(BaseSettings):
     
     # Audio Output
     SAMPLE_RATE: int = Field(default=22050, env="SAMPLE_RATE")
-    OUTPUT_FORMAT: str = Field(default="wav", env="OUTPUT_FORMAT")
-    # wav, mp3, ogg
+    OUTPUT_FORMAT: str = Field(default="mp3", env="OUTPUT_FORMAT")  # when a request names none
+    # mp3 (passed through), pcm, wav, opus (transcoded; need PyAV)
+    TTS_ENCODER_WORKERS: int = Field(default=2, env="TTS_ENCODER_WORKERS")  # transcoding threads
+    OPUS_BITRATE: int = Field(default=24000, env="OPUS_BITRATE")  # bits/s
     
     # Performance
     USE_GPU: bool = Field(default=True, env="USE_GPU")
@@ -9,6 +9,7 @@ import structlog
 from app.config import settings
 from app.routers import synthesize, health, voices
 from app.models.tts_engine import tts_engine
+from app.services.transcoder import transcoder
 
 logger = structlog.get_logger()
 
@@ -29,6 +30,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     # Shutdown
     logger.info("Shutting down TTS Service")
     await tts_engine.shutdown()
+    transcoder.shutdown()
     logger.info("TTS Service shutdown complete")
 
 
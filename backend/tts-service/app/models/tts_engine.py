@@ -3,12 +3,18 @@ import time
 from typing import AsyncGenerator, Optional, Dict, Any, List
 import structlog
 
+from app.services.audio_output import MP3Meter, boundary_end_ms, content_type
+from app.services.transcoder import transcoder
+
 logger = structlog.get_logger()
 
 
 class TTSEngine:
     """Edge-TTS engine."""
     
+    # Edge-TTS always streams audio-24khz-48kbitrate-mono-mp3
+    output_format = "mp3"
+    
     def __init__(self):
         self.is_initialized = False
         self.sample_rate = 24000
@@ -41,7 +47,11 @@ class TTSEngine:
         voice_id: Optional[str] = "default",
         speed: float = 1.0,
     ) -> Dict[str, Any]:
-        """Synthesize text to speech using Edge-TTS."""
+        """Synthesize text to speech using Edge-TTS.
+
+        The duration is measured from the MP3 frame headers, falling back to
+        the end of the last boundary event if no frames could be parsed.
+        """
         import edge_tts
         from app.config import settings
         
@@ -58,18 +68,24 @@ class TTSEngine:
         
         communicate = edge_tts.Communicate(text, voice, rate=speed_str)
         
-        audio_data = b""
+        audio_data = bytearray()
+        meter = MP3Meter()
+        speech_end_ms = 0.0
         async for chunk in communicate.stream():
             if chunk["type"] == "audio":
                 audio_data += chunk["data"]
+                meter.feed(chunk["data"])
+            elif chunk["type"] in ("WordBoundary", "SentenceBoundary"):
+                speech_end_ms = max(speech_end_ms, boundary_end_ms(chunk))
         
         latency_ms = (time.time() - start_time) * 1000
-        duration_ms = (len(audio_data) / (self.sample_rate * 2)) * 1000  # Rough estimate
+        duration_ms = meter.duration_ms if meter.frames else speech_end_ms
         
         return {
-            "audio_data": audio_data,
-            "format": "wav",
-            "sample_rate": self.sample_rate,
+            "audio_data": bytes(audio_data),
+            "format": self.output_format,
+            "content_type": content_type(self.output_format),
+            "sample_rate": meter.sample_rate or self.sample_rate,
             "duration_ms": round(duration_ms, 2),
             "latency_ms": round(latency_ms, 2),
         }
@@ -110,6 +126,9 @@ class TTSEngine:
         return {
             "initialized": self.is_initialized,
             "provider": "edge-tts",
+            "format": self.output_format,
+            "sample_rate": self.sample_rate,
+            "transcoder": transcoder.get_stats(),
             "voice_count": len(self._voices),
         }
 
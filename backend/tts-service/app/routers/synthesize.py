@@ -3,10 +3,13 @@ from typing import AsyncGenerator, Optional
 
 from fastapi import APIRouter, HTTPException, Response
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 import structlog
 
+from app.config import settings
 from app.models.tts_engine import tts_engine
+from app.services.audio_output import content_type
+from app.services.transcoder import UnsupportedFormat, normalize_format, transcoder
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -21,7 +24,7 @@ class SynthesizeRequest(BaseModel):
     text: str
     voice_id: Optional[str] = "default"
     speed: float = 1.0
-    format: str = "wav"
+    format: Optional[str] = Field(default=None, validate_default=True)  # OUTPUT_FORMAT when omitted
 
     @field_validator('text')
     @classmethod
@@ -39,10 +42,20 @@ class SynthesizeRequest(BaseModel):
             raise ValueError("Speed must be between 0.25 and 4.0")
         return v
 
+    @field_validator('format')
+    @classmethod
+    def validate_format(cls, v: Optional[str]) -> str:
+        return normalize_format(v or settings.OUTPUT_FORMAT)
+
 
 @router.post("/")
 async def synthesize(request: SynthesizeRequest):
-    """Synthesize text to speech."""
+    """Synthesize text to speech in the requested format."""
+    
+    try:
+        transcoder.check(request.format)
+    except UnsupportedFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
     
     try:
         result = await tts_engine.synthesize(
@@ -50,6 +63,9 @@ async def synthesize(request: SynthesizeRequest):
             voice_id=request.voice_id,
             speed=request.speed,
         )
+        audio_data = result["audio_data"]
+        if request.format != result["format"]:
+            audio_data = await transcoder.transcode(audio_data, request.format)
         
         logger.info(
             "Synthesis completed",
@@ -59,10 +75,11 @@ async def synthesize(request: SynthesizeRequest):
         )
         
         return Response(
-            content=result["audio_data"],
-            media_type="audio/wav",
+            content=audio_data,
+            media_type=content_type(request.format),
             headers={
                 "X-Session-ID": request.session_id,
+                "X-Audio-Format": request.format,
                 "X-Duration-Ms": str(result.get("duration_ms", "")),
                 "X-Latency-Ms": str(result["latency_ms"]),
             },
@@ -79,25 +96,30 @@ async def synthesize_stream(request: SynthesizeRequest):
 
     Returns a chunked HTTP response so the gateway (or any caller)
     can forward audio to the client with lower time-to-first-byte.
+    Provider chunks are re-encoded one by one into the requested format;
+    a format this deployment cannot produce is refused with 415 before
+    any audio is sent.
     """
+    try:
+        transcoder.check(request.format)
+    except UnsupportedFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
 
     async def audio_generator() -> AsyncGenerator[bytes, None]:
-        async for chunk in tts_engine.synthesize_stream(
+        chunks = tts_engine.synthesize_stream(
             text=request.text,
             voice_id=request.voice_id,
             speed=request.speed,
-        ):
+        )
+        async for chunk in transcoder.encode_stream(chunks, request.format):
             yield chunk
 
-    try:
-        return StreamingResponse(
-            audio_generator(),
-            media_type=f"audio/{request.format}",
-            headers={
-                "X-Session-ID": request.session_id,
-                "Transfer-Encoding": "chunked",
-            },
-        )
-    except Exception as e:
-        logger.error("Stream synthesis failed", error=str(e))
-        raise HTTPException(status_code=500, detail="Synthesis failed. Please try again.")
+    return StreamingResponse(
+        audio_generator(),
+        media_type=content_type(request.format),
+        headers={
+            "X-Session-ID": request.session_id,
+            "X-Audio-Format": request.format,
+            "Transfer-Encoding": "chunked",
+        },
+    )
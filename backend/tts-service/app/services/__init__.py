@@ -0,0 +1 @@
+"""Services for TTS service."""
@@ -0,0 +1,127 @@
+"""Audio output metadata: content types and durations of synthesized audio."""
+from typing import Any, Dict, Optional, Tuple
+
+# Rate of raw PCM output: Edge-TTS's native rate, so PCM needs no resampling
+PCM_SAMPLE_RATE = 24000
+
+CONTENT_TYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+    "opus": "audio/ogg; codecs=opus",
+    "pcm": f"audio/L16; rate={PCM_SAMPLE_RATE}; channels=1",
+}
+
+# Edge-TTS boundary offsets and durations are in 100ns ticks
+TICKS_PER_MS = 10_000
+
+# Bitrates (kbps) by MPEG version and layer; index 0 is "free format"
+_MPEG1_BITRATES = {
+    1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+}
+_MPEG2_BITRATES = {
+    1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by the header's version bits: 0 = MPEG 2.5, 2 = MPEG 2, 3 = MPEG 1
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+
+def content_type(fmt: str) -> str:
+    """MIME type for an output format."""
+    return CONTENT_TYPES.get(fmt, "application/octet-stream")
+
+
+def parse_mp3_frame(header: bytes) -> Optional[Tuple[int, int, int]]:
+    """Return (frame length, samples, sample rate) for an MPEG audio frame header."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)  # 1, 2 or 3; 4 is reserved
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrates = _MPEG1_BITRATES if version == 3 else _MPEG2_BITRATES
+    bitrate = bitrates[layer][bitrate_index] * 1000
+    rate = _SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x01
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 3 else 576
+        length = samples // 8 * bitrate // rate + padding
+    return length, samples, rate
+
+
+class MP3Meter:
+    """Count MPEG audio frames in a byte stream to measure its duration.
+
+    Chunks are fed as they arrive; frames may span chunks. Only frame
+    headers are inspected, so metering is linear in the stream length.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.samples = 0
+        self.sample_rate: Optional[int] = None
+        self._skip = 0
+        self._carry = b""
+        self._started = False
+
+    def feed(self, chunk: bytes) -> None:
+        """Account for the next chunk of the stream."""
+        data = self._carry + chunk if self._carry else chunk
+        self._carry = b""
+        size = len(data)
+        pos = min(self._skip, size)
+        self._skip -= pos
+
+        if not self._started and pos < size:
+            if size - pos < 10:
+                self._carry = data[pos:]
+                return
+            self._started = True
+            if data[pos:pos + 3] == b"ID3":
+                # Synchsafe tag size, excluding the 10-byte header
+                tag = data[pos + 6:pos + 10]
+                pos += 10 + (tag[0] << 21 | tag[1] << 14 | tag[2] << 7 | tag[3])
+
+        while pos + 4 <= size:
+            frame = parse_mp3_frame(data[pos:pos + 4])
+            if frame is None:
+                # Resynchronize on the next possible frame header
+                pos = data.find(b"\xff", pos + 1)
+                if pos < 0:
+                    return
+                continue
+            length, samples, rate = frame
+            self.frames += 1
+            self.samples += samples
+            self.sample_rate = rate
+            pos += length
+
+        if pos > size:
+            self._skip = pos - size
+        elif pos < size:
+            self._carry = data[pos:]
+
+    @property
+    def duration_ms(self) -> float:
+        if not self.sample_rate:
+            return 0.0
+        return self.samples * 1000 / self.sample_rate
+
+
+def boundary_end_ms(event: Dict[str, Any]) -> float:
+    """End of a word or sentence boundary event, in milliseconds."""
+    return (event.get("offset", 0) + event.get("duration", 0)) / TICKS_PER_MS
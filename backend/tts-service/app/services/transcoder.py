@@ -0,0 +1,276 @@
+"""Incremental transcoding of provider MP3 into the negotiated output format.
+
+``mp3`` is passed through untouched. ``pcm`` (16-bit mono at
+PCM_SAMPLE_RATE), ``wav`` (the same PCM behind a streaming WAV header) and
+``opus`` (Ogg Opus) are decoded and re-encoded chunk by chunk with PyAV,
+which is only imported when one of them is requested. Each chunk is
+encoded on a worker pool as soon as it arrives from the provider, so the
+first output bytes follow the first provider chunk.
+"""
+import asyncio
+import io
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Optional
+
+import structlog
+
+from app.config import settings
+from app.services.audio_output import PCM_SAMPLE_RATE
+
+logger = structlog.get_logger()
+
+OUTPUT_FORMATS = ("mp3", "pcm", "wav", "opus")
+
+# Accepted spellings of the output formats
+FORMAT_ALIASES = {"ogg": "opus", "mpeg": "mp3", "l16": "pcm"}
+
+# libopus only encodes at 48kHz (or its divisors)
+OPUS_SAMPLE_RATE = 48000
+
+# Ogg page length; shorter pages reach the client sooner at a little overhead
+OGG_PAGE_DURATION_US = 60_000
+
+
+class UnsupportedFormat(Exception):
+    """Raised when an output format cannot be produced by this deployment."""
+
+
+def normalize_format(name: str) -> str:
+    """Canonical output format name, or ValueError."""
+    fmt = FORMAT_ALIASES.get(name.strip().lower(), name.strip().lower())
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported format: {name} (expected one of {', '.join(OUTPUT_FORMATS)})")
+    return fmt
+
+
+def wav_stream_header(rate: int, channels: int = 1, bits: int = 16) -> bytes:
+    """WAV header for a stream of unknown length (sizes set to the maximum)."""
+    block_align = channels * bits // 8
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, rate, rate * block_align, block_align, bits)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+class StreamEncoder:
+    """Turns provider MP3 chunks into output chunks; used by one stream at a time."""
+
+    def feed(self, chunk: bytes) -> bytes:
+        return chunk
+
+    def flush(self) -> bytes:
+        return b""
+
+    def close(self) -> None:
+        """Release codec resources; safe to call more than once."""
+
+
+class _MP3Decoder:
+    """Decode MP3 chunks to 16-bit mono frames at ``rate``."""
+
+    def __init__(self, rate: int):
+        import av
+
+        self._codec = av.CodecContext.create("mp3", "r")
+        self._resampler = av.AudioResampler(format="s16", layout="mono", rate=rate)
+
+    def decode(self, chunk: bytes):
+        for packet in self._codec.parse(chunk):
+            for frame in self._codec.decode(packet):
+                yield from self._resampler.resample(frame)
+
+    def flush(self):
+        for packet in self._codec.parse(b""):
+            for frame in self._codec.decode(packet):
+                yield from self._resampler.resample(frame)
+        for frame in self._codec.decode(None):
+            yield from self._resampler.resample(frame)
+        yield from self._resampler.resample(None)
+
+
+def _pcm_bytes(frame) -> bytes:
+    # Planes are padded; packed 16-bit mono holds two bytes per sample
+    return bytes(frame.planes[0])[: frame.samples * 2]
+
+
+class PCMEncoder(StreamEncoder):
+    """Raw 16-bit PCM, optionally behind a streaming WAV header."""
+
+    def __init__(self, wav: bool = False):
+        self._decoder = _MP3Decoder(PCM_SAMPLE_RATE)
+        self._header = wav_stream_header(PCM_SAMPLE_RATE) if wav else b""
+
+    def feed(self, chunk: bytes) -> bytes:
+        return self._emit(b"".join(_pcm_bytes(f) for f in self._decoder.decode(chunk)))
+
+    def flush(self) -> bytes:
+        return self._emit(b"".join(_pcm_bytes(f) for f in self._decoder.flush()))
+
+    def _emit(self, data: bytes) -> bytes:
+        if data and self._header:
+            data, self._header = self._header + data, b""
+        return data
+
+
+class OpusEncoder(StreamEncoder):
+    """Ogg Opus at OPUS_BITRATE, muxed into an in-memory sink drained per chunk."""
+
+    def __init__(self):
+        import av
+
+        self._decoder = _MP3Decoder(OPUS_SAMPLE_RATE)
+        self._sink = io.BytesIO()
+        self._container = av.open(
+            self._sink,
+            mode="w",
+            format="ogg",
+            container_options={"page_duration": str(OGG_PAGE_DURATION_US), "flush_packets": "1"},
+        )
+        self._stream = self._container.add_stream("libopus", rate=OPUS_SAMPLE_RATE)
+        self._stream.codec_context.layout = "mono"
+        self._stream.codec_context.bit_rate = settings.OPUS_BITRATE
+        self._pts = 0
+        self._closed = False
+
+    def feed(self, chunk: bytes) -> bytes:
+        for frame in self._decoder.decode(chunk):
+            self._encode(frame)
+        return self._drain()
+
+    def flush(self) -> bytes:
+        for frame in self._decoder.flush():
+            self._encode(frame)
+        for packet in self._stream.encode(None):
+            self._container.mux(packet)
+        self.close()
+        return self._drain()
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._container.close()
+
+    def _encode(self, frame) -> None:
+        frame.pts = self._pts
+        frame.time_base = Fraction(1, OPUS_SAMPLE_RATE)
+        self._pts += frame.samples
+        for packet in self._stream.encode(frame):
+            self._container.mux(packet)
+
+    def _drain(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
+
+
+class Transcoder:
+    """Convert provider audio to the requested format on a worker pool."""
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.TTS_ENCODER_WORKERS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._codecs_available: Optional[bool] = None
+        self.streams: Dict[str, int] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.encode_ms = 0.0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="tts-encode")
+        return self._executor
+
+    def available(self, fmt: str) -> bool:
+        """Whether ``fmt`` can be produced; everything but mp3 needs PyAV."""
+        if fmt == "mp3":
+            return True
+        if self._codecs_available is None:
+            try:
+                import av  # noqa: F401
+
+                self._codecs_available = True
+            except ImportError:
+                self._codecs_available = False
+        return self._codecs_available
+
+    def check(self, fmt: str) -> None:
+        """Raise UnsupportedFormat if ``fmt`` cannot be produced."""
+        if not self.available(fmt):
+            raise UnsupportedFormat(f"Format '{fmt}' needs PyAV (pip install av); use mp3")
+
+    def create_encoder(self, fmt: str) -> StreamEncoder:
+        """A fresh encoder for one stream."""
+        if fmt == "opus":
+            return OpusEncoder()
+        if fmt in ("pcm", "wav"):
+            return PCMEncoder(wav=fmt == "wav")
+        return StreamEncoder()
+
+    async def encode_stream(self, chunks: AsyncIterator[bytes], fmt: str) -> AsyncGenerator[bytes, None]:
+        """Re-encode a stream of provider chunks, one chunk at a time."""
+        self.check(fmt)
+        self.streams[fmt] = self.streams.get(fmt, 0) + 1
+        if fmt == "mp3":
+            async for chunk in chunks:
+                self.bytes_in += len(chunk)
+                self.bytes_out += len(chunk)
+                yield chunk
+            return
+
+        loop = asyncio.get_running_loop()
+        encoder = await loop.run_in_executor(self.executor, self.create_encoder, fmt)
+        try:
+            async for chunk in chunks:
+                output = await self._run(loop, encoder.feed, chunk)
+                if output:
+                    yield output
+            output = await self._run(loop, encoder.flush)
+            if output:
+                yield output
+        finally:
+            # Also reached when the client disconnects or the provider fails
+            await loop.run_in_executor(self.executor, encoder.close)
+
+    async def transcode(self, data: bytes, fmt: str) -> bytes:
+        """Re-encode a complete clip."""
+        parts = [chunk async for chunk in self.encode_stream(_single(data), fmt)]
+        return b"".join(parts)
+
+    async def _run(self, loop, fn, *args) -> bytes:
+        start = time.perf_counter()
+        output = await loop.run_in_executor(self.executor, fn, *args)
+        self.encode_ms += (time.perf_counter() - start) * 1000
+        self.bytes_in += len(args[0]) if args else 0
+        self.bytes_out += len(output)
+        return output
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get transcoding statistics."""
+        return {
+            "workers": self.workers,
+            "codecs_available": self.available("opus"),
+            "streams": dict(self.streams),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "encode_ms": round(self.encode_ms, 2),
+        }
+
+
+async def _single(data: bytes) -> AsyncGenerator[bytes, None]:
+    yield data
+
+
+# Global transcoder instance
+transcoder = Transcoder()